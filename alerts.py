@@ -0,0 +1,378 @@
+"""
+Alert pipeline for the SPX Bull Put Credit Spread Trading Bot
+
+Signals, orders, fills, closes and errors go out by email and/or Telegram
+(Config.ENABLE_EMAIL_ALERTS / ENABLE_TELEGRAM) without the trading loop
+ever waiting on SMTP or HTTP:
+- notify() only puts the alert on a queue; a worker thread does all I/O
+- Alerts arriving within one batch window are sent as a single message
+  per channel, and a channel gets at most one message per min_interval;
+  alerts held back meanwhile join the next message
+- A failed delivery is retried with exponential backoff (or after the
+  delay Telegram asks for), then dropped
+- Log records travel through the same queue (install_logging), so the log
+  file is written by the worker too, and ERROR records become alerts
+"""
+
+import json
+import logging
+import queue
+import threading
+import time as time_module
+from datetime import datetime
+from logging.handlers import QueueHandler
+
+from config import Config
+
+_STOP = object()
+
+
+class DeliveryError(Exception):
+    """A channel refused a message; retry_after is the delay it asked for"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EmailChannel:
+    """Sends alert digests over SMTP"""
+
+    name = 'email'
+
+    def __init__(self, server, port=587, username="", password="", recipients=(),
+                 sender=None, starttls=True, timeout=10):
+        """
+        Args:
+            server: SMTP host
+            port: SMTP port
+            username: Login, skipped if empty
+            password: Password for username
+            recipients: Addresses to send to
+            sender: From address, defaults to username
+            starttls: Upgrade the connection with STARTTLS before logging in
+            timeout: Socket timeout in seconds
+        """
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.recipients = list(recipients)
+        self.sender = sender or username or "spx-bot@localhost"
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, subject, body):
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = self.sender
+        message['To'] = ", ".join(self.recipients)
+        message.set_content(body)
+        with smtplib.SMTP(self.server, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class TelegramChannel:
+    """Sends alert digests through the Telegram Bot API"""
+
+    name = 'telegram'
+    MAX_LENGTH = 4096  # Characters per message
+
+    def __init__(self, token, chat_id, api_url="https://api.telegram.org", timeout=10):
+        """
+        Args:
+            token: Bot token from @BotFather
+            chat_id: Chat to post to
+            api_url: Bot API base URL
+            timeout: Request timeout in seconds
+        """
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.timeout = timeout
+
+    def send(self, subject, body):
+        import urllib.error
+        import urllib.request
+
+        text = f"{subject}\n\n{body}"
+        if len(text) > self.MAX_LENGTH:
+            text = text[:self.MAX_LENGTH - 1] + "…"
+        request = urllib.request.Request(
+            self.url, data=json.dumps({'chat_id': self.chat_id, 'text': text}).encode(),
+            headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                result = json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                result = json.load(e)
+            except ValueError:
+                raise DeliveryError(f"HTTP {e.code}") from e
+        if not result.get('ok'):
+            raise DeliveryError(result.get('description', 'rejected'),
+                                result.get('parameters', {}).get('retry_after'))
+
+
+class _PipelineHandler(QueueHandler):
+    """Hands log records to the pipeline, dropping them if its queue is full"""
+
+    def __init__(self, pipeline):
+        super().__init__(pipeline._queue)
+        self.pipeline = pipeline
+
+    def enqueue(self, record):
+        self.pipeline._put(record)
+
+
+class AlertPipeline:
+    """Background delivery of alerts and log records"""
+
+    def __init__(self, channels=(), batch_window=5.0, max_batch=50, min_interval=10.0,
+                 retries=5, backoff=(2.0, 300.0), max_queue=10000, max_pending=500,
+                 alert_level=logging.ERROR, title="SPX bot"):
+        """
+        Args:
+            channels: EmailChannel / TelegramChannel instances
+            batch_window: Seconds alerts are collected before a message goes out
+            max_batch: Alerts that trigger a message before the window ends
+            min_interval: Minimum seconds between messages on one channel
+            retries: Delivery attempts after the first before alerts are dropped
+            backoff: (initial, maximum) seconds between delivery attempts
+            max_queue: Items queued before new ones are dropped
+            max_pending: Undelivered alerts kept per channel, oldest dropped first
+            alert_level: Log records at or above this level are also alerts
+            title: Prefix of every message subject
+        """
+        self.channels = list(channels)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self.alert_level = alert_level
+        self.title = title
+        self.logger = logging.getLogger(__name__)
+
+        self.dropped = 0            # Items lost to a full queue or failed delivery
+        self._queue = queue.Queue(max_queue)
+        self._log_handlers = []     # Handlers the worker writes log records to
+        self._root_handlers = []    # Taken over from the root logger, returned on stop
+        self._log_handler = None    # Installed on the root logger
+        self._outbox = {}           # channel -> {'alerts', 'attempt', 'due'}
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config=Config, **kwargs) -> 'AlertPipeline':
+        """Pipeline with the channels enabled in config"""
+        logger = logging.getLogger(__name__)
+        channels = []
+        if config.ENABLE_EMAIL_ALERTS:
+            if config.EMAIL_SMTP_SERVER and config.EMAIL_RECIPIENTS:
+                channels.append(EmailChannel(config.EMAIL_SMTP_SERVER, config.EMAIL_PORT,
+                                             config.EMAIL_USERNAME, config.EMAIL_PASSWORD,
+                                             config.EMAIL_RECIPIENTS))
+            else:
+                logger.warning("Email alerts enabled but EMAIL_SMTP_SERVER or "
+                               "EMAIL_RECIPIENTS not set")
+        if config.ENABLE_TELEGRAM:
+            if config.TELEGRAM_BOT_TOKEN and config.TELEGRAM_CHAT_ID:
+                channels.append(TelegramChannel(config.TELEGRAM_BOT_TOKEN,
+                                                config.TELEGRAM_CHAT_ID))
+            else:
+                logger.warning("Telegram alerts enabled but TELEGRAM_BOT_TOKEN or "
+                               "TELEGRAM_CHAT_ID not set")
+        kwargs.setdefault('batch_window', config.ALERT_BATCH_SECONDS)
+        kwargs.setdefault('min_interval', config.ALERT_MIN_INTERVAL)
+        kwargs.setdefault('retries', config.ALERT_RETRIES)
+        return cls(channels, **kwargs)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def notify(self, kind, message):
+        """
+        Queue an alert; never blocks
+
+        Args:
+            kind: Short event type, e.g. 'SIGNAL', 'ORDER', 'FILL', 'CLOSE'
+            message: One line of text
+        """
+        if self.channels and self._thread is not None:
+            self._put((time_module.time(), kind, message))
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def install_logging(self, level=logging.INFO, log_file=None):
+        """
+        Route the root logger through the pipeline
+
+        Handlers already on the root logger (e.g. the console handler of
+        logging.basicConfig) are moved onto the worker, so no log call in
+        the trading loop writes to a stream itself.
+
+        Args:
+            level: Root logger level
+            log_file: File the worker appends records to, if any
+        """
+        if self._log_handler is None:
+            root = logging.getLogger()
+            self._root_handlers = list(root.handlers)
+            for handler in self._root_handlers:
+                root.removeHandler(handler)
+            self._log_handlers.extend(self._root_handlers)
+            self._log_handler = _PipelineHandler(self)
+            root.addHandler(self._log_handler)
+            if log_file:
+                handler = logging.FileHandler(log_file)
+                handler.setFormatter(logging.Formatter(
+                    "%(asctime)s %(name)s %(levelname)s %(message)s"))
+                self._log_handlers.append(handler)
+        logging.getLogger().setLevel(level)
+        return self._log_handler
+
+    def start(self):
+        """Start the delivery thread"""
+        if self.running:
+            return self
+        self._thread = threading.Thread(target=self._run, name="alert-pipeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until everything queued so far has been written or sent once"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout=30):
+        """Send what is pending and stop the delivery thread"""
+        root = logging.getLogger()
+        if self._log_handler is not None:
+            root.removeHandler(self._log_handler)
+            self._log_handler = None
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+        for handler in self._log_handlers:
+            if handler in self._root_handlers:
+                root.addHandler(handler)
+            else:
+                handler.close()
+        self._log_handlers = []
+        self._root_handlers = []
+
+    # Delivery thread
+
+    def _run(self):
+        batch, deadline = [], None
+        while True:
+            try:
+                item = self._queue.get(timeout=self._wait(deadline))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                self._post(batch)
+                batch, deadline = [], None
+                self._deliver(force=True)
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+
+            if isinstance(item, logging.LogRecord):
+                self._write_log(item)
+                # The pipeline's own warnings are not alerted, or a dead
+                # channel would keep feeding itself
+                if (self.channels and item.levelno >= self.alert_level
+                        and item.name != __name__):
+                    batch.append((item.created, item.levelname, item.getMessage()))
+            elif item is not None:
+                batch.append(item)
+
+            now = time_module.monotonic()
+            if batch and deadline is None:
+                deadline = now + self.batch_window
+            if batch and (len(batch) >= self.max_batch or now >= deadline):
+                self._post(batch)
+                batch, deadline = [], None
+            self._deliver()
+
+    def _wait(self, deadline):
+        """Seconds until the batch closes or a channel is due, None if idle"""
+        times = [box['due'] for box in self._outbox.values() if box['alerts']]
+        if deadline is not None:
+            times.append(deadline)
+        if not times:
+            return None
+        return max(min(times) - time_module.monotonic(), 0)
+
+    def _write_log(self, record):
+        for handler in self._log_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _post(self, alerts):
+        """Add a batch to every channel's outbox"""
+        if not alerts:
+            return
+        for channel in self.channels:
+            box = self._outbox.setdefault(channel, {'alerts': [], 'attempt': 0, 'due': 0.0})
+            box['alerts'].extend(alerts)
+            overflow = len(box['alerts']) - self.max_pending
+            if overflow > 0:
+                del box['alerts'][:overflow]
+                self.dropped += overflow
+
+    def _deliver(self, force=False):
+        """Send each channel's pending alerts if it is due (or force)"""
+        now = time_module.monotonic()
+        for channel, box in self._outbox.items():
+            if not box['alerts'] or (not force and now < box['due']):
+                continue
+            alerts = box['alerts']
+            try:
+                channel.send(*self._format(alerts))
+            except Exception as e:
+                box['attempt'] += 1
+                if box['attempt'] > self.retries:
+                    self.logger.warning(f"Dropping {len(alerts)} {channel.name} alerts after "
+                                        f"{box['attempt']} attempts: {e}")
+                    self.dropped += len(alerts)
+                    box.update(alerts=[], attempt=0, due=now + self.min_interval)
+                    continue
+                delay = min(self.backoff[0] * 2 ** (box['attempt'] - 1), self.backoff[1])
+                delay = max(delay, getattr(e, 'retry_after', None) or 0)
+                box['due'] = now + delay
+                self.logger.warning(f"{channel.name} alert delivery failed ({e}), retry "
+                                    f"{box['attempt']}/{self.retries} in {delay:.0f}s")
+                continue
+            box.update(alerts=[], attempt=0, due=now + self.min_interval)
+
+    def _format(self, alerts) -> tuple:
+        """(subject, body) of one message"""
+        if len(alerts) == 1:
+            _, kind, message = alerts[0]
+            subject = f"{self.title}: {kind} {message}"[:120]
+        else:
+            counts = {}
+            for _, kind, _ in alerts:
+                counts[kind] = counts.get(kind, 0) + 1
+            subject = f"{self.title}: " + ", ".join(f"{n} {kind}" for kind, n in counts.items())
+        body = "\n".join(f"{datetime.fromtimestamp(created):%Y-%m-%d %H:%M:%S} {kind} {message}"
+                         for created, kind, message in alerts)
+        return subject, body
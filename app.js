@@ -505,15 +505,114 @@ function calculateDTE(expiryDate) {
   return Math.max(0, diffDays);
 }
 
-// Simulate real-time RSI updates (for demo purposes)
-function simulateRSIUpdates() {
-  setInterval(() => {
-    // Small random fluctuation in RSI
-    const fluctuation = (Math.random() - 0.5) * 2;
-    appData.currentMarket.rsi = Math.max(0, Math.min(100, appData.currentMarket.rsi + fluctuation));
-    updateRSIDisplay();
-  }, 30000); // Update every 30 seconds
+// Live data from the bot's dashboard server (dashboard.py). The page keeps
+// the sample data above when opened as a file or when no bot is running.
+const liveState = { market: {}, positions: {}, performance: {}, signals: [] };
+const dirtySections = new Set();
+let renderScheduled = false;
+
+function connectLiveFeed() {
+  if (!window.EventSource || !location.protocol.startsWith('http')) {
+    return;
+  }
+  const source = new EventSource('/events');
+  source.onmessage = function(event) {
+    applyFrame(JSON.parse(event.data));
+  };
+  source.onerror = function() {
+    console.log('Live feed disconnected, retrying...');
+  };
+}
+
+function applyFrame(frame) {
+  if (frame.snapshot) {
+    Object.keys(liveState).forEach(section => {
+      liveState[section] = frame.snapshot[section] || (section === 'signals' ? [] : {});
+      dirtySections.add(section);
+    });
+  }
+  Object.entries(frame.set || {}).forEach(([section, entries]) => {
+    const current = liveState[section] || (liveState[section] = {});
+    Object.entries(entries).forEach(([key, value]) => {
+      if (value === null) {
+        delete current[key];
+      } else {
+        current[key] = value;
+      }
+    });
+    dirtySections.add(section);
+  });
+  Object.entries(frame.append || {}).forEach(([section, items]) => {
+    liveState[section] = (liveState[section] || []).concat(items).slice(-50);
+    dirtySections.add(section);
+  });
+
+  // Render at most once per animation frame however many frames arrive
+  if (!renderScheduled) {
+    renderScheduled = true;
+    requestAnimationFrame(renderLiveState);
+  }
+}
+
+function renderLiveState() {
+  renderScheduled = false;
+
+  if (dirtySections.has('market')) {
+    const symbols = Object.keys(liveState.market);
+    const market = liveState.market.SPX || liveState.market[symbols[0]];
+    if (market) {
+      const rsi = market.signal_rsi !== null ? market.signal_rsi : market.rsi;
+      if (rsi !== null) {
+        appData.currentMarket.rsi = rsi;
+      }
+      if (market.price !== null) {
+        appData.currentMarket.spxPrice = market.price;
+      }
+      appData.currentMarket.timestamp = market.time;
+      updateRSIDisplay();
+    }
+  }
+
+  if (dirtySections.has('positions')) {
+    currentPositions = Object.entries(liveState.positions).map(([id, p]) => ({
+      id: id,
+      entryDate: p.entry_time,
+      shortStrike: p.short_strike,
+      longStrike: p.long_strike,
+      expiry: p.expiry,
+      quantity: p.quantity,
+      entryCredit: p.net_credit,
+      currentValue: p.mark,
+      pnl: p.pnl === null ? 0 : Math.round(p.pnl),
+      status: p.status,
+      dte: p.dte
+    }));
+    populatePositions();
+    updateRiskCalculations();
+  }
+
+  if (dirtySections.has('performance') && liveState.performance.trades) {
+    const perf = liveState.performance;
+    appData.performance.totalTrades = perf.trades;
+    appData.performance.winningTrades = perf.wins;
+    appData.performance.winRate = perf.win_rate;
+    appData.performance.totalPnL = Math.round(perf.total_pnl);
+    appData.performance.currentMonthPnL = Math.round(perf.month_pnl);
+    appData.performance.avgDaysInTrade = perf.avg_days;
+    updatePerformanceMetrics();
+  }
+
+  if (dirtySections.has('signals')) {
+    appData.signals = liveState.signals.slice().reverse().map(signal => ({
+      date: signal.time,
+      rsi: signal.rsi === null ? 'N/A' : signal.rsi.toFixed(1),
+      action: signal.action,
+      outcome: signal.outcome || signal.symbol
+    }));
+    populateSignals();
+  }
+
+  dirtySections.clear();
 }
 
-// Start simulation after dashboard is loaded
-setTimeout(simulateRSIUpdates, 5000);
\ No newline at end of file
+document.addEventListener('DOMContentLoaded', connectLiveFeed);
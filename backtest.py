@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtest for the SPX Bull Put Credit Spread strategy
+
+Replays the SPXBullPutBot rules on daily closes:
+1. Enter at the close when RSI < RSI_THRESHOLD
+2. Sell the at-the-money put, buy the put SPREAD_WIDTH points below
+3. Expiry DAYS_TO_EXPIRY calendar days out
+4. Close when the spread can be bought back for PROFIT_TARGET of the credit
+5. Force close once days to expiry <= MIN_DTE
+6. At most MAX_POSITIONS open spreads, MAX_RISK_PER_TRADE per spread
+
+There is no historical option data here, so premiums are Black-Scholes
+prices off realized volatility. Treat results as a sanity check on the
+rules, not a forecast of live fills.
+
+Run: python backtest.py
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from indicators import rsi
+from pricing import bs_price
+
+STRIKE_INCREMENT = 5       # SPX strikes near the money are 5 points apart
+CONTRACT_MULTIPLIER = 100
+
+
+def _apply_position_limit(entry_idx, exit_idx, max_positions):
+    """
+    Greedily accept candidate entries while fewer than max_positions are open
+
+    A position exiting on a bar frees its slot for an entry on that same
+    bar, matching the bot which manages positions before scanning.
+    Loops over signals only, not over bars.
+    """
+    accepted = np.zeros(len(entry_idx), dtype=bool)
+    open_exits = np.empty(0, dtype=np.int64)
+    for k, (entry, exit_) in enumerate(zip(entry_idx, exit_idx)):
+        open_exits = open_exits[open_exits > entry]
+        if len(open_exits) < max_positions:
+            accepted[k] = True
+            open_exits = np.append(open_exits, exit_)
+    return accepted
+
+
+class BullPutBacktest:
+    """Backtest engine for the RSI bull put spread rules"""
+
+    def __init__(self, config=Config, **overrides):
+        """
+        Args:
+            config: TradingConfig class supplying the defaults
+            **overrides: Strategy parameters by bot attribute name, e.g.
+                rsi_threshold=30, spread_width=15
+        """
+        self.rsi_threshold = config.RSI_THRESHOLD
+        self.rsi_period = config.RSI_PERIOD
+        self.days_to_expiry = config.DAYS_TO_EXPIRY
+        self.spread_width = config.SPREAD_WIDTH
+        self.profit_target = config.PROFIT_TARGET
+        self.position_size = config.POSITION_SIZE
+        self.max_positions = config.MAX_POSITIONS
+        self.min_dte = config.MIN_DTE
+        self.max_risk_per_trade = config.MAX_RISK_PER_TRADE
+        self.initial_capital = config.INITIAL_CAPITAL
+
+        # Pricing assumptions
+        self.risk_free_rate = 0.04
+        self.vol_window = 20       # Days of realized vol used as implied vol
+        self.vol_premium = 1.1     # Implied vol usually trades above realized
+        self.min_vol = 0.08
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown backtest parameter: {name}")
+            setattr(self, name, value)
+
+    def implied_vol(self, closes: np.ndarray) -> np.ndarray:
+        """Annualized realized volatility scaled up as an implied vol proxy"""
+        log_returns = np.diff(np.log(closes), prepend=np.nan)
+        realized = pd.Series(log_returns).rolling(self.vol_window).std().to_numpy()
+        vol = realized * math.sqrt(252) * self.vol_premium
+        return np.maximum(np.nan_to_num(vol, nan=self.min_vol), self.min_vol)
+
+    def run(self, prices) -> dict:
+        """
+        Run the backtest over a daily price history
+
+        Args:
+            prices: Series of closes, or DataFrame with a 'close'/'Close'
+                column, indexed by date
+
+        Returns:
+            Dict with 'trades' (DataFrame), 'equity' (Series), 'win_rate',
+            'max_drawdown', 'total_pnl' and 'num_trades'
+        """
+        if isinstance(prices, pd.DataFrame):
+            prices = prices['close'] if 'close' in prices else prices['Close']
+        prices = prices.dropna()
+        dates = pd.DatetimeIndex(prices.index).tz_localize(None).normalize()
+        return self.run_arrays(dates.to_numpy(dtype='datetime64[D]'),
+                               prices.to_numpy(dtype=np.float64), prices.index)
+
+    def run_arrays(self, days: np.ndarray, closes: np.ndarray, index=None) -> dict:
+        """
+        Run the backtest on raw arrays (no copies are made of the inputs)
+
+        Args:
+            days: Bar dates as datetime64[D], oldest first
+            closes: Daily closes aligned with days
+            index: Index for the trades and equity output; defaults to days
+        """
+        if index is None:
+            index = pd.DatetimeIndex(days)
+        vols = self.implied_vol(closes)
+        n = len(closes)
+
+        # Entry candidates: every bar closing with RSI below threshold
+        rsi_values = rsi(closes, self.rsi_period)
+        entry = np.flatnonzero(rsi_values < self.rsi_threshold)
+
+        short_strike = np.round(closes[entry] / STRIKE_INCREMENT) * STRIKE_INCREMENT
+        long_strike = short_strike - self.spread_width
+        expiry = days[entry] + np.timedelta64(self.days_to_expiry, 'D')
+
+        years = self.days_to_expiry / 365.0
+        credit = (bs_price(closes[entry], short_strike, years, vols[entry], self.risk_free_rate)
+                  - bs_price(closes[entry], long_strike, years, vols[entry], self.risk_free_rate))
+        max_risk = self.spread_width - credit
+        # Bot gate on credit and risk; a signal on the final bar can't be managed
+        risk_ok = ((credit > 0)
+                   & (max_risk * CONTRACT_MULTIPLIER * self.position_size <= self.max_risk_per_trade)
+                   & (entry < n - 1))
+        entry, short_strike, long_strike = entry[risk_ok], short_strike[risk_ok], long_strike[risk_ok]
+        expiry, credit, max_risk = expiry[risk_ok], credit[risk_ok], max_risk[risk_ok]
+
+        # First bar on which days to expiry <= MIN_DTE forces the close
+        force_day = expiry - np.timedelta64(self.min_dte, 'D')
+        force_idx = np.maximum(np.searchsorted(days, force_day, side='left'), entry + 1)
+        past_end = force_idx > n - 1
+        force_idx = np.minimum(force_idx, n - 1)
+
+        if not len(entry):
+            return self._report(pd.DataFrame(), index, n)
+
+        # Mark every candidate on every bar up to its force close in one pass
+        horizon = int((force_idx - entry).max())
+        bar = entry[:, None] + np.arange(1, horizon + 1)[None, :]
+        valid = bar <= force_idx[:, None]
+        bar = np.minimum(bar, n - 1)
+        remaining = (expiry[:, None] - days[bar]).astype(np.float64) / 365.0
+        value = (bs_price(closes[bar], short_strike[:, None], remaining, vols[bar], self.risk_free_rate)
+                 - bs_price(closes[bar], long_strike[:, None], remaining, vols[bar], self.risk_free_rate))
+
+        target = credit * (1 - self.profit_target)
+        hit = valid & (value <= target[:, None])
+        hit_any = hit.any(axis=1)
+        exit_col = np.where(hit_any, hit.argmax(axis=1), force_idx - entry - 1)
+        exit_idx = entry + 1 + exit_col
+        exit_value = value[np.arange(len(entry)), exit_col]
+
+        accepted = _apply_position_limit(entry, exit_idx, self.max_positions)
+        pnl = (credit - exit_value) * CONTRACT_MULTIPLIER * self.position_size
+
+        trades = pd.DataFrame({
+            'entry_date': index[entry],
+            'exit_date': index[exit_idx],
+            'short_strike': short_strike,
+            'long_strike': long_strike,
+            'expiry': pd.to_datetime(expiry),
+            'credit': credit,
+            'exit_value': exit_value,
+            'max_risk': max_risk,
+            'exit_reason': np.where(hit_any, 'profit_target',
+                                    np.where(past_end, 'end_of_data', 'min_dte')),
+            'pnl': pnl,
+        })[accepted].reset_index(drop=True)
+
+        return self._report(trades, index, n, exit_idx[accepted])
+
+    def _report(self, trades, index, n, exit_idx=None) -> dict:
+        """Build realized equity curve and summary statistics"""
+        daily_pnl = np.zeros(n)
+        if len(trades):
+            daily_pnl = np.bincount(exit_idx, weights=trades['pnl'].to_numpy(), minlength=n)
+        equity = pd.Series(self.initial_capital + np.cumsum(daily_pnl), index=index, name='equity')
+
+        peak = np.maximum.accumulate(equity.to_numpy())
+        drawdown = (equity.to_numpy() - peak) / peak
+
+        return {
+            'trades': trades,
+            'equity': equity,
+            'num_trades': len(trades),
+            'win_rate': float((trades['pnl'] > 0).mean()) if len(trades) else 0.0,
+            'total_pnl': float(trades['pnl'].sum()) if len(trades) else 0.0,
+            'max_drawdown': float(-drawdown.min()) if n else 0.0,
+        }
+
+
+def load_history(start=Config.BACKTEST_START_DATE, end=Config.BACKTEST_END_DATE) -> pd.Series:
+    """Download daily S&P 500 index closes from Yahoo Finance"""
+    import yfinance as yf
+    data = yf.Ticker("^GSPC").history(start=start, end=end)
+    return data['Close']
+
+
+def print_report(result):
+    """Print a backtest summary"""
+    equity = result['equity']
+    print("\n" + "="*50)
+    print("📊 SPX Bull Put Strategy Backtest")
+    print("="*50)
+    if len(equity):
+        print(f"Period: {equity.index[0]:%Y-%m-%d} to {equity.index[-1]:%Y-%m-%d}")
+        print(f"Final equity: ${equity.iloc[-1]:,.2f}")
+    print(f"Trades: {result['num_trades']}")
+    print(f"Win rate: {result['win_rate']:.1%}")
+    print(f"Total P&L: ${result['total_pnl']:,.2f}")
+    print(f"Max drawdown: {result['max_drawdown']:.2%}")
+
+
+def main():
+    """Backtest the configured strategy over the configured date range"""
+    prices = load_history()
+    if prices.empty:
+        print("No price history available")
+        return
+    print_report(BullPutBacktest().run(prices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Local on-disk bar store for the SPX Bull Put Credit Spread Trading Bot
+
+Bars are kept as one NumPy structured array per symbol and bar size, read
+back through a memory map. The bot serves history from disk and only asks
+the broker for bars after the last stored timestamp, so restarts and
+repeated checks cost a small delta request instead of a full download.
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype([
+    ('time', 'datetime64[ns]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+BAR_FIELDS = [name for name in BAR_DTYPE.names if name != 'time']
+
+
+class BarStore:
+    """Persistent bar cache keyed by symbol and bar size"""
+
+    def __init__(self, root="data/bars"):
+        """
+        Args:
+            root: Directory holding the .npy bar files
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol, bar_size):
+        key = re.sub(r'[^A-Za-z0-9]+', '_', f"{symbol}_{bar_size}").strip('_')
+        return os.path.join(self.root, f"{key}.npy")
+
+    def _open(self, symbol, bar_size) -> np.ndarray:
+        """Memory-map the stored bars (read-only); empty array if none"""
+        path = self._path(symbol, bar_size)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.load(path, mmap_mode='r')
+
+    def last_timestamp(self, symbol, bar_size) -> Optional[datetime]:
+        """Timestamp of the newest stored bar, or None if nothing is stored"""
+        bars = self._open(symbol, bar_size)
+        if not len(bars):
+            return None
+        return pd.Timestamp(bars['time'][-1]).to_pydatetime()
+
+    def first_timestamp(self, symbol, bar_size) -> Optional[datetime]:
+        """Timestamp of the oldest stored bar, or None if nothing is stored"""
+        bars = self._open(symbol, bar_size)
+        if not len(bars):
+            return None
+        return pd.Timestamp(bars['time'][0]).to_pydatetime()
+
+    def load(self, symbol, bar_size, start: datetime = None) -> pd.DataFrame:
+        """
+        Load stored bars as a DataFrame indexed by bar time
+
+        Args:
+            symbol: Instrument symbol
+            bar_size: Bar size label, e.g. '1 day'
+            start: Only return bars at or after this time
+        """
+        bars = self._open(symbol, bar_size)
+        if start is not None and len(bars):
+            first = np.searchsorted(bars['time'], np.datetime64(start, 'ns'))
+            bars = bars[first:]
+        # Copy only the requested window out of the map
+        bars = np.array(bars)
+
+        df = pd.DataFrame({name: bars[name] for name in BAR_FIELDS},
+                          index=pd.DatetimeIndex(bars['time'], name='date'))
+        return df
+
+    def merge(self, symbol, bar_size, times: np.ndarray, data: pd.DataFrame) -> int:
+        """
+        Merge freshly fetched bars into the store
+
+        Bars at or after the first new timestamp replace what is stored, so
+        a previously saved in-progress bar is overwritten by its final
+        version.
+
+        Args:
+            symbol: Instrument symbol
+            bar_size: Bar size label, e.g. '1 day'
+            times: Bar timestamps as datetime64[ns], oldest first
+            data: Bars with open/high/low/close/volume columns
+
+        Returns:
+            Number of bars now stored
+        """
+        if not len(times):
+            return len(self._open(symbol, bar_size))
+
+        new = np.empty(len(times), dtype=BAR_DTYPE)
+        new['time'] = times
+        for name in BAR_FIELDS:
+            new[name] = data[name].to_numpy(dtype='f8') if name in data else np.nan
+
+        order = np.argsort(new['time'], kind='stable')
+        new = new[order]
+
+        stored = self._open(symbol, bar_size)
+        keep = np.searchsorted(stored['time'], new['time'][0]) if len(stored) else 0
+        merged = np.concatenate((stored[:keep], new))
+        del stored  # Release the map before replacing the file
+
+        path = self._path(symbol, bar_size)
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, merged)
+        os.replace(tmp_path, path)
+        return len(merged)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the SPX Bull Put Credit Spread Trading Bot
+
+- Startup: `import spx_bull_put_bot` is timed in a fresh interpreter and
+  must stay under IMPORT_BUDGET seconds without pulling in any broker SDK
+  or indicator backend.
+- Pipeline: the bot runs against sim_broker.SimulatedBroker and each stage
+  of a strategy iteration is timed, along with the full signal-to-order
+  path and the quote-to-exit path for an open spread.
+
+Run: python benchmark.py [--iterations 50] [--quote-latency 0.005]
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_BUDGET = 1.0        # Seconds allowed for `import spx_bull_put_bot`
+LAZY_MODULES = ['ib_insync', 'alpaca', 'tda', 'talib', 'pandas_ta']
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import spx_bull_put_bot
+elapsed = time.perf_counter() - start
+loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'loaded': loaded}}))
+"""
+
+
+def bench_startup(repeats=5, budget=IMPORT_BUDGET) -> dict:
+    """
+    Time `import spx_bull_put_bot` in fresh interpreters
+
+    Returns:
+        Dict with 'median' and 'max' seconds, 'loaded' (lazy modules that
+        were imported anyway) and 'passed'
+    """
+    timings = []
+    loaded = set()
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', _IMPORT_PROBE],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result['elapsed'])
+        loaded.update(result['loaded'])
+
+    median = statistics.median(timings)
+    return {
+        'median': median,
+        'max': max(timings),
+        'loaded': sorted(loaded),
+        'passed': median <= budget and not loaded,
+    }
+
+
+class StageTimer:
+    """Collects wall-clock samples per named stage"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self) -> dict:
+        """{stage: {'median', 'p95', 'max'}} in milliseconds"""
+        out = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            out[stage] = {
+                'median': statistics.median(ordered) * 1000,
+                'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+                'max': ordered[-1] * 1000,
+            }
+        return out
+
+
+def bench_pipeline(iterations=20, quote_latency=0.005, fill_latency=0.0) -> dict:
+    """
+    Time every stage of a strategy iteration against the simulated broker
+
+    Args:
+        iterations: Number of full entry/exit cycles
+        quote_latency: Seconds before each subscription receives a quote
+        fill_latency: Seconds before each order fills
+
+    Returns:
+        StageTimer.summary() of the run
+    """
+    from sim_broker import SimulatedBroker
+    from spx_bull_put_bot import SPXBullPutBot
+
+    broker = SimulatedBroker(quote_latency=quote_latency, fill_latency=fill_latency)
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as data_dir:
+        bot = SPXBullPutBot(platform="IB", broker=broker, data_dir=data_dir)
+        logging.getLogger().setLevel(logging.WARNING)
+        timer.time('rsi_seed', bot.update_rsi)
+
+        for _ in range(iterations):
+            timer.time('manage_positions', bot.manage_positions)
+            data = timer.time('data_fetch', bot.get_spx_data, 2)
+            timer.time('rsi_update', bot._feed_rsi, data, False)
+
+            start = time.perf_counter()
+            chain = timer.time('chain', bot.get_options_chain, 'SPX', bot.days_to_expiry)
+            selection = timer.time('selection', bot.select_spread, chain, broker.spot)
+            if selection is None:
+                continue
+            timer.time('order', bot.open_position, *selection)
+            timer.samples.setdefault('signal_to_order', []).append(time.perf_counter() - start)
+
+            # Let the legs stream, then rally through the profit target
+            broker.sleep(quote_latency + fill_latency + 0.001)
+            base_spot = broker.spot
+            timer.time('quote_to_exit', broker.set_spot, base_spot + 150)
+            broker.set_spot(base_spot)
+            for position_id in list(bot.positions):
+                bot.close_position(position_id)
+
+        bot.journal.close()
+    return timer.summary()
+
+
+def main():
+    """Run all benchmarks and exit non-zero if any budget is exceeded"""
+    parser = argparse.ArgumentParser(description="SPX bot performance benchmarks")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--quote-latency', type=float, default=0.005)
+    parser.add_argument('--skip-pipeline', action='store_true',
+                        help="Only run the startup benchmark")
+    args = parser.parse_args()
+
+    startup = bench_startup()
+    status = "OK" if startup['passed'] else "FAIL"
+    print(f"[{status}] import spx_bull_put_bot: median {startup['median'] * 1000:.0f} ms, "
+          f"max {startup['max'] * 1000:.0f} ms (budget {IMPORT_BUDGET * 1000:.0f} ms)")
+    if startup['loaded']:
+        print(f"       eagerly imported: {', '.join(startup['loaded'])}")
+
+    if not args.skip_pipeline:
+        stages = bench_pipeline(args.iterations, args.quote_latency)
+        print(f"\nPipeline ({args.iterations} iterations, "
+              f"quote latency {args.quote_latency * 1000:.1f} ms):")
+        print(f"{'stage':<18}{'median ms':>12}{'p95 ms':>10}{'max ms':>10}")
+        for stage, stats in stages.items():
+            print(f"{stage:<18}{stats['median']:>12.2f}{stats['p95']:>10.2f}{stats['max']:>10.2f}")
+
+    sys.exit(0 if startup['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Recorded option chain store for the SPX Bull Put Credit Spread Trading Bot
+
+Every chain snapshot the bot prices is appended to a columnar store,
+partitioned by symbol, trade date and expiry:
+
+    data/chains/SPX/2025-09-15/20250929/
+        snapshots.bin   one record per snapshot: time, first row, row count,
+                        underlying price
+        strikes.bin     strike dictionary (float64), in order of first sight
+        strike_idx.bin  uint16 index into strikes.bin, one per row
+        bid.bin ask.bin last.bin con_id.bin              float64 / int64
+        iv.bin delta.bin gamma.bin theta.bin vega.bin    float32
+
+Columns are raw little-endian arrays, so ChainReader memory-maps them and
+replays snapshots without parsing or copying a whole file. Space is saved
+with narrow types instead of a general-purpose codec, which would rule
+out mapping: strikes are dictionary-encoded and greeks stored as float32,
+roughly halving the row size. Quotes stay float64 so prices replay exactly.
+
+Files are append-only and snapshots.bin is written last, so a crash can
+only leave column bytes past the last committed snapshot; they are cut
+off the next time the partition is opened for writing. Writes happen on
+a background thread, like the position journal.
+
+Run: python chain_store.py [--symbol SPX] [--start 2025-09-01] [--end 2025-09-30]
+"""
+
+import argparse
+import logging
+import os
+import queue
+import threading
+import time as time_module
+from datetime import datetime
+
+import numpy as np
+
+from option_chain import GREEKS, OptionChain
+
+SNAPSHOT_DTYPE = np.dtype([
+    ('time', '<M8[ns]'),
+    ('offset', '<i8'),
+    ('rows', '<i4'),
+    ('underlying', '<f8'),
+])
+
+COLUMNS = {
+    'strike_idx': np.dtype('<u2'),
+    'bid': np.dtype('<f8'),
+    'ask': np.dtype('<f8'),
+    'last': np.dtype('<f8'),
+    'con_id': np.dtype('<i8'),
+    **{name: np.dtype('<f4') for name in GREEKS},
+}
+
+_STOP = object()
+
+
+def _read(path, dtype, count=None) -> np.ndarray:
+    """Memory-map a raw column (read-only); empty array if missing or empty"""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    available = size // dtype.itemsize
+    count = available if count is None else min(count, available)
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+class ChainRecorder:
+    """Appends chain snapshots to the store from a background thread"""
+
+    def __init__(self, root="data/chains"):
+        """
+        Args:
+            root: Directory holding one subdirectory per symbol
+        """
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        self._partitions = {}  # path -> {'rows': committed rows, 'strikes': {strike: idx}}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="chain-recorder",
+                                        daemon=True)
+        self._thread.start()
+
+    def record(self, symbol, chain: OptionChain, underlying=np.nan, timestamp=None):
+        """
+        Queue one chain snapshot for writing
+
+        Args:
+            symbol: Underlying symbol
+            chain: Snapshot to store; its arrays must not be modified in place
+                afterwards (the bot only ever replaces them)
+            underlying: Underlying price at the time of the snapshot
+            timestamp: Snapshot time, defaults to now
+        """
+        if chain is None or not len(chain):
+            return
+        columns = {name: getattr(chain, name) for name in ('strike', 'bid', 'ask', 'last',
+                                                            'expiry', 'con_id', *GREEKS)}
+        self._queue.put((symbol, timestamp or datetime.now(), underlying, columns))
+
+    def flush(self, timeout=None):
+        """Wait until every queued snapshot is on disk"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.logger.error(f"Error recording {item[0]} chain: {e}")
+
+    def _write(self, symbol, timestamp, underlying, columns):
+        day = timestamp.strftime('%Y-%m-%d')
+        expiries = columns['expiry']
+        for expiry in np.unique(expiries):
+            rows = expiries == expiry
+            path = os.path.join(self.root, symbol, day, str(expiry))
+            self._append(path, timestamp, underlying,
+                         {name: values[rows] for name, values in columns.items()})
+
+    def _open_partition(self, path) -> dict:
+        """Load a partition's write state, discarding uncommitted column bytes"""
+        state = self._partitions.get(path)
+        if state is not None:
+            return state
+
+        os.makedirs(path, exist_ok=True)
+        index = os.path.join(path, 'snapshots.bin')
+        if os.path.exists(index):
+            os.truncate(index, os.path.getsize(index) // SNAPSHOT_DTYPE.itemsize
+                        * SNAPSHOT_DTYPE.itemsize)
+        snapshots = _read(index, SNAPSHOT_DTYPE)
+        rows = int(snapshots['offset'][-1] + snapshots['rows'][-1]) if len(snapshots) else 0
+        del snapshots
+        for name, dtype in COLUMNS.items():
+            column = os.path.join(path, f"{name}.bin")
+            if os.path.exists(column) and os.path.getsize(column) > rows * dtype.itemsize:
+                os.truncate(column, rows * dtype.itemsize)
+
+        strikes = _read(os.path.join(path, 'strikes.bin'), np.dtype('<f8'))
+        state = {'rows': rows, 'strikes': {float(s): i for i, s in enumerate(strikes)}}
+        del strikes
+        self._partitions[path] = state
+        return state
+
+    def _append(self, path, timestamp, underlying, columns):
+        state = self._open_partition(path)
+        strikes = state['strikes']
+
+        new = [float(s) for s in np.unique(columns['strike']) if float(s) not in strikes]
+        if new:
+            with open(os.path.join(path, 'strikes.bin'), 'ab') as f:
+                f.write(np.asarray(new, dtype='<f8').tobytes())
+            for strike in new:
+                strikes[strike] = len(strikes)
+        columns['strike_idx'] = [strikes[float(s)] for s in columns['strike']]
+
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(path, f"{name}.bin"), 'ab') as f:
+                f.write(np.asarray(columns[name], dtype=dtype).tobytes())
+
+        # Committing the snapshot record last makes the rows above visible
+        record = np.array([(np.datetime64(timestamp, 'ns'), state['rows'],
+                            len(columns['strike']), underlying)], dtype=SNAPSHOT_DTYPE)
+        with open(os.path.join(path, 'snapshots.bin'), 'ab') as f:
+            f.write(record.tobytes())
+        state['rows'] += len(columns['strike'])
+
+
+class ChainPartition:
+    """Memory-mapped snapshots of one symbol, trade date and expiry"""
+
+    def __init__(self, path, expiry):
+        """
+        Args:
+            path: Partition directory
+            expiry: IB-style 'YYYYMMDD' expiry the partition holds
+        """
+        self.path = path
+        self.expiry = expiry
+        self.snapshots = _read(os.path.join(path, 'snapshots.bin'), SNAPSHOT_DTYPE)
+        rows = (int(self.snapshots['offset'][-1] + self.snapshots['rows'][-1])
+                if len(self.snapshots) else 0)
+        self.strikes = np.array(_read(os.path.join(path, 'strikes.bin'), np.dtype('<f8')))
+        self.columns = {name: _read(os.path.join(path, f"{name}.bin"), dtype, rows)
+                        for name, dtype in COLUMNS.items()}
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.snapshots['time']
+
+    @property
+    def strike(self) -> np.ndarray:
+        """Strike of every stored row"""
+        return self.strikes[self.columns['strike_idx']]
+
+    def chain(self, i) -> OptionChain:
+        """Snapshot i as an OptionChain, greeks included"""
+        start = int(self.snapshots['offset'][i])
+        rows = slice(start, start + int(self.snapshots['rows'][i]))
+        cols = {name: column[rows] for name, column in self.columns.items()}
+
+        strike = self.strikes[cols['strike_idx']]
+        chain = OptionChain(strike, cols['bid'], cols['ask'], cols['last'],
+                            np.full(len(strike), self.expiry), cols['con_id'])
+        # The constructor sorted by strike; apply the same order to the greeks
+        order = np.argsort(strike, kind='stable')
+        for name in GREEKS:
+            setattr(chain, name, cols[name][order].astype(np.float64))
+        return chain
+
+
+class ChainReader:
+    """Replays recorded chain snapshots from the store"""
+
+    def __init__(self, root="data/chains", symbol="SPX"):
+        """
+        Args:
+            root: Directory the ChainRecorder wrote to
+            symbol: Underlying to read
+        """
+        self.root = os.path.join(root, symbol)
+        self.symbol = symbol
+
+    def dates(self, start=None, end=None) -> list:
+        """Recorded trade dates ('YYYY-MM-DD'), optionally within [start, end]"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(day for day in os.listdir(self.root)
+                      if (start is None or day >= start) and (end is None or day <= end))
+
+    def expiries(self, day) -> list:
+        """Expiries recorded on a trade date"""
+        path = os.path.join(self.root, day)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def partition(self, day, expiry) -> ChainPartition:
+        return ChainPartition(os.path.join(self.root, day, expiry), expiry)
+
+    def replay(self, start=None, end=None, expiries=None):
+        """
+        Yield (time, underlying price, OptionChain) in time order
+
+        Args:
+            start: First trade date, 'YYYY-MM-DD'
+            end: Last trade date, 'YYYY-MM-DD'
+            expiries: Only these expiries, default all
+        """
+        for day in self.dates(start, end):
+            parts = [self.partition(day, expiry) for expiry in self.expiries(day)
+                     if expiries is None or expiry in expiries]
+            if not parts:
+                continue
+            times = np.concatenate([part.times for part in parts])
+            owner = np.concatenate([np.full(len(part), k) for k, part in enumerate(parts)])
+            index = np.concatenate([np.arange(len(part)) for part in parts])
+            for k in np.argsort(times, kind='stable'):
+                part = parts[owner[k]]
+                i = index[k]
+                yield (part.times[i].astype('datetime64[us]').item(),
+                       float(part.snapshots['underlying'][i]), part.chain(i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize and replay recorded option chains")
+    parser.add_argument('--root', default=os.path.join("data", "chains"))
+    parser.add_argument('--symbol', default="SPX")
+    parser.add_argument('--start', help="First trade date, YYYY-MM-DD")
+    parser.add_argument('--end', help="Last trade date, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    reader = ChainReader(args.root, args.symbol)
+    days = reader.dates(args.start, args.end)
+    if not days:
+        print(f"No {args.symbol} chains recorded under {args.root}")
+        return
+    for day in days:
+        parts = [reader.partition(day, expiry) for expiry in reader.expiries(day)]
+        print(f"{day}: " + ", ".join(f"{p.expiry} ({len(p)} snapshots, "
+                                     f"{len(p.columns['bid'])} rows)" for p in parts))
+
+    start = time_module.perf_counter()
+    snapshots = rows = 0
+    for _, _, chain in reader.replay(args.start, args.end):
+        snapshots += 1
+        rows += len(chain)
+    elapsed = time_module.perf_counter() - start
+    print(f"\nReplayed {snapshots} snapshots ({rows} rows) in {elapsed:.2f}s "
+          f"({snapshots / max(elapsed, 1e-9):,.0f} snapshots/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,8 +23,54 @@ class TradingConfig:
     MIN_DTE = 7               # Minimum days to expiry before force close
     MAX_RISK_PER_TRADE = 1000  # Maximum risk per trade in dollars
     MAX_PORTFOLIO_RISK = 5000  # Maximum total portfolio risk
-
-    # Trading Hours (EST)
+    MAX_PROB_LOSS = 0.6        # Maximum simulated probability the book loses money
+    MAX_PORTFOLIO_CVAR = 4000  # Maximum simulated average loss in the worst tail, dollars
+    RISK_CONFIDENCE = 0.95     # Tail level for VaR/CVaR
+
+    # Full-surface spread search: instead of one expiry and SPREAD_WIDTH,
+    # price every strike pair across these expiries (target days out) and
+    # widths (points; per-symbol "search_widths" in WATCHLIST), keep shorts
+    # no deeper than TARGET_DELTA within MAX_RISK_PER_TRADE, and trade the
+    # best by SEARCH_RANK: "risk_reward_ratio" (credit / risk), "prob_profit"
+    # or "return_on_risk" (credit / risk, annualized)
+    SPREAD_SEARCH = False
+    SEARCH_EXPIRIES = (7, 14, 21, 30, 45)
+    SEARCH_WIDTHS = (5, 10, 15, 20, 25)
+    SEARCH_RANK = "risk_reward_ratio"
+
+    # Underlyings scanned over one connection. Each entry overrides the
+    # strategy parameters above for that symbol; strike_window is how far
+    # below/above spot the chain is fetched, proxy is the ETF used for data
+    # on platforms without index bars. Add e.g. "signal_timeframes":
+    # ("1m", "5m", "30m") and "confirm_timeframes": 2 for intraday signals
+    # from IB real-time bars
+    WATCHLIST = {
+        "SPX": {"sec_type": "IND", "exchange": "CBOE", "spread_width": 10,
+                "strike_window": (50, 10), "proxy": "SPY"},
+        "XSP": {"sec_type": "IND", "exchange": "CBOE", "spread_width": 1,
+                "strike_window": (5, 1), "proxy": "SPY", "search_widths": (1, 2, 3, 5)},
+        "SPY": {"sec_type": "STK", "exchange": "SMART", "spread_width": 1,
+                "strike_window": (5, 1), "proxy": "SPY", "search_widths": (1, 2, 3, 5)},
+        "NDX": {"sec_type": "IND", "exchange": "NASDAQ", "spread_width": 25,
+                "strike_window": (200, 40), "proxy": "QQQ", "max_risk_per_trade": 2500,
+                "search_widths": (10, 25, 50)},
+        "RUT": {"sec_type": "IND", "exchange": "RUSSELL", "spread_width": 5,
+                "strike_window": (25, 5), "proxy": "IWM", "search_widths": (5, 10, 15)},
+    }
+
+    # Strategy processes sharing one market data feed (python sharding.py).
+    # Each shard trades through its own clientId (and port, for another
+    # account) with its own parameters; its journal and bar store live
+    # under data/<name>. metrics_port / dashboard_port are off unless set
+    STRATEGY_SHARDS = [
+        {"name": "spx-conservative", "symbol": "SPX", "client_id": 11,
+         "params": {"rsi_threshold": 30, "target_delta": 0.3}},
+        {"name": "spx-aggressive", "symbol": "SPX", "client_id": 13,
+         "params": {"rsi_threshold": 40, "target_delta": 0.45, "days_to_expiry": 21}},
+    ]
+
+    # Trading Hours (exchange time)
+    EXCHANGE_TIMEZONE = "America/New_York"
     MARKET_OPEN = time(9, 30)
     MARKET_CLOSE = time(16, 0)
 
@@ -52,6 +98,7 @@ class TradingConfig:
     # Data Sources
     DATA_SOURCE = "PRIMARY"     # Use primary platform for data
     BACKUP_DATA_SOURCE = "YAHOO"  # Fallback data source
+    RECORD_OPTION_CHAINS = True  # Keep every priced chain snapshot under data/chains
 
     # Logging
     LOG_LEVEL = "INFO"         # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -71,6 +118,11 @@ class TradingConfig:
     TELEGRAM_BOT_TOKEN = ""
     TELEGRAM_CHAT_ID = ""
 
+    # Alert delivery (both channels)
+    ALERT_BATCH_SECONDS = 5    # Alerts within this window go out as one message
+    ALERT_MIN_INTERVAL = 10    # Minimum seconds between messages per channel
+    ALERT_RETRIES = 5          # Retries of a failed message before it is dropped
+
     # Backtesting
     BACKTEST_START_DATE = "2020-01-01"
     BACKTEST_END_DATE = "2025-01-01"
@@ -99,7 +151,16 @@ class TradingConfig:
         if cls.POSITION_SIZE <= 0:
             errors.append("POSITION_SIZE must be greater than 0")
 
+        if cls.SEARCH_RANK not in ("risk_reward_ratio", "prob_profit", "return_on_risk"):
+            errors.append("SEARCH_RANK must be risk_reward_ratio, prob_profit or return_on_risk")
+
         # Platform-specific validation
+        if cls.PREFERRED_PLATFORM != "IB":
+            intraday = [symbol for symbol, params in cls.WATCHLIST.items()
+                        if params.get('signal_timeframes')]
+            if intraday:
+                errors.append(f"signal_timeframes ({', '.join(intraday)}) need IB real-time bars")
+
         if cls.PREFERRED_PLATFORM == "TDA" and not cls.USE_PAPER_TRADING:
             if not cls.TDA_API_KEY or not cls.TDA_REFRESH_TOKEN:
                 errors.append("TDA API credentials are required")
@@ -0,0 +1,192 @@
+"""
+Interactive Brokers connection management for the SPX Bull Put Credit Spread Trading Bot
+
+IBConnectionManager keeps a small pool of IB clients, one per role (by
+default 'data' for market data and 'orders' for order routing), each on
+its own clientId. A dropped client is reconnected in the background with
+exponential backoff; once it is back, reconnectedEvent fires so owners of
+market data subscriptions can re-request them. Connection health is
+exposed through is_healthy/health() for the strategy to gate on.
+"""
+
+import asyncio
+import logging
+import random
+import time as time_module
+
+ROLES = ('data', 'orders')
+
+
+class IBConnectionManager:
+    """Pool of IB clients with automatic reconnection"""
+
+    def __init__(self, host="127.0.0.1", port=7497, client_id=1, roles=ROLES,
+                 backoff=(1.0, 60.0), connect_timeout=10, metrics=None, clients=None):
+        """
+        Args:
+            host: TWS / IB Gateway host
+            port: TWS / IB Gateway port
+            client_id: clientId of the first role, the others count up from it
+            roles: Connection roles, one IB client each
+            backoff: (initial, maximum) seconds between reconnect attempts
+            connect_timeout: Seconds allowed per connection attempt
+            metrics: Optional Metrics registry for reconnect counters
+            clients: {role: client} to manage instead of creating IB() clients
+        """
+        from eventkit import Event  # Ships with ib_insync
+
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+
+        if clients is None:
+            from ib_insync import IB
+            clients = {role: IB() for role in roles}
+        self.clients = clients
+        self.roles = tuple(clients)
+
+        # One physical client may serve several roles (e.g. a simulator)
+        self._client_ids = {role: client_id + i for i, role in enumerate(self.roles)}
+        self._status = {role: {'connected': False, 'since': None, 'reconnects': 0,
+                               'last_error': None} for role in self.roles}
+        self._reconnecting = {}
+        self.reconnectedEvent = Event('reconnectedEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+
+        seen = set()
+        for role, client in self.clients.items():
+            if id(client) not in seen:
+                seen.add(id(client))
+                client.disconnectedEvent += lambda client=client: self._on_disconnected(client)
+
+    @classmethod
+    def from_client(cls, client, **kwargs) -> 'IBConnectionManager':
+        """Manage an already connected client serving every role"""
+        manager = cls(clients={role: client for role in ROLES}, **kwargs)
+        for role in manager.roles:
+            manager._mark_connected(role)
+        return manager
+
+    @property
+    def data(self):
+        """Client for market data requests"""
+        return self.clients['data']
+
+    @property
+    def orders(self):
+        """Client for order routing, executions and positions"""
+        return self.clients['orders']
+
+    @property
+    def is_healthy(self) -> bool:
+        """True while every role is connected"""
+        return all(client.isConnected() for client in self.clients.values())
+
+    def health(self) -> dict:
+        """{role: {'connected', 'since', 'reconnects', 'last_error'}}"""
+        for role, client in self.clients.items():
+            self._status[role]['connected'] = client.isConnected()
+        return {role: dict(status) for role, status in self._status.items()}
+
+    def connect(self) -> bool:
+        """
+        Connect every role, falling back to background reconnects
+
+        Returns:
+            True if all roles connected on the first attempt
+        """
+        for role in self.roles:
+            client = self.clients[role]
+            if client.isConnected():
+                continue
+            try:
+                client.connect(self.host, self.port, clientId=self._client_ids[role],
+                               timeout=self.connect_timeout)
+                self._mark_connected(role)
+                self.logger.info(f"Connected IB {role} client (clientId "
+                                 f"{self._client_ids[role]})")
+            except Exception as e:
+                self._status[role]['last_error'] = str(e)
+                self.logger.error(f"Failed to connect IB {role} client: {e}")
+                self._schedule_reconnect(role)
+        return self.is_healthy
+
+    def disconnect(self):
+        """Close every client and stop reconnecting"""
+        for task in self._reconnecting.values():
+            task.cancel()
+        self._reconnecting.clear()
+        for client in {id(c): c for c in self.clients.values()}.values():
+            client.disconnectedEvent.clear()
+            client.disconnect()
+
+    async def wait_healthy(self, timeout=None) -> bool:
+        """Wait until every role is connected"""
+        deadline = None if timeout is None else time_module.monotonic() + timeout
+        while not self.is_healthy:
+            remaining = None if deadline is None else deadline - time_module.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self.reconnectedEvent, remaining)
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+    def _mark_connected(self, role):
+        self._status[role].update(connected=True, since=time_module.time(), last_error=None)
+
+    def _roles_of(self, client) -> list:
+        return [role for role, c in self.clients.items() if c is client]
+
+    def _on_disconnected(self, client):
+        if id(client) in self._reconnecting:
+            return
+        for role in self._roles_of(client):
+            self._status[role]['connected'] = False
+            self.logger.warning(f"IB {role} client disconnected")
+            self.disconnectedEvent.emit(role)
+        if self.metrics is not None:
+            self.metrics.inc('disconnects')
+        self._schedule_reconnect(self._roles_of(client)[0])
+
+    def _schedule_reconnect(self, role):
+        from ib_insync import util
+
+        client = self.clients[role]
+        if id(client) not in self._reconnecting:
+            self._reconnecting[id(client)] = util.getLoop().create_task(self._reconnect(role))
+
+    async def _reconnect(self, role):
+        """Retry with exponential backoff and jitter until the client is back"""
+        client = self.clients[role]
+        delay, max_delay = self.backoff
+        try:
+            while not client.isConnected():
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                if client.isConnected():
+                    break
+                try:
+                    await client.connectAsync(self.host, self.port,
+                                              clientId=self._client_ids[role],
+                                              timeout=self.connect_timeout)
+                except Exception as e:
+                    self._status[role]['last_error'] = str(e)
+                    self.logger.warning(f"IB {role} reconnect failed, retrying in up to "
+                                        f"{min(delay * 2, max_delay):.0f}s: {e}")
+                    delay = min(delay * 2, max_delay)
+        finally:
+            self._reconnecting.pop(id(client), None)
+
+        # Every role on this client came back with it
+        if self.metrics is not None:
+            self.metrics.inc('reconnects')
+        for r in self._roles_of(client):
+            self._mark_connected(r)
+            self._status[r]['reconnects'] += 1
+            self.logger.info(f"IB {r} client reconnected")
+            self.reconnectedEvent.emit(r)
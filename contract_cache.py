@@ -0,0 +1,190 @@
+"""
+Contract definition cache for the SPX Bull Put Credit Spread Trading Bot
+
+Qualified contracts (conIds), the option chain definition returned by
+reqSecDefOptParams and its expirations change at most once a day, so the
+bot asks IB for them once per session and keeps them here:
+- Expirations are parsed once into a sorted datetime64 array and the
+  expiry nearest a target date is found by binary search
+- Option contracts are cached by (expiry, strike, right, trading class),
+  including ones IB could not resolve, so a chain fetch only qualifies
+  strikes it has never seen today
+- Everything is saved to one JSON file per symbol and reloaded on
+  restart; the file is discarded once the exchange date rolls over
+"""
+
+import copy
+import json
+import logging
+import os
+
+import numpy as np
+
+from runtime import exchange_now
+
+
+def _fields(contract) -> dict:
+    from ib_insync import util
+    return util.dataclassNonDefaults(contract)
+
+
+def _contract(fields):
+    from ib_insync import Contract
+    return Contract.create(**fields)
+
+
+class ContractCache:
+    """Per-session cache of one underlying's contract definitions"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON file the cache is persisted to
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.session = None
+        self.underlying = None   # Qualified underlying contract
+        self.chain = None        # {'exchange', 'tradingClass', 'multiplier', 'strikes'}
+        self.expirations = []    # 'YYYYMMDD', sorted
+        self._expiry_days = np.empty(0, dtype='datetime64[D]')
+        self._options = {}       # (expiry, strike, right, tradingClass) -> contract or None
+        self._load()
+
+    @staticmethod
+    def session_key() -> str:
+        """Exchange date the cached definitions are valid for"""
+        return exchange_now().date().isoformat()
+
+    def is_current(self) -> bool:
+        return self.session == self.session_key()
+
+    def roll(self):
+        """Drop everything if the session has rolled since it was cached"""
+        if self.is_current():
+            return
+        if self.session is not None:
+            self.logger.info(f"Contract cache from {self.session} expired, refreshing")
+        self.session = self.session_key()
+        self.underlying = None
+        self.chain = None
+        self.expirations = []
+        self._expiry_days = np.empty(0, dtype='datetime64[D]')
+        self._options = {}
+
+    def set_underlying(self, contract):
+        self.underlying = contract
+        self.save()
+
+    def set_chain(self, chain):
+        """Store the chain definition (an ib_insync OptionChain) to use"""
+        self.chain = {
+            'exchange': chain.exchange,
+            'tradingClass': chain.tradingClass,
+            'multiplier': chain.multiplier,
+            'strikes': sorted(float(s) for s in chain.strikes),
+        }
+        self._set_expirations(chain.expirations)
+        self.save()
+
+    def _set_expirations(self, expirations):
+        self.expirations = sorted(expirations)
+        self._expiry_days = np.array([f"{e[:4]}-{e[4:6]}-{e[6:8]}" for e in self.expirations],
+                                     dtype='datetime64[D]')
+
+    def nearest_expiry(self, target_date):
+        """
+        Expiration closest to a date, by binary search
+
+        Returns:
+            'YYYYMMDD', the earlier one on a tie, or None if none are cached
+        """
+        days = self._expiry_days
+        if not len(days):
+            return None
+        target = np.datetime64(target_date, 'D')
+        right = int(np.searchsorted(days, target))
+        if right == len(days):
+            return self.expirations[-1]
+        if right > 0 and target - days[right - 1] <= days[right] - target:
+            return self.expirations[right - 1]
+        return self.expirations[right]
+
+    @staticmethod
+    def option_key(expiry, strike, right='P', trading_class='') -> tuple:
+        return (expiry, float(strike), right, trading_class)
+
+    def get_options(self, keys) -> tuple:
+        """
+        Look up option contracts
+
+        Returns:
+            ({key: contract} of cached keys, with None for contracts IB
+            could not resolve, [keys not cached yet]). Contracts are fresh
+            copies: ib_insync keys tickers by contract object, so a chain
+            snapshot must never share them with the legs of open positions
+        """
+        found, missing = {}, []
+        for key in keys:
+            if key in self._options:
+                contract = self._options[key]
+                found[key] = copy.copy(contract) if contract is not None else None
+            else:
+                missing.append(key)
+        return found, missing
+
+    def add_options(self, contracts):
+        """Store {key: qualified contract, or None if it did not qualify}"""
+        self._options.update(contracts)
+        self.save()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            self.roll()
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error reading contract cache {self.path}: {e}")
+            self.roll()
+            return
+
+        self.session = data.get('session')
+        if not self.is_current():
+            self.roll()
+            return
+        try:
+            if data.get('underlying'):
+                self.underlying = _contract(data['underlying'])
+            self.chain = data.get('chain')
+            self._set_expirations(data.get('expirations', []))
+            for entry in data.get('options', []):
+                key = tuple(entry['key'])
+                self._options[(key[0], float(key[1]), key[2], key[3])] = (
+                    _contract(entry['contract']) if entry['contract'] else None)
+        except Exception as e:
+            self.logger.error(f"Error loading contract cache {self.path}: {e}")
+            self.session = None
+            self.roll()
+
+    def save(self):
+        """Write the cache atomically"""
+        data = {
+            'session': self.session,
+            'underlying': _fields(self.underlying) if self.underlying is not None else None,
+            'chain': self.chain,
+            'expirations': self.expirations,
+            'options': [{'key': list(key), 'contract': _fields(c) if c is not None else None}
+                        for key, c in self._options.items()],
+        }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.logger.error(f"Error saving contract cache {self.path}: {e}")
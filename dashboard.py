@@ -0,0 +1,290 @@
+"""
+Live dashboard backend for the SPX Bull Put Credit Spread Trading Bot
+
+The bot publishes RSI, positions, P&L and signals into a DashboardFeed;
+DashboardServer streams them to index.html / app.js as Server-Sent Events
+(GET /events) and serves the page itself from the same port.
+
+Publishing only overwrites a pending value under a lock, so the trading
+loop never touches a socket or encodes JSON. A flusher thread coalesces
+everything published during one interval into a single delta frame,
+encoded once and shared by every connected dashboard. Each dashboard
+first gets a snapshot, then the deltas after it; one that falls further
+behind than the frame history (or reconnects with a stale Last-Event-ID)
+is resynced with a fresh snapshot.
+
+Frames:
+    {"seq": n, "snapshot": {section: {key: value}}}
+    {"seq": n, "set": {section: {key: value or null}}, "append": {section: [item]}}
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATIC_FILES = {
+    '/': ('index.html', 'text/html; charset=utf-8'),
+    '/index.html': ('index.html', 'text/html; charset=utf-8'),
+    '/app.js': ('app.js', 'application/javascript'),
+    '/style.css': ('style.css', 'text/css'),
+}
+
+
+def _clean(value):
+    """JSON-safe copy: NaN/inf become null, datetimes ISO strings"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {str(k): _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):  # NumPy scalars
+        return _clean(value.item())
+    return value
+
+
+class DashboardFeed:
+    """Coalescing publisher of dashboard state"""
+
+    def __init__(self, interval=0.25, history=256, list_limit=50):
+        """
+        Args:
+            interval: Seconds between delta frames; updates within one
+                interval are merged
+            history: Delta frames kept for dashboards that fall behind
+            list_limit: Items kept per appended list (e.g. signals)
+        """
+        self.interval = interval
+        self.list_limit = list_limit
+        self.logger = logging.getLogger(__name__)
+
+        self._state = {}      # section -> {key: value} or [items]
+        self._pending = {}    # (section, key) -> value, since the last frame
+        self._appended = {}   # section -> [items], since the last frame
+        self._frames = deque(maxlen=history)  # (seq, encoded delta)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.performance = {'trades': 0, 'wins': 0, 'win_rate': None, 'total_pnl': 0.0,
+                            'month_pnl': 0.0, 'avg_days': None}
+        self._days_held = 0.0
+        self._month = None
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def update(self, section, key, value):
+        """Set one entry of a section; None removes it"""
+        with self._cond:
+            self._pending[(section, key)] = value
+
+    def append(self, section, item):
+        """Add an item to a list section, such as a new signal"""
+        with self._cond:
+            items = self._appended.setdefault(section, [])
+            items.append(item)
+            del items[:-self.list_limit]
+
+    def record_trade(self, pnl, days_held, closed_at=None):
+        """Fold a closed trade into the performance section"""
+        closed_at = closed_at or datetime.now()
+        perf = self.performance
+        with self._cond:
+            if self._month != (closed_at.year, closed_at.month):
+                self._month = (closed_at.year, closed_at.month)
+                perf['month_pnl'] = 0.0
+            perf['trades'] += 1
+            perf['wins'] += pnl > 0
+            perf['win_rate'] = round(100 * perf['wins'] / perf['trades'], 1)
+            perf['total_pnl'] += pnl
+            perf['month_pnl'] += pnl
+            self._days_held += days_held
+            perf['avg_days'] = round(self._days_held / perf['trades'], 1)
+            for key, value in perf.items():
+                self._pending[('performance', key)] = value
+
+    def snapshot(self) -> tuple:
+        """(seq, encoded snapshot frame) of the current state"""
+        with self._cond:
+            return self._seq, json.dumps({'seq': self._seq, 'snapshot': self._state})
+
+    def frames_after(self, seq, timeout=None):
+        """
+        Delta frames newer than seq, waiting up to timeout for one
+
+        Returns:
+            List of (seq, encoded frame), empty on timeout, or None if
+            frames after seq are no longer kept and a snapshot is needed
+        """
+        with self._cond:
+            if seq > self._seq:
+                return None
+            if seq == self._seq:
+                self._cond.wait(timeout)
+            if seq == self._seq:
+                return []
+            if not self._frames or self._frames[0][0] > seq + 1:
+                return None
+            return [frame for frame in self._frames if frame[0] > seq]
+
+    def flush(self):
+        """Merge everything pending into one delta frame"""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+            appended, self._appended = self._appended, {}
+
+        changes = {}
+        for (section, key), value in pending.items():
+            key, value = str(key), _clean(value)
+            current = self._state.get(section, {})
+            if value is None and key not in current:
+                continue
+            if value is not None and current.get(key) == value:
+                continue
+            changes.setdefault(section, {})[key] = value
+        appended = {section: _clean(items) for section, items in appended.items()}
+        if not changes and not appended:
+            return
+
+        with self._cond:
+            for section, entries in changes.items():
+                current = self._state.setdefault(section, {})
+                for key, value in entries.items():
+                    if value is None:
+                        current.pop(key, None)
+                    else:
+                        current[key] = value
+            for section, items in appended.items():
+                current = self._state.setdefault(section, [])
+                current.extend(items)
+                del current[:-self.list_limit]
+
+            self._seq += 1
+            frame = {'seq': self._seq}
+            if changes:
+                frame['set'] = changes
+            if appended:
+                frame['append'] = appended
+            self._frames.append((self._seq, json.dumps(frame)))
+            self._cond.notify_all()
+
+    def start(self):
+        """Start the flusher thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="dashboard-feed",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error flushing dashboard feed: {e}")
+
+
+class DashboardServer:
+    """Serves the dashboard page and its event stream on a background thread"""
+
+    def __init__(self, feed, host="127.0.0.1", port=8080, root=None, heartbeat=15):
+        """
+        Args:
+            feed: DashboardFeed to stream
+            host: Interface to listen on
+            port: TCP port
+            root: Directory holding index.html, app.js and style.css
+            heartbeat: Seconds between keep-alive comments on idle streams
+        """
+        self.feed = feed
+        self.host = host
+        self.port = port
+        self.root = root or os.path.dirname(os.path.abspath(__file__))
+        self.heartbeat = heartbeat
+        self.logger = logging.getLogger(__name__)
+        self._server = None
+
+    def start(self):
+        feed = self.feed
+        root = self.root
+        heartbeat = self.heartbeat
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/events':
+                    self._stream()
+                elif path in STATIC_FILES:
+                    name, content_type = STATIC_FILES[path]
+                    try:
+                        with open(os.path.join(root, name), 'rb') as f:
+                            data = f.read()
+                    except OSError:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+
+                # EventSource resends the last id it saw when it reconnects
+                try:
+                    seq = int(self.headers.get('Last-Event-ID'))
+                except (TypeError, ValueError):
+                    seq = None
+                try:
+                    while True:
+                        frames = None if seq is None else feed.frames_after(seq, heartbeat)
+                        if frames is None:
+                            frames = [feed.snapshot()]
+                        if not frames:
+                            self.wfile.write(b": keep-alive\n\n")
+                        for seq, data in frames:
+                            self.wfile.write(f"id: {seq}\ndata: {data}\n\n".encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.feed.start()
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="dashboard-server",
+                         daemon=True).start()
+        self.logger.info(f"Dashboard on http://{self.host}:{self.port}/")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.feed.stop()
@@ -0,0 +1,261 @@
+"""
+Order execution engine for the SPX Bull Put Credit Spread Trading Bot
+
+Spread orders are worked in the background instead of being fired and
+forgotten:
+- A limit order starts at the mid price
+- Every step it is repriced toward the natural price, but never more than
+  MAX_SLIPPAGE (a fraction of mid) away from where it started
+- Anything still open after ORDER_TIMEOUT seconds is cancelled; it only
+  counts as timed out once the broker confirms the cancel, and a fill
+  that races the cancel is settled as a fill
+- A cancel the broker has not confirmed within cancel_timeout is reported
+  as UNCONFIRMED and the order stays tracked until it is done
+- An order that ends with part of its quantity filled is PARTIAL
+- With USE_LIMIT_ORDERS off, a market order is sent and only tracked
+
+Each order is a WorkingOrder with its own task on the event loop, so any
+number can be in flight without blocking the strategy. Fill price, time
+to fill and slippage against mid are reported when it finishes.
+"""
+
+import asyncio
+import logging
+import time as time_module
+
+from config import Config
+
+WORKING = 'working'
+FILLED = 'filled'
+REJECTED = 'rejected'      # Cancelled or refused by the broker
+TIMED_OUT = 'timed_out'
+PARTIAL = 'partial'        # Cancelled or refused after some quantity filled
+UNCONFIRMED = 'unconfirmed'  # Cancel sent but not acknowledged, may still fill
+
+
+class WorkingOrder:
+    """State of one order being worked by the ExecutionEngine"""
+
+    def __init__(self, trade, action, mid, natural, target, on_done=None):
+        self.trade = trade
+        self.action = action
+        self.mid = mid
+        self.natural = natural
+        self.target = target          # Most aggressive limit allowed
+        self.on_done = on_done
+        self.status = WORKING
+        self.started = time_module.monotonic()
+        self.time_to_fill = None
+        self.fill_price = None
+        self.filled = 0            # Quantity filled
+        self.reprices = 0
+        self.task = None
+
+    @property
+    def order_id(self):
+        return self.trade.order.orderId
+
+    @property
+    def slippage(self):
+        """How much worse than mid the fill was, in price points"""
+        if self.fill_price is None or self.mid is None:
+            return None
+        return abs(self.fill_price - self.mid)
+
+
+class ExecutionEngine:
+    """Works spread orders from mid toward natural until filled or timed out"""
+
+    def __init__(self, client, metrics=None, timeout=None, max_slippage=None,
+                 use_limit_orders=None, steps=4, tick=0.05, cancel_timeout=10.0):
+        """
+        Args:
+            client: IB client used for order routing
+            metrics: Optional Metrics registry for fill statistics
+            timeout: Seconds before an unfilled order is cancelled
+                (default Config.ORDER_TIMEOUT)
+            max_slippage: Largest concession from mid, as a fraction of mid
+                (default Config.MAX_SLIPPAGE)
+            use_limit_orders: Work limit orders rather than sending market
+                orders (default Config.USE_LIMIT_ORDERS)
+            steps: Number of reprices between mid and the slippage bound
+            tick: Price increment limits are rounded to
+            cancel_timeout: Seconds to wait for the broker to confirm the
+                cancel (or a fill) of a timed out order
+        """
+        self.client = client
+        self.metrics = metrics
+        self.timeout = Config.ORDER_TIMEOUT if timeout is None else timeout
+        self.max_slippage = Config.MAX_SLIPPAGE if max_slippage is None else max_slippage
+        self.use_limit_orders = (Config.USE_LIMIT_ORDERS if use_limit_orders is None
+                                 else use_limit_orders)
+        self.steps = steps
+        self.tick = tick
+        self.cancel_timeout = cancel_timeout
+        self.logger = logging.getLogger(__name__)
+        self.working = {}   # orderId -> WorkingOrder
+
+    def submit(self, contract, order, mid, natural=None, on_done=None) -> WorkingOrder:
+        """
+        Place an order and work it in the background
+
+        Args:
+            contract: Contract (usually a BAG) to trade
+            order: ib_insync Order with action and totalQuantity set; its
+                type and limit price are filled in here
+            mid: Mid price of the contract
+            natural: Price at which the order would fill immediately
+            on_done: Called with the WorkingOrder once it is finished
+
+        Returns:
+            The WorkingOrder; its trade is placed before this returns
+        """
+        target = self._target(mid, natural)
+        if self.use_limit_orders:
+            order.orderType = 'LMT'
+            order.lmtPrice = self._round(mid)
+        else:
+            order.orderType = 'MKT'
+
+        trade = self.client.placeOrder(contract, order)
+        working = WorkingOrder(trade, order.action, mid, natural, target, on_done)
+        self.working[working.order_id] = working
+        from ib_insync import util
+        working.task = util.getLoop().create_task(self._work(working))
+        return working
+
+    def cancel_all(self):
+        """Cancel every order still being worked"""
+        for working in list(self.working.values()):
+            working.task.cancel()
+            self.client.cancelOrder(working.trade.order)
+
+    def _target(self, mid, natural) -> float:
+        """Natural price, clamped to within max_slippage of mid"""
+        if natural is None or natural != natural:
+            return mid
+        bound = abs(mid) * self.max_slippage
+        return mid + max(-bound, min(bound, natural - mid))
+
+    def _round(self, price) -> float:
+        return round(round(price / self.tick) * self.tick, 2)
+
+    def _schedule(self, working):
+        """(seconds from start, limit price) of every reprice"""
+        interval = self.timeout / (self.steps + 1)
+        return [(interval * k,
+                 self._round(working.mid + (working.target - working.mid) * k / self.steps))
+                for k in range(1, self.steps + 1)]
+
+    async def _work(self, working):
+        trade = working.trade
+        order = trade.order
+        deadline = working.started + self.timeout
+        schedule = self._schedule(working) if self.use_limit_orders else []
+
+        try:
+            while True:
+                if trade.isDone():
+                    self._finish(working, self._outcome(trade, REJECTED))
+                    return
+
+                now = time_module.monotonic()
+                if now >= deadline:
+                    self.client.cancelOrder(order)
+                    await self._confirm_cancel(working)
+                    return
+
+                # Apply any reprice that is due, then sleep until the next
+                # one, the deadline or a status change
+                elapsed = now - working.started
+                while schedule and schedule[0][0] <= elapsed:
+                    _, price = schedule.pop(0)
+                    if price != order.lmtPrice:
+                        order.lmtPrice = price
+                        self.client.placeOrder(trade.contract, order)
+                        working.reprices += 1
+                wake = min(deadline, working.started + schedule[0][0]) if schedule else deadline
+                try:
+                    await asyncio.wait_for(trade.statusEvent, max(wake - now, 0))
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self.working.pop(working.order_id, None)
+            raise
+        except Exception as e:
+            self.logger.error(f"Error working order {working.order_id}: {e}")
+            self._finish(working, REJECTED)
+
+    async def _confirm_cancel(self, working):
+        """
+        Settle a cancelled order once the broker says how it ended
+
+        If the cancel is not acknowledged within cancel_timeout the order
+        may still be live or filled: on_done gets it as UNCONFIRMED, and
+        again with the final status once the broker reports one.
+        """
+        trade = working.trade
+        deadline = time_module.monotonic() + self.cancel_timeout
+        while not trade.isDone():
+            remaining = None
+            if working.status == WORKING:
+                remaining = deadline - time_module.monotonic()
+                if remaining <= 0:
+                    self.logger.error(f"Cancel of order {working.order_id} not confirmed after "
+                                      f"{self.cancel_timeout:g}s (status "
+                                      f"{trade.orderStatus.status}), check it at the broker")
+                    working.status = UNCONFIRMED
+                    if self.metrics is not None:
+                        self.metrics.inc('order_unconfirmed')
+                    self._notify(working)
+                    continue
+            try:
+                await asyncio.wait_for(trade.statusEvent, remaining)
+            except asyncio.TimeoutError:
+                pass
+        self._finish(working, self._outcome(trade, TIMED_OUT))
+
+    @staticmethod
+    def _outcome(trade, unfilled) -> str:
+        """Status of a finished trade; unfilled if none of it filled"""
+        if trade.orderStatus.status == 'Filled':
+            return FILLED
+        if trade.orderStatus.filled > 0:
+            return PARTIAL
+        return unfilled
+
+    def _finish(self, working, status):
+        working.status = status
+        working.filled = working.trade.orderStatus.filled
+        self.working.pop(working.order_id, None)
+        elapsed = time_module.monotonic() - working.started
+
+        if status == PARTIAL:
+            working.fill_price = working.trade.orderStatus.avgFillPrice
+            self.logger.warning(f"Order {working.order_id} {working.action} filled "
+                                f"{working.filled:g}/{working.trade.order.totalQuantity:g} @ "
+                                f"{working.fill_price:.2f} before it ended after {elapsed:.1f}s")
+            if self.metrics is not None:
+                self.metrics.inc('partial_fills')
+        elif status == FILLED:
+            working.time_to_fill = elapsed
+            working.fill_price = working.trade.orderStatus.avgFillPrice or working.trade.order.lmtPrice
+            self.logger.info(f"Order {working.order_id} {working.action} filled @ "
+                             f"{working.fill_price:.2f} (mid {working.mid:.2f}) in "
+                             f"{elapsed:.2f}s after {working.reprices} reprices")
+            if self.metrics is not None:
+                self.metrics.inc('fills')
+                self.metrics.observe('time_to_fill', elapsed)
+        else:
+            self.logger.warning(f"Order {working.order_id} {working.action} {status} after "
+                                f"{elapsed:.1f}s, last limit {working.trade.order.lmtPrice}")
+            if self.metrics is not None:
+                self.metrics.inc('order_timeouts' if status == TIMED_OUT else 'order_rejections')
+        self._notify(working)
+
+    def _notify(self, working):
+        if working.on_done is not None:
+            try:
+                working.on_done(working)
+            except Exception as e:
+                self.logger.error(f"Error in order {working.order_id} callback: {e}")
@@ -0,0 +1,312 @@
+"""
+Incremental technical indicators for the SPX Bull Put Credit Spread Trading Bot
+
+The bot only ever needs the latest RSI value, so instead of rerunning a
+full RSI over 100 bars on every check this module keeps Wilder's smoothing
+state and updates it in constant time per bar or tick. Bars are held in a
+fixed-size NumPy ring buffer so memory stays bounded no matter how long
+the bot runs.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def rsi(closes, period=14) -> np.ndarray:
+    """
+    Vectorized Wilder RSI over a whole series, matching talib.RSI
+
+    Used where the full history is needed at once (backtests, watchlists);
+    live code should prefer IncrementalRSI.
+
+    Args:
+        closes: Closes, oldest first; 1-D for one series or 2-D
+            (bars x symbols) to compute every column at once
+        period: RSI lookback length
+
+    Returns:
+        Array shaped like closes, NaN for the first `period` bars. Columns
+        with missing closes are NaN throughout.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if len(closes) <= period:
+        return out
+
+    change = np.diff(closes, axis=0)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+
+    # Wilder smoothing is an EWM with alpha=1/period seeded by the SMA of
+    # the first `period` changes
+    gains = gains[period - 1:].copy()
+    losses = losses[period - 1:].copy()
+    gains[0] = change[:period].clip(min=0).mean(axis=0)
+    losses[0] = (-change[:period]).clip(min=0).mean(axis=0)
+    avg_gain = pd.DataFrame(gains).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    avg_loss = pd.DataFrame(losses).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+    total = (avg_gain + avg_loss).reshape(out[period:].shape)
+    avg_gain = avg_gain.reshape(total.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[period:] = np.where(total > 0, 100.0 * avg_gain / total, 0.0)
+    if closes.ndim == 2:
+        out[:, np.isnan(closes).any(axis=0)] = np.nan
+    return out
+
+
+class BarRingBuffer:
+    """Fixed-capacity ring buffer of bar timestamps and closes"""
+
+    def __init__(self, capacity=512):
+        """
+        Args:
+            capacity: Maximum number of bars kept; older bars are overwritten
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than 0")
+
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype='datetime64[ns]')
+        self._closes = np.zeros(capacity, dtype=np.float64)
+        self._head = 0   # Index of the next write
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, close):
+        """Append a new bar, overwriting the oldest one when full"""
+        self._times[self._head] = timestamp
+        self._closes[self._head] = close
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def replace_last(self, timestamp, close):
+        """Overwrite the most recent bar (e.g. a revised in-progress bar)"""
+        if not self._size:
+            raise IndexError("replace_last on empty buffer")
+        idx = (self._head - 1) % self.capacity
+        self._times[idx] = timestamp
+        self._closes[idx] = close
+
+    @property
+    def last_time(self):
+        if not self._size:
+            return None
+        return self._times[(self._head - 1) % self.capacity]
+
+    @property
+    def last_close(self):
+        if not self._size:
+            return None
+        return float(self._closes[(self._head - 1) % self.capacity])
+
+    def _ordered(self, arr):
+        if self._size < self.capacity:
+            return arr[:self._size].copy()
+        return np.concatenate((arr[self._head:], arr[:self._head]))
+
+    def times(self) -> np.ndarray:
+        """Bar timestamps, oldest first"""
+        return self._ordered(self._times)
+
+    def closes(self) -> np.ndarray:
+        """Bar closes, oldest first"""
+        return self._ordered(self._closes)
+
+
+class IncrementalRSI:
+    """
+    Wilder RSI updated in O(1) per bar
+
+    Seeding follows TA-Lib: the first average gain/loss is the simple mean
+    of the first `period` changes, after which Wilder's smoothing applies.
+    pandas_ta seeds with an exponential average instead, so the two agree
+    once the seed has decayed (well within 100 daily bars).
+
+    Calling update() again with the timestamp of the latest bar revises
+    that bar rather than appending a new one, so intraday ticks on the
+    current daily bar can be fed straight in.
+    """
+
+    def __init__(self, period=14, capacity=512):
+        """
+        Args:
+            period: RSI lookback length
+            capacity: Number of bars kept in the ring buffer
+        """
+        if period <= 0:
+            raise ValueError("period must be greater than 0")
+
+        self.period = period
+        self.bars = BarRingBuffer(capacity)
+        self.value = np.nan
+
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._count = 0   # Number of price changes seen
+        # State as of the bar before the latest one, for in-place revisions
+        self._prev_state = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once enough bars have been seen to produce an RSI value"""
+        return self._count >= self.period
+
+    def reset(self):
+        """Drop all bars and smoothing state"""
+        self.__init__(self.period, self.bars.capacity)
+
+    def seed(self, timestamps, closes) -> float:
+        """
+        Rebuild state from a history of bars
+
+        Args:
+            timestamps: Bar timestamps, oldest first
+            closes: Bar closes, oldest first
+
+        Returns:
+            RSI as of the last bar (NaN if there is not enough history)
+        """
+        self.reset()
+        for ts, close in zip(timestamps, closes):
+            self.update(ts, close)
+        return self.value
+
+    def update(self, timestamp, close) -> float:
+        """
+        Feed one bar or tick
+
+        A timestamp newer than the last bar appends a bar, the same
+        timestamp revises the last bar, and an older one is ignored.
+
+        Returns:
+            The current RSI value
+        """
+        timestamp = np.datetime64(timestamp, 'ns')
+        close = float(close)
+        last_time = self.bars.last_time
+
+        if last_time is None:
+            self.bars.append(timestamp, close)
+            self._prev_state = (0.0, 0.0, 0, np.nan, None)
+            return self.value
+
+        if timestamp < last_time:
+            return self.value
+
+        if timestamp == last_time:
+            avg_gain, avg_loss, count, value, prev_close = self._prev_state
+            if prev_close is None:
+                self.bars.replace_last(timestamp, close)
+                return self.value
+            self._avg_gain, self._avg_loss, self._count = avg_gain, avg_loss, count
+            self.value = value
+            self.bars.replace_last(timestamp, close)
+        else:
+            prev_close = self.bars.last_close
+            self._prev_state = (self._avg_gain, self._avg_loss, self._count,
+                                self.value, prev_close)
+            self.bars.append(timestamp, close)
+
+        self._apply_change(close - prev_close)
+        return self.value
+
+    def _apply_change(self, change):
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        n = self.period
+
+        self._count += 1
+        if self._count < n:
+            self._avg_gain += gain
+            self._avg_loss += loss
+            return
+        if self._count == n:
+            self._avg_gain = (self._avg_gain + gain) / n
+            self._avg_loss = (self._avg_loss + loss) / n
+        else:
+            self._avg_gain = (self._avg_gain * (n - 1) + gain) / n
+            self._avg_loss = (self._avg_loss * (n - 1) + loss) / n
+
+        total = self._avg_gain + self._avg_loss
+        self.value = 100.0 * self._avg_gain / total if total else 0.0
+
+
+_BAR_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def bar_seconds(bar_size) -> int:
+    """Length of a bar size such as '30s', '5m' or '1h' in seconds"""
+    bar_size = str(bar_size).strip().lower()
+    try:
+        return int(bar_size[:-1]) * _BAR_UNITS[bar_size[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported bar size: {bar_size!r}")
+
+
+class MultiTimeframeRSI:
+    """
+    Incremental RSI on several bar sizes from one stream of small bars
+
+    Every incoming bar (typically IB's 5-second real-time bars) is folded
+    into the current bar of each timeframe in the same pass: a bar that
+    starts a new period appends, one inside the period revises it in place.
+    Buckets are aligned to the epoch, which lines up with the 9:30 open for
+    bar sizes that divide 30 minutes.
+    """
+
+    def __init__(self, timeframes=('1m', '5m', '30m'), period=14, capacity=512):
+        """
+        Args:
+            timeframes: Bar sizes to compute RSI on
+            period: RSI lookback length
+            capacity: Bars kept per timeframe
+        """
+        self.timeframes = tuple(timeframes)
+        self._seconds = np.array([bar_seconds(tf) for tf in self.timeframes], dtype=np.int64)
+        self.engines = {tf: IncrementalRSI(period, capacity) for tf in self.timeframes}
+        self._engines = [self.engines[tf] for tf in self.timeframes]
+
+    @property
+    def is_ready(self) -> bool:
+        return all(engine.is_ready for engine in self._engines)
+
+    @property
+    def values(self) -> dict:
+        """{timeframe: latest RSI}"""
+        return {tf: engine.value for tf, engine in self.engines.items()}
+
+    def update(self, timestamp, close):
+        """Fold one bar or tick into every timeframe"""
+        seconds = np.datetime64(timestamp, 's').astype(np.int64)
+        starts = (seconds - seconds % self._seconds).astype('datetime64[s]')
+        for engine, start in zip(self._engines, starts):
+            engine.update(start, close)
+
+    def seed(self, timestamps, closes):
+        """Rebuild every timeframe from a history of bars, oldest first"""
+        for engine in self._engines:
+            engine.reset()
+        for ts, close in zip(timestamps, closes):
+            self.update(ts, close)
+
+    def confirmation_rsi(self, required=None) -> float:
+        """
+        RSI of the `required`-th most oversold timeframe
+
+        It is below a threshold exactly when at least `required`
+        timeframes are, so it can be checked like a single RSI.
+
+        Args:
+            required: Number of timeframes that must agree, default all
+
+        Returns:
+            That RSI, or NaN until every timeframe has enough bars
+        """
+        values = np.array([engine.value for engine in self._engines])
+        if np.isnan(values).any():
+            return np.nan
+        required = len(values) if required is None else min(max(required, 1), len(values))
+        return float(np.sort(values)[required - 1])
@@ -0,0 +1,152 @@
+"""
+Durable position and order journal for the SPX Bull Put Credit Spread Trading Bot
+
+Every entry, fill and close is appended to an SQLite database in WAL mode.
+Writes are queued and committed by a background thread, so the trading
+loop never waits on disk. Besides the append-only event log, a positions
+table holds the current state of each spread; on startup the open rows
+are read back in one query to rebuild the bot's book.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    position_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    position_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    opened_at TEXT NOT NULL,
+    closed_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_status ON positions (status);
+"""
+
+_STOP = object()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class PositionJournal:
+    """Write-ahead journal of positions, fills and closes"""
+
+    def __init__(self, path="data/journal.db", batch_size=256):
+        """
+        Args:
+            path: SQLite database file
+            batch_size: Maximum queued events committed per transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="position-journal",
+                                        daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record_open(self, position_id, data):
+        """Record a newly opened position"""
+        self._queue.put(('open', position_id, data))
+
+    def record_fill(self, position_id, data):
+        """Record an execution against a position's order"""
+        self._queue.put(('fill', position_id, data))
+
+    def record_close(self, position_id, data=None):
+        """Record that a position was closed"""
+        self._queue.put(('close', position_id, data or {}))
+
+    def flush(self, timeout=None):
+        """Block until every queued event has been committed"""
+        done = threading.Event()
+        self._queue.put(('flush', None, done))
+        done.wait(timeout)
+
+    def close(self):
+        """Commit outstanding events and stop the writer thread; safe to call twice"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def load_open_positions(self) -> dict:
+        """Return {position_id: data} for every position not yet closed"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT position_id, data FROM positions WHERE status = 'open' "
+                "ORDER BY opened_at").fetchall()
+        return {position_id: json.loads(data) for position_id, data in rows}
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = _STOP in batch
+                events = [item for item in batch if item is not _STOP]
+                try:
+                    with conn:
+                        for kind, position_id, data in events:
+                            if kind != 'flush':
+                                self._apply(conn, kind, position_id, data)
+                except sqlite3.Error as e:
+                    self.logger.error(f"Journal write failed: {e}")
+
+                for kind, _, data in events:
+                    if kind == 'flush':
+                        data.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn, kind, position_id, data):
+        now = datetime.now().isoformat()
+        payload = json.dumps(data, default=_json_default)
+        conn.execute("INSERT INTO events (ts, position_id, kind, payload) VALUES (?, ?, ?, ?)",
+                     (now, position_id, kind, payload))
+        if kind == 'open':
+            # Re-recording a position (e.g. once it fills) keeps when it was opened
+            conn.execute("INSERT INTO positions (position_id, status, opened_at, data) "
+                         "VALUES (?, 'open', ?, ?) ON CONFLICT (position_id) DO UPDATE SET "
+                         "status = excluded.status, data = excluded.data",
+                         (position_id, now, payload))
+        elif kind == 'close':
+            conn.execute("UPDATE positions SET status = 'closed', closed_at = ? "
+                         "WHERE position_id = ?", (now, position_id))
@@ -0,0 +1,668 @@
+"""
+Shared-memory market data bus for the SPX Bull Put Credit Spread Trading Bot
+
+One feed process owns the broker's market data lines and publishes into a
+single shared memory block; any number of strategy worker processes map
+the block and read it in place. The block holds:
+- A symbol table: conId, chain definition (expirations, strikes), latest
+  price and daily bar history of each underlying
+- A ring buffer of intraday underlying bars (1-minute and 5-second
+  real-time bars); every record carries its sequence number, so a reader
+  that was lapped can tell
+- A table of option quote slots, one per contract, updated in place
+
+Each mutable row has a version counter that is odd while the feed is
+writing it. Readers copy the row, then re-check the counter and retry if
+it moved, so no locks are shared between processes. There is exactly one
+writer, which stores a record before advancing the counter that
+publishes it.
+
+BusClient gives a worker an ib_insync.IB-compatible view of the bus for the
+calls SPXBullPutBot makes, so an unmodified bot trades off the shared feed
+while routing orders through its own connection. Contracts a worker needs
+that are not on the bus yet are requested from the feed over a queue; the
+feed qualifies and subscribes each one once for every worker.
+"""
+
+import asyncio
+import logging
+import time as time_module
+from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = 0x5350584255530001  # 'SPXBUS', layout version 1
+MAX_SYMBOLS = 16
+MAX_EXPIRATIONS = 256
+MAX_STRIKES = 4096
+DAILY_CAPACITY = 1024
+
+# Kinds of intraday bar in the ring
+MINUTE = 1
+REALTIME = 2
+
+# Header slots (int64)
+_MAGIC, _BAR_CAPACITY, _QUOTE_SLOTS, _SYMBOLS, _BAR_HEAD, _QUOTES, _HEARTBEAT = range(7)
+HEADER_SIZE = 8
+
+SYMBOL_DTYPE = np.dtype([
+    ('version', '<i8'),
+    ('name', 'U12'),
+    ('con_id', '<i8'),
+    ('trading_class', 'U12'),
+    ('multiplier', 'U8'),
+    ('n_expirations', '<i4'),
+    ('n_strikes', '<i4'),
+    ('n_daily', '<i4'),
+    ('spot', '<f8'),
+    ('spot_time', '<M8[ns]'),
+])
+
+DAILY_DTYPE = np.dtype([
+    ('time', '<M8[ns]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+BAR_DTYPE = np.dtype([
+    ('seq', '<i8'),
+    ('symbol', '<i4'),
+    ('kind', '<i4'),
+    ('time', '<M8[ns]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+QUOTE_DTYPE = np.dtype([
+    ('version', '<i8'),
+    ('symbol', '<i4'),
+    ('expiry', '<i4'),     # YYYYMMDD
+    ('strike', '<f8'),
+    ('right', 'U1'),
+    ('con_id', '<i8'),     # 0 if the feed could not qualify the contract
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('time', '<M8[ns]'),
+])
+
+
+def _ns(value) -> np.datetime64:
+    """UTC datetime64[ns] from a date, naive (UTC) or aware datetime"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 'ns')
+
+
+def _utc(value) -> datetime:
+    """Aware UTC datetime from datetime64"""
+    return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(
+        microseconds=int(value.astype('datetime64[us]').astype(np.int64)))
+
+
+def _layout(bar_capacity, quote_slots) -> list:
+    """(name, dtype, shape) of each section, in order"""
+    return [
+        ('header', np.dtype('<i8'), (HEADER_SIZE,)),
+        ('symbols', SYMBOL_DTYPE, (MAX_SYMBOLS,)),
+        ('expirations', np.dtype('<i4'), (MAX_SYMBOLS, MAX_EXPIRATIONS)),
+        ('strikes', np.dtype('<f8'), (MAX_SYMBOLS, MAX_STRIKES)),
+        ('daily', DAILY_DTYPE, (MAX_SYMBOLS, DAILY_CAPACITY)),
+        ('bars', BAR_DTYPE, (bar_capacity,)),
+        ('quotes', QUOTE_DTYPE, (quote_slots,)),
+    ]
+
+
+def _size(layout) -> int:
+    offset = 0
+    for _, dtype, shape in layout:
+        offset += -offset % 64 + dtype.itemsize * int(np.prod(shape))
+    return offset
+
+
+class MarketDataBus:
+    """Single-writer, many-reader market data in shared memory"""
+
+    def __init__(self, name=None, create=False, bar_capacity=262144, quote_slots=8192):
+        """
+        Args:
+            name: Shared memory block to attach to (or to create, if given)
+            create: Create the block; only the feed's owner does this
+            bar_capacity: Intraday bars kept in the ring
+            quote_slots: Maximum number of option contracts on the bus
+        """
+        if create:
+            layout = _layout(bar_capacity, quote_slots)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_size(layout))
+            self._map(layout)
+            self.header[:] = 0
+            self.header[_BAR_CAPACITY] = bar_capacity
+            self.header[_QUOTE_SLOTS] = quote_slots
+            self.header[_MAGIC] = MAGIC
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray((HEADER_SIZE,), dtype='<i8', buffer=self._shm.buf)
+            if header[_MAGIC] != MAGIC:
+                raise ValueError(f"{name} is not a market data bus")
+            self._map(_layout(int(header[_BAR_CAPACITY]), int(header[_QUOTE_SLOTS])))
+            del header
+
+    def _map(self, layout):
+        offset = 0
+        for section, dtype, shape in layout:
+            offset += -offset % 64
+            setattr(self, section, np.ndarray(shape, dtype=dtype, buffer=self._shm.buf,
+                                              offset=offset))
+            offset += dtype.itemsize * int(np.prod(shape))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self):
+        """Detach from the block (drop every array view first)"""
+        for section in ('header', 'symbols', 'expirations', 'strikes', 'daily', 'bars', 'quotes'):
+            setattr(self, section, None)
+        self._shm.close()
+
+    def unlink(self):
+        """Free the block; only its creator calls this"""
+        self._shm.unlink()
+
+    # Writer side (the feed process)
+
+    def heartbeat(self):
+        self.header[_HEARTBEAT] = time_module.time_ns()
+
+    def add_symbol(self, symbol, con_id) -> int:
+        """Register an underlying, returning its index"""
+        index = self.symbol_id(symbol)
+        if index < 0:
+            index = int(self.header[_SYMBOLS])
+            if index >= MAX_SYMBOLS:
+                raise ValueError(f"Market data bus is limited to {MAX_SYMBOLS} symbols")
+            self.symbols[index] = np.zeros((), dtype=SYMBOL_DTYPE)
+            self.symbols[index]['name'] = symbol
+            self.symbols[index]['spot'] = np.nan
+        self.symbols[index]['con_id'] = con_id
+        self.header[_SYMBOLS] = max(int(self.header[_SYMBOLS]), index + 1)
+        return index
+
+    def set_chain(self, index, trading_class, multiplier, expirations, strikes):
+        """Publish an underlying's option chain definition"""
+        expirations = sorted(int(e) for e in expirations)[:MAX_EXPIRATIONS]
+        strikes = np.sort(np.asarray(strikes, dtype=np.float64))[:MAX_STRIKES]
+        row = self.symbols[index:index + 1]
+        row['version'] += 1
+        row['trading_class'] = trading_class
+        row['multiplier'] = multiplier
+        self.expirations[index, :len(expirations)] = expirations
+        self.strikes[index, :len(strikes)] = strikes
+        row['n_expirations'] = len(expirations)
+        row['n_strikes'] = len(strikes)
+        row['version'] += 1
+
+    def publish_spot(self, index, price, time=None):
+        row = self.symbols[index:index + 1]
+        row['version'] += 1
+        row['spot'] = price
+        row['spot_time'] = _ns(time or datetime.now(timezone.utc))
+        row['version'] += 1
+
+    def publish_daily(self, index, times, opens, highs, lows, closes, volumes=None):
+        """
+        Merge daily bars into an underlying's history
+
+        Bars at or after the first new date replace what is stored, so
+        today's bar is revised in place as the day goes on.
+        """
+        times = np.array([_ns(t) for t in times], dtype='datetime64[ns]')
+        if not len(times):
+            return
+        row = self.symbols[index:index + 1]
+        daily = self.daily[index]
+        stored = int(row['n_daily'][0])
+        keep = int(np.searchsorted(daily['time'][:stored], times[0]))
+        count = min(keep + len(times), DAILY_CAPACITY)
+
+        new = np.empty(len(times), dtype=DAILY_DTYPE)
+        new['time'] = times
+        new['open'], new['high'], new['low'], new['close'] = opens, highs, lows, closes
+        new['volume'] = 0.0 if volumes is None else volumes
+
+        row['version'] += 1
+        if keep + len(times) > DAILY_CAPACITY:
+            merged = np.concatenate((daily[:keep], new))[-DAILY_CAPACITY:]
+            daily[:count] = merged
+        else:
+            daily[keep:count] = new
+        row['n_daily'] = count
+        row['version'] += 1
+
+    def publish_bars(self, index, kind, times, opens, highs, lows, closes, volumes=None):
+        """Append intraday bars to the ring"""
+        n = len(times)
+        if not n:
+            return
+        capacity = len(self.bars)
+        head = int(self.header[_BAR_HEAD])
+        positions = np.arange(head, head + n)
+        slots = positions % capacity
+
+        records = np.empty(n, dtype=BAR_DTYPE)
+        records['seq'] = positions + 1
+        records['symbol'] = index
+        records['kind'] = kind
+        records['time'] = [_ns(t) for t in times]
+        records['open'], records['high'], records['low'], records['close'] = (
+            opens, highs, lows, closes)
+        records['volume'] = 0.0 if volumes is None else volumes
+        self.bars[slots] = records
+        self.header[_BAR_HEAD] = head + n
+
+    def add_quote(self, index, expiry, strike, right, con_id) -> int:
+        """Create the slot of an option contract, returning its index"""
+        slot = int(self.header[_QUOTES])
+        if slot >= len(self.quotes):
+            raise ValueError("Market data bus quote slots exhausted")
+        record = np.zeros((), dtype=QUOTE_DTYPE)
+        record['symbol'] = index
+        record['expiry'] = int(expiry)
+        record['strike'] = strike
+        record['right'] = right
+        record['con_id'] = con_id
+        record['bid'] = record['ask'] = record['last'] = np.nan
+        self.quotes[slot] = record
+        self.header[_QUOTES] = slot + 1
+        return slot
+
+    def publish_quote(self, slot, bid, ask, last, time=None):
+        row = self.quotes[slot:slot + 1]
+        row['version'] += 1
+        row['bid'] = bid
+        row['ask'] = ask
+        row['last'] = last
+        row['time'] = _ns(time or datetime.now(timezone.utc))
+        row['version'] += 1
+
+    # Reader side (strategy workers)
+
+    def is_alive(self, timeout=5.0) -> bool:
+        """True while the feed's heartbeat is recent"""
+        return time_module.time_ns() - int(self.header[_HEARTBEAT]) < timeout * 1e9
+
+    def symbol_id(self, symbol) -> int:
+        """Index of an underlying, or -1"""
+        names = self.symbols['name'][:int(self.header[_SYMBOLS])]
+        found = np.flatnonzero(names == symbol)
+        return int(found[0]) if len(found) else -1
+
+    def _consistent(self, rows, index, read):
+        """Run read() until the row's version is even and unchanged across it"""
+        while True:
+            before = int(rows['version'][index])
+            if before % 2 == 0:
+                value = read()
+                if int(rows['version'][index]) == before:
+                    return value
+            time_module.sleep(0)
+
+    def symbol(self, index) -> np.void:
+        """Copy of an underlying's symbol table row"""
+        return self._consistent(self.symbols, index, lambda: self.symbols[index].copy())
+
+    def chain(self, index) -> tuple:
+        """(trading class, multiplier, ['YYYYMMDD' expirations], strikes)"""
+        def read():
+            row = self.symbols[index].copy()
+            return (str(row['trading_class']), str(row['multiplier']),
+                    [str(e) for e in self.expirations[index, :row['n_expirations']]],
+                    self.strikes[index, :row['n_strikes']].copy())
+        return self._consistent(self.symbols, index, read)
+
+    def daily_bars(self, index) -> np.ndarray:
+        """Copy of an underlying's daily bars, oldest first"""
+        return self._consistent(self.symbols, index, lambda: self.daily[index][
+            :int(self.symbols['n_daily'][index])].copy())
+
+    @property
+    def bar_head(self) -> int:
+        """Position after the newest intraday bar"""
+        return int(self.header[_BAR_HEAD])
+
+    def bars_since(self, position) -> tuple:
+        """
+        Intraday bars written after a ring position
+
+        Returns:
+            (records, new position); records is a view into the ring when
+            it does not wrap. A reader lapped by the writer gets only what
+            is still in the ring.
+        """
+        capacity = len(self.bars)
+        head = int(self.header[_BAR_HEAD])
+        position = max(position, head - capacity)
+        if position >= head:
+            return self.bars[:0], head
+        start, end = position % capacity, head % capacity
+        if start < end:
+            records = self.bars[start:end]
+        else:
+            records = np.concatenate((self.bars[start:], self.bars[:end]))
+        # Drop anything overwritten while it was being read
+        return records[records['seq'] > head - capacity], head
+
+    @property
+    def quote_count(self) -> int:
+        """Number of option contracts on the bus"""
+        return int(self.header[_QUOTES])
+
+    def find_quote(self, index, expiry, strike, right='P') -> int:
+        """Slot of an option contract, or -1 if it is not on the bus"""
+        quotes = self.quotes[:self.quote_count]
+        found = np.flatnonzero((quotes['symbol'] == index) & (quotes['expiry'] == int(expiry))
+                               & (quotes['strike'] == strike) & (quotes['right'] == right))
+        return int(found[0]) if len(found) else -1
+
+    def read_quote(self, slot) -> np.void:
+        """Consistent copy of one quote slot"""
+        return self._consistent(self.quotes, slot, lambda: self.quotes[slot].copy())
+
+
+class BusClient:
+    """ib_insync.IB stand-in serving market data from a MarketDataBus"""
+
+    def __init__(self, bus, requests=None, poll_interval=0.02, request_timeout=5.0):
+        """
+        Args:
+            bus: Attached MarketDataBus
+            requests: Queue to the feed for contracts not on the bus yet
+            poll_interval: Seconds between checks of the bus for updates
+            request_timeout: Seconds to wait for the feed to add a contract
+        """
+        from eventkit import Event  # Ships with ib_insync
+
+        self.bus = bus
+        self.requests = requests
+        self.poll_interval = poll_interval
+        self.request_timeout = request_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self.updateEvent = Event('updateEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+
+        # key -> [ticker, symbol index, quote slot or None, version, subscriptions]
+        self._tickers = {}
+        self._realtime_bars = {}  # symbol index -> [RealTimeBarList]
+        self._bar_position = 0
+        self._connected = bus.is_alive()
+        self._task = None
+
+    # Connection
+
+    def isConnected(self) -> bool:
+        return self._connected
+
+    def connect(self, *args, **kwargs):
+        if not self.bus.is_alive():
+            raise ConnectionError("Market data feed is not running")
+        self._connected = True
+        return self
+
+    async def connectAsync(self, *args, **kwargs):
+        return self.connect()
+
+    def disconnect(self):
+        self._connected = False
+        self._tickers.clear()
+        self._realtime_bars.clear()
+        self.disconnectedEvent.emit()
+
+    def run(self, *awaitables, timeout=None):
+        from ib_insync import util
+        return util.run(*awaitables, timeout=timeout)
+
+    def sleep(self, seconds):
+        return self.run(asyncio.sleep(seconds))
+
+    # Contracts
+
+    def _symbol_index(self, contract) -> int:
+        index = self.bus.symbol_id(contract.symbol)
+        if index < 0:
+            self.logger.error(f"{contract.symbol} is not published by the market data feed")
+        return index
+
+    def _request(self, contracts):
+        if self.requests is not None and contracts:
+            self.requests.put(('options', [(c.symbol, c.lastTradeDateOrContractMonth, c.strike,
+                                            c.right, c.tradingClass) for c in contracts]))
+
+    def _resolve_option(self, contract, index) -> bool:
+        """Fill in an option from its slot; False if it is not on the bus yet"""
+        slot = self.bus.find_quote(index, contract.lastTradeDateOrContractMonth, contract.strike,
+                                   contract.right)
+        if slot < 0:
+            return False
+        record = self.bus.quotes[slot]
+        contract.conId = int(record['con_id'])
+        trading_class, multiplier, _, _ = self.bus.chain(index)
+        contract.tradingClass = contract.tradingClass or trading_class
+        contract.multiplier = contract.multiplier or multiplier
+        return True
+
+    def qualifyContracts(self, *contracts):
+        return self.run(self.qualifyContractsAsync(*contracts))
+
+    async def qualifyContractsAsync(self, *contracts):
+        pending = []
+        for contract in contracts:
+            index = self._symbol_index(contract)
+            if index < 0:
+                continue
+            if contract.secType != 'OPT':
+                contract.conId = int(self.bus.symbols['con_id'][index])
+            elif not self._resolve_option(contract, index):
+                pending.append((contract, index))
+
+        # Ask the feed for the rest and wait for their slots
+        self._request([contract for contract, _ in pending])
+        deadline = time_module.monotonic() + self.request_timeout
+        while pending and time_module.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            pending = [(c, i) for c, i in pending if not self._resolve_option(c, i)]
+        if pending:
+            self.logger.warning(f"{len(pending)} contracts not added by the feed "
+                                f"within {self.request_timeout}s")
+        return [contract for contract in contracts if contract.conId]
+
+    def reqSecDefOptParams(self, *args):
+        return self.run(self.reqSecDefOptParamsAsync(*args))
+
+    async def reqSecDefOptParamsAsync(self, underlyingSymbol, futFopExchange,
+                                      underlyingSecType, underlyingConId):
+        from ib_insync import OptionChain
+
+        index = self.bus.symbol_id(underlyingSymbol)
+        if index < 0:
+            return []
+        trading_class, multiplier, expirations, strikes = self.bus.chain(index)
+        if not expirations:
+            return []
+        return [OptionChain('SMART', underlyingConId, trading_class, multiplier,
+                            expirations, [float(s) for s in strikes])]
+
+    # Historical data
+
+    def reqHistoricalData(self, contract, endDateTime, durationStr, *args, **kwargs):
+        return self.run(self.reqHistoricalDataAsync(contract, endDateTime, durationStr,
+                                                    *args, **kwargs))
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr,
+                                     barSizeSetting='1 day', *args, **kwargs):
+        """Daily bars from the symbol table, 1-minute bars from the ring"""
+        from ib_insync import BarData
+
+        index = self._symbol_index(contract)
+        if index < 0:
+            return []
+        start = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None)
+                              - timedelta(days=int(durationStr.split()[0])), 'ns')
+
+        if barSizeSetting == '1 day':
+            bars = self.bus.daily_bars(index)
+            bars = bars[bars['time'] > start]
+            return [BarData(date=bar['time'].astype('datetime64[D]').item(),
+                            open=float(bar['open']), high=float(bar['high']),
+                            low=float(bar['low']), close=float(bar['close']),
+                            volume=float(bar['volume'])) for bar in bars]
+
+        records, _ = self.bus.bars_since(0)
+        records = records[(records['symbol'] == index) & (records['kind'] == MINUTE)
+                          & (records['time'] > start)]
+        # Keep the last version of each minute, in time order
+        _, last = np.unique(records['time'][::-1], return_index=True)
+        records = records[::-1][last]
+        return [BarData(date=_utc(bar['time']), open=float(bar['open']),
+                        high=float(bar['high']), low=float(bar['low']),
+                        close=float(bar['close']), volume=float(bar['volume']))
+                for bar in records]
+
+    # Market data
+
+    @staticmethod
+    def _key(contract):
+        if contract.secType == 'OPT':
+            return ('OPT', contract.symbol, contract.lastTradeDateOrContractMonth,
+                    contract.strike, contract.right)
+        return (contract.secType, contract.symbol)
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False,
+                   regulatorySnapshot=False, mktDataOptions=None):
+        from ib_insync import Ticker
+
+        key = self._key(contract)
+        entry = self._tickers.get(key)
+        if entry is None:
+            index = self._symbol_index(contract)
+            slot = None
+            if contract.secType == 'OPT' and index >= 0:
+                slot = self.bus.find_quote(index, contract.lastTradeDateOrContractMonth,
+                                           contract.strike, contract.right)
+                if slot < 0:
+                    self._request([contract])
+            entry = self._tickers[key] = [Ticker(contract=contract), index, slot, -1, 0]
+        # A chain scan and an open position can stream the same leg; the
+        # ticker is shared and only dropped when both have cancelled
+        entry[4] += 1
+        self._start()
+        return entry[0]
+
+    def cancelMktData(self, contract):
+        key = self._key(contract)
+        entry = self._tickers.get(key)
+        if entry is not None:
+            entry[4] -= 1
+            if entry[4] <= 0:
+                del self._tickers[key]
+
+    def reqRealTimeBars(self, contract, barSize, whatToShow, useRTH, realTimeBarsOptions=None):
+        from ib_insync import RealTimeBarList
+
+        bars = RealTimeBarList()
+        bars.contract = contract
+        bars.barSize = barSize
+        index = self._symbol_index(contract)
+        if not any(self._realtime_bars.values()):
+            self._bar_position = self.bus.bar_head
+        self._realtime_bars.setdefault(index, []).append(bars)
+        self._start()
+        return bars
+
+    def cancelRealTimeBars(self, bars):
+        for subscribed in self._realtime_bars.values():
+            if bars in subscribed:
+                subscribed.remove(bars)
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            from ib_insync import util
+            self._task = util.getLoop().create_task(self._poll_loop())
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self._poll()
+            except Exception as e:
+                self.logger.error(f"Error reading market data bus: {e}")
+
+    def _poll(self):
+        """Push whatever changed on the bus since the last poll to the subscribers"""
+        if not self.bus.is_alive():
+            if self._connected:
+                self.logger.warning("Market data feed stopped")
+                self.disconnect()
+            return
+        if not self._connected:
+            return
+
+        changed = False
+        for entry in list(self._tickers.values()):
+            ticker, index, slot, version, _ = entry
+            if index < 0:
+                continue
+            if slot is None:
+                row = self.bus.symbol(index)
+                if int(row['version']) != version and row['spot'] == row['spot']:
+                    entry[3] = int(row['version'])
+                    ticker.last = ticker.close = float(row['spot'])
+                    ticker.time = _utc(row['spot_time'])
+                    ticker.updateEvent.emit(ticker)
+                    changed = True
+                continue
+
+            if slot < 0:
+                contract = ticker.contract
+                slot = entry[2] = self.bus.find_quote(
+                    index, contract.lastTradeDateOrContractMonth, contract.strike, contract.right)
+                if slot < 0:
+                    continue
+            if int(self.bus.quotes['version'][slot]) == version:
+                continue
+            quote = self.bus.read_quote(slot)
+            entry[3] = int(quote['version'])
+            if int(quote['version']) == 0:
+                continue  # Slot created, first quote not in yet
+            ticker.bid, ticker.ask, ticker.last = (float(quote['bid']), float(quote['ask']),
+                                                   float(quote['last']))
+            ticker.time = _utc(quote['time'])
+            ticker.updateEvent.emit(ticker)
+            changed = True
+
+        if any(self._realtime_bars.values()):
+            changed |= self._poll_bars()
+
+        if changed:
+            self.updateEvent.emit()
+
+    def _poll_bars(self) -> bool:
+        from ib_insync import RealTimeBar
+
+        records, self._bar_position = self.bus.bars_since(self._bar_position)
+        records = records[records['kind'] == REALTIME]
+        for record in records:
+            for bars in self._realtime_bars.get(int(record['symbol']), ()):
+                bars.append(RealTimeBar(time=_utc(record['time']), open_=float(record['open']),
+                                        high=float(record['high']), low=float(record['low']),
+                                        close=float(record['close']),
+                                        volume=float(record['volume'])))
+                bars.updateEvent.emit(bars, True)
+        return len(records) > 0
@@ -0,0 +1,250 @@
+"""
+Latency instrumentation and local metrics endpoint for the SPX Bull Put Credit Spread Trading Bot
+
+Stages of the strategy loop are timed into fixed-bucket histograms and
+events (signals, orders, rejections, reconnects) into counters. A small
+HTTP server on localhost exposes them:
+
+    /metrics         Prometheus text format
+    /metrics.json    JSON
+    /profile/start   Start the sampling profiler
+    /profile/stop    Stop it
+    /profile         Collapsed stacks so far (flamegraph.pl / speedscope input)
+
+When metrics are disabled, timer() hands back a shared no-op context
+manager and inc() returns immediately, so instrumented code pays almost
+nothing.
+"""
+
+import bisect
+import contextlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from 100us to 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q) -> float:
+        """Approximate quantile: upper bound of the bucket holding it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Registry of stage histograms and event counters"""
+
+    def __init__(self, enabled=True, prefix="spx_bot"):
+        """
+        Args:
+            enabled: Record anything at all; False makes instrumentation a no-op
+            prefix: Prefix for exported metric names
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = Counter()
+        self.profiler = SamplingProfiler()
+
+    def timer(self, stage):
+        """Context manager timing one pass through a stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        return _StageTimer(histogram)
+
+    def observe(self, stage, seconds):
+        """Record an externally measured duration"""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def inc(self, name, amount=1):
+        """Increment an event counter"""
+        if self.enabled:
+            self.counters[name] += amount
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for stage, h in list(self.histograms.items()):
+            stages[stage] = {
+                'count': h.count,
+                'sum_seconds': h.sum,
+                'mean_ms': h.sum / h.count * 1000 if h.count else 0.0,
+                'p50_ms': h.quantile(0.5) * 1000,
+                'p99_ms': h.quantile(0.99) * 1000,
+            }
+        return {'stages': stages, 'counters': dict(self.counters),
+                'profiling': self.profiler.running}
+
+    def to_prometheus(self) -> str:
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Wall time per strategy stage",
+                 f"# TYPE {name} histogram"]
+        for stage, h in list(self.histograms.items()):
+            cumulative = 0
+            for bound, n in zip(h.buckets, h.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+        for counter, value in list(self.counters.items()):
+            metric = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of every other thread"""
+
+    def __init__(self, interval=0.005):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, most frequent first"""
+        return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}"
+                                 f":{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class MetricsServer:
+    """Serves a Metrics registry over HTTP on a background thread"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.logger = logging.getLogger(__name__)
+        self._server = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self._send(metrics.to_prometheus(), 'text/plain; version=0.0.4')
+                elif self.path == '/metrics.json':
+                    self._send(json.dumps(metrics.to_dict()), 'application/json')
+                elif self.path == '/profile/start':
+                    metrics.profiler.start()
+                    self._send("profiler started\n", 'text/plain')
+                elif self.path == '/profile/stop':
+                    metrics.profiler.stop()
+                    self._send("profiler stopped\n", 'text/plain')
+                elif self.path == '/profile':
+                    self._send(metrics.profiler.collapsed(), 'text/plain')
+                else:
+                    self.send_error(404)
+
+            def _send(self, body, content_type):
+                data = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server",
+                         daemon=True).start()
+        self.logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,210 @@
+"""
+Columnar option chain for the SPX Bull Put Credit Spread Trading Bot
+
+An OptionChain holds one snapshot of puts as parallel NumPy arrays kept
+sorted by strike, so strike lookups are binary searches and metrics for
+every candidate spread come out of a single vectorized call. A snapshot
+may span several expiries; spread pairs are only formed within one. Individual
+legs are still handed out as the plain dicts the rest of the bot (orders,
+position marks, the journal) works with.
+"""
+
+import numpy as np
+
+from pricing import prob_above, years_to_expiry
+
+GREEKS = ('iv', 'delta', 'gamma', 'theta', 'vega')
+
+
+def _nearest(values, targets) -> np.ndarray:
+    """Position in sorted values of the one closest to each target (ties to the lower)"""
+    n = len(values)
+    right = np.clip(np.searchsorted(values, targets), 0, n - 1)
+    left = np.clip(right - 1, 0, n - 1)
+    return np.where(np.abs(values[left] - targets) <= np.abs(values[right] - targets),
+                    left, right)
+
+
+class OptionChain:
+    """Strike-sorted arrays of quotes for one chain snapshot"""
+
+    def __init__(self, strike, bid, ask, last, expiry, con_id, contracts=None, timestamps=None):
+        """
+        Args:
+            strike: Strike prices
+            bid: Bid quotes (NaN or <= 0 where unquoted)
+            ask: Ask quotes
+            last: Last traded prices
+            expiry: IB-style 'YYYYMMDD' expiries
+            con_id: IB contract ids
+            contracts: Broker contract objects, aligned with the arrays
+            timestamps: Quote times, aligned with the arrays
+        """
+        strike = np.asarray(strike, dtype=np.float64)
+        order = np.argsort(strike, kind='stable')
+
+        self.strike = strike[order]
+        self.bid = np.asarray(bid, dtype=np.float64)[order]
+        self.ask = np.asarray(ask, dtype=np.float64)[order]
+        self.last = np.asarray(last, dtype=np.float64)[order]
+        self.expiry = np.asarray(expiry, dtype='U8')[order]
+        self.con_id = np.asarray(con_id, dtype=np.int64)[order]
+        self.contracts = None if contracts is None else np.asarray(contracts, dtype=object)[order]
+        self.timestamps = None if timestamps is None else np.asarray(timestamps, dtype=object)[order]
+
+        nan = np.full(len(self.strike), np.nan)
+        for name in GREEKS:
+            setattr(self, name, nan.copy())
+
+    @classmethod
+    def from_records(cls, options_data) -> 'OptionChain':
+        """Build a chain from a list of option dicts as returned by the brokers"""
+        records = sorted(options_data, key=lambda opt: opt['strike'])
+
+        def column(key, default=np.nan):
+            return [opt.get(key, default) for opt in records]
+
+        chain = cls(column('strike'), column('bid'), column('ask'), column('last'),
+                    column('expiry', ''), [opt.get('conId') or 0 for opt in records],
+                    column('contract', None), column('timestamp', None))
+        for name in GREEKS:
+            setattr(chain, name, np.array(column(name), dtype=np.float64))
+        return chain
+
+    def __len__(self):
+        return len(self.strike)
+
+    def __getitem__(self, i) -> dict:
+        """Leg i as an option dict"""
+        leg = {
+            'contract': None if self.contracts is None else self.contracts[i],
+            'strike': float(self.strike[i]),
+            'bid': float(self.bid[i]),
+            'ask': float(self.ask[i]),
+            'last': float(self.last[i]),
+            'expiry': str(self.expiry[i]),
+            'conId': int(self.con_id[i]),
+            'timestamp': None if self.timestamps is None else self.timestamps[i],
+        }
+        for name in GREEKS:
+            leg[name] = float(getattr(self, name)[i])
+        return leg
+
+    @property
+    def mid(self) -> np.ndarray:
+        """Mid of each quote, NaN where either side is missing"""
+        return np.where((self.bid > 0) & (self.ask > 0), (self.bid + self.ask) / 2, np.nan)
+
+    def nearest(self, strike, tolerance=np.inf, expiry=None) -> int:
+        """
+        Index of the strike closest to a target by binary search
+
+        Args:
+            strike: Target strike
+            tolerance: Maximum distance from the target
+            expiry: Only consider legs of this 'YYYYMMDD' expiry
+
+        Returns:
+            Index, or -1 if the chain is empty or nothing lies within tolerance
+        """
+        if expiry is None:
+            idx = self.nearest_many(np.atleast_1d(strike), tolerance)
+            return int(idx[0])
+
+        # Legs of one expiry are still in strike order
+        members = np.flatnonzero(self.expiry == expiry)
+        if not len(members):
+            return -1
+        i = members[_nearest(self.strike[members], np.atleast_1d(float(strike)))[0]]
+        return int(i) if abs(self.strike[i] - strike) <= tolerance else -1
+
+    def nearest_many(self, targets, tolerance=np.inf) -> np.ndarray:
+        """nearest() for an array of targets, -1 where nothing qualifies"""
+        targets = np.asarray(targets, dtype=np.float64)
+        n = len(self.strike)
+        if n == 0:
+            return np.full(targets.shape, -1, dtype=np.intp)
+
+        idx = _nearest(self.strike, targets)
+        return np.where(np.abs(self.strike[idx] - targets) <= tolerance, idx, -1)
+
+    def below(self, index, points, tolerance=np.inf) -> int:
+        """Index of the strike closest to `points` below the strike at index"""
+        return self.nearest(self.strike[index] - points, tolerance)
+
+    def spread_candidates(self, width, tolerance=5) -> tuple:
+        """
+        Pair every strike with the strike closest to `width` points below it
+        in the same expiry
+
+        Args:
+            width: Spread width in points, or a sequence of widths to pair
+                every strike with each of
+            tolerance: Maximum distance of the long strike from its target
+
+        Returns:
+            (short_idx, long_idx) arrays of the pairs that exist, by short
+            leg and then width
+        """
+        n = len(self.strike)
+        widths = np.atleast_1d(np.asarray(width, dtype=np.float64))
+        if n == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        # One sorted key over (expiry, strike), with expiries spaced further
+        # apart than any target can reach, so pairs never cross expiries
+        _, group = np.unique(self.expiry, return_inverse=True)
+        spacing = np.ptp(self.strike) + widths.max() + tolerance + 1.0
+        key = self.strike + group * spacing
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+
+        targets = key[:, None] - widths[None, :]
+        pos = _nearest(sorted_key, targets)
+        long_idx = order[pos]
+        short_idx = np.broadcast_to(np.arange(n)[:, None], long_idx.shape)
+        valid = ((np.abs(sorted_key[pos] - targets) <= tolerance) & (long_idx != short_idx)
+                 & (group[long_idx] == group[short_idx]))
+        return short_idx[valid], long_idx[valid]
+
+    def spread_metrics(self, short_idx, long_idx, profit_target=0.5, spot=None, rate=0.0,
+                       now=None) -> dict:
+        """
+        Credit, risk and exit level for bull put spreads, vectorized
+
+        Args:
+            short_idx: Indices of the short (sold) legs
+            long_idx: Indices of the long (bought) legs
+            profit_target: Fraction of the credit to capture before closing
+            spot: Underlying price; when given, also returns 'years',
+                'prob_profit' (risk-neutral probability of expiring above
+                breakeven at the short leg's implied vol) and
+                'return_on_risk' (credit / max risk, annualized)
+            rate: Risk-free rate for prob_profit
+            now: Valuation time, defaults to now
+
+        Returns:
+            Dict of arrays keyed like SPXBullPutBot.calculate_spread_metrics
+        """
+        mid = self.mid
+        net_credit = mid[short_idx] - mid[long_idx]
+        strike_diff = self.strike[short_idx] - self.strike[long_idx]
+        max_risk = strike_diff - net_credit
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk_reward = np.where(max_risk > 0, net_credit / max_risk, 0.0)
+        metrics = {
+            'net_credit': net_credit,
+            'max_risk': max_risk,
+            'profit_target': net_credit * (1 - profit_target),
+            'risk_reward_ratio': risk_reward,
+            'strike_width': strike_diff,
+        }
+        if spot is not None:
+            years = years_to_expiry(self.expiry[short_idx], now)
+            breakeven = self.strike[short_idx] - net_credit
+            with np.errstate(divide='ignore', invalid='ignore'):
+                metrics['years'] = years
+                metrics['prob_profit'] = prob_above(spot, breakeven, years, self.iv[short_idx],
+                                                    rate)
+                metrics['return_on_risk'] = np.where(years > 0, risk_reward / years, np.nan)
+        return metrics
@@ -0,0 +1,161 @@
+"""
+Vectorized Black-Scholes pricing for the SPX Bull Put Credit Spread Trading Bot
+
+All functions broadcast over NumPy arrays, so a whole option chain is
+priced, inverted for implied vol and given its greeks in one pass. SPX
+options are European, so plain Black-Scholes applies; dividends are
+ignored.
+"""
+
+import math
+from datetime import datetime
+
+import numpy as np
+
+SQRT_2PI = math.sqrt(2.0 * math.pi)
+MIN_YEARS = 1e-6   # Floor on time to expiry so expiring options stay finite
+
+
+def norm_cdf(x):
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)"""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741
+                + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def norm_pdf(x):
+    """Standard normal density"""
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def _d1_d2(spot, strike, years, vol, rate):
+    years = np.maximum(years, MIN_YEARS)
+    sd = vol * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * years) / sd
+    return d1, d1 - sd, years
+
+
+def bs_price(spot, strike, years, vol, rate=0.0, right='P'):
+    """
+    Black-Scholes European option price
+
+    Args:
+        spot: Underlying price
+        strike: Strike price
+        years: Time to expiry in years
+        vol: Annualized volatility
+        rate: Continuously compounded risk-free rate
+        right: 'P' for puts, 'C' for calls
+    """
+    d1, d2, years = _d1_d2(spot, strike, years, vol, rate)
+    discount = strike * np.exp(-rate * years)
+    if right == 'C':
+        return spot * norm_cdf(d1) - discount * norm_cdf(d2)
+    return discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+
+
+def prob_above(spot, level, years, vol, rate=0.0):
+    """Risk-neutral probability that the underlying ends above level at expiry"""
+    _, d2, _ = _d1_d2(spot, level, years, vol, rate)
+    return norm_cdf(d2)
+
+
+def greeks(spot, strike, years, vol, rate=0.0, right='P') -> dict:
+    """
+    Black-Scholes greeks
+
+    Returns:
+        Dict of arrays: 'price', 'delta', 'gamma', 'theta' (per calendar
+        day) and 'vega' (per 1 vol point)
+    """
+    d1, d2, years = _d1_d2(spot, strike, years, vol, rate)
+    sqrt_t = np.sqrt(years)
+    pdf = norm_pdf(d1)
+    discount = strike * np.exp(-rate * years)
+
+    gamma = pdf / (spot * vol * sqrt_t)
+    vega = spot * pdf * sqrt_t / 100.0
+    decay = -spot * pdf * vol / (2.0 * sqrt_t)
+
+    if right == 'C':
+        price = spot * norm_cdf(d1) - discount * norm_cdf(d2)
+        delta = norm_cdf(d1)
+        theta = decay - rate * discount * norm_cdf(d2)
+    else:
+        price = discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+        delta = norm_cdf(d1) - 1.0
+        theta = decay + rate * discount * norm_cdf(-d2)
+
+    return {
+        'price': price,
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta / 365.0,
+        'vega': vega,
+    }
+
+
+def implied_vol(price, spot, strike, years, rate=0.0, right='P',
+                tol=1e-6, max_iter=50):
+    """
+    Implied volatility by safeguarded Newton iteration
+
+    Every element keeps a [lo, hi] bracket; a Newton step that leaves the
+    bracket falls back to bisection, so the solve converges even for deep
+    in- or out-of-the-money strikes where vega is tiny.
+
+    Returns:
+        Array of vols, NaN where the price is outside no-arbitrage bounds
+    """
+    price, spot, strike, years = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(spot, dtype=np.float64),
+        np.asarray(strike, dtype=np.float64), np.asarray(years, dtype=np.float64))
+    years = np.maximum(years, MIN_YEARS)
+
+    discount = strike * np.exp(-rate * years)
+    if right == 'C':
+        lower, upper = np.maximum(spot - discount, 0.0), spot
+    else:
+        lower, upper = np.maximum(discount - spot, 0.0), discount
+    valid = np.isfinite(price) & (price > lower) & (price < upper)
+
+    lo = np.full(price.shape, 1e-4)
+    hi = np.full(price.shape, 5.0)
+    # Brenner-Subrahmanyam starting point
+    vol = np.clip(np.sqrt(2.0 * math.pi / years) * price / spot, 0.05, 2.0)
+
+    for _ in range(max_iter):
+        d1, _, _ = _d1_d2(spot, strike, years, vol, rate)
+        diff = bs_price(spot, strike, years, vol, rate, right) - price
+        if np.all(np.abs(diff[valid]) < tol):
+            break
+        hi = np.where(diff > 0, vol, hi)
+        lo = np.where(diff < 0, vol, lo)
+        vega = spot * norm_pdf(d1) * np.sqrt(years)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = vol - diff / vega
+        vol = np.where((step > lo) & (step < hi), step, 0.5 * (lo + hi))
+
+    return np.where(valid, vol, np.nan)
+
+
+def years_to_expiry(expiry, now: datetime = None, close_hour=16) -> np.ndarray:
+    """
+    Time to expiry in years for IB-style 'YYYYMMDD' expiries
+
+    Options are taken to expire at close_hour (local time) on the expiry
+    date. Accepts a single expiry or a sequence of them.
+    """
+    now = now or datetime.now()
+    expiry = np.atleast_1d(np.asarray(expiry, dtype='U8'))
+    # A chain rarely has more than a few distinct expiries, parse each once
+    unique, inverse = np.unique(expiry, return_inverse=True)
+    dates = np.array([f"{e[:4]}-{e[4:6]}-{e[6:8]}" for e in unique], dtype='datetime64[s]')
+    close = dates + np.timedelta64(close_hour, 'h')
+    seconds = (close - np.datetime64(now, 's')).astype(np.float64)[inverse]
+    return np.maximum(seconds / (365.0 * 86400.0), 0.0)
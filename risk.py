@@ -0,0 +1,190 @@
+"""
+Portfolio risk controls for the SPX Bull Put Credit Spread Trading Bot
+
+A single PortfolioRiskBudget is shared by every underlying the bot trades,
+so MAX_PORTFOLIO_RISK caps the combined max loss of all open spreads no
+matter which symbol they are on. It also keeps the terms of each spread
+and the latest price of each underlying, which MonteCarloRisk uses to
+simulate the P&L of the whole book, plus a proposed trade, at expiry.
+"""
+
+import logging
+import math
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+class PortfolioRiskBudget:
+    """Dollar max-loss budget shared across symbols"""
+
+    def __init__(self, limit):
+        """
+        Args:
+            limit: Maximum combined max loss of open positions, in dollars
+        """
+        self.limit = limit
+        self.logger = logging.getLogger(__name__)
+        self._reserved = {}
+        self._spreads = {}   # position_id -> spread terms, see MonteCarloRisk.simulate
+        self._markets = {}   # symbol -> (spot, vol)
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> float:
+        return sum(self._reserved.values())
+
+    @property
+    def available(self) -> float:
+        return self.limit - self.used
+
+    @property
+    def spreads(self) -> list:
+        """Terms of every open spread that registered them"""
+        with self._lock:
+            return list(self._spreads.values())
+
+    @property
+    def markets(self) -> dict:
+        """{symbol: (spot, vol)} as last reported by each symbol's bot"""
+        return dict(self._markets)
+
+    def update_market(self, symbol, spot=None, vol=None):
+        """Record an underlying's latest price and/or implied vol"""
+        old_spot, old_vol = self._markets.get(symbol, (math.nan, math.nan))
+        self._markets[symbol] = (old_spot if spot is None else spot,
+                                 old_vol if vol is None else vol)
+
+    def can_take(self, risk) -> bool:
+        """True if a position risking `risk` dollars fits in the budget"""
+        return risk <= self.available
+
+    def reserve(self, position_id, risk, spread=None) -> bool:
+        """
+        Claim budget for a position
+
+        Args:
+            position_id: Position the budget is for
+            risk: Dollar max loss of the position
+            spread: Terms of the spread for MonteCarloRisk
+
+        Returns:
+            False, reserving nothing, if it would exceed the limit
+        """
+        with self._lock:
+            if risk > self.limit - sum(self._reserved.values()):
+                self.logger.info(f"Portfolio risk limit: {position_id} needs ${risk:,.0f}, "
+                                 f"${self.available:,.0f} of ${self.limit:,.0f} available")
+                return False
+            self._reserved[position_id] = risk
+            if spread is not None:
+                self._spreads[position_id] = spread
+            return True
+
+    def restore(self, position_id, risk, spread=None):
+        """Book an already open position, even if it breaches the limit"""
+        with self._lock:
+            self._reserved[position_id] = risk
+            if spread is not None:
+                self._spreads[position_id] = spread
+
+    def release(self, position_id):
+        """Return a closed position's budget"""
+        with self._lock:
+            self._reserved.pop(position_id, None)
+            self._spreads.pop(position_id, None)
+
+
+class MonteCarloRisk:
+    """
+    Simulated P&L distribution of a book of bull put spreads
+
+    Underlying prices follow geometric Brownian motion at each spread's
+    implied vol and are sampled only at the distinct expiries of the book,
+    so the cost is paths x expiries rather than paths x days. Spreads are
+    held to expiry (early profit-taking is ignored, which overstates the
+    tails). Every underlying is driven by the same shocks, i.e. perfectly
+    correlated, which is the conservative case for a book of short index
+    puts.
+    """
+
+    def __init__(self, paths=20000, confidence=0.95, rate=0.04, default_vol=0.20, seed=None):
+        """
+        Args:
+            paths: Number of simulated paths
+            confidence: VaR/CVaR confidence level
+            rate: Risk-free drift
+            default_vol: Vol used where neither the market nor the spread has one
+            seed: Random seed, for reproducible results
+        """
+        self.paths = paths
+        self.confidence = confidence
+        self.rate = rate
+        self.default_vol = default_vol
+        self._rng = np.random.default_rng(seed)
+
+    def simulate(self, spreads, markets=None, now=None) -> dict:
+        """
+        Simulate the book's P&L at expiry
+
+        Args:
+            spreads: Dicts with 'symbol', 'short_strike', 'long_strike',
+                'credit' (per share), 'contracts' (shares: multiplier x
+                quantity), 'expiry' (datetime), and optionally 'spot' and
+                'iv' from when the spread was opened
+            markets: {symbol: (spot, vol)}; current values take precedence
+                over the ones stored with each spread
+            now: Valuation time, defaults to now
+
+        Returns:
+            Dict with 'prob_loss', 'expected_pnl', 'var' and 'cvar' (tail
+            losses at `confidence`, positive numbers), 'worst' and
+            'max_loss' (the sum of every spread's max loss), in dollars
+        """
+        if not spreads:
+            return {'prob_loss': 0.0, 'expected_pnl': 0.0, 'var': 0.0, 'cvar': 0.0,
+                    'worst': 0.0, 'max_loss': 0.0}
+        markets = markets or {}
+        now = now or datetime.now()
+
+        def pick(*values):
+            for value in values:
+                if value is not None and value == value and value > 0:
+                    return value
+            return math.nan
+
+        spot = np.array([pick(markets.get(s['symbol'], (None, None))[0], s.get('spot'))
+                         for s in spreads])
+        vol = np.array([pick(markets.get(s['symbol'], (None, None))[1], s.get('iv'),
+                             self.default_vol) for s in spreads])
+        short = np.array([s['short_strike'] for s in spreads], dtype=np.float64)
+        long = np.array([s['long_strike'] for s in spreads], dtype=np.float64)
+        credit = np.array([s['credit'] for s in spreads], dtype=np.float64)
+        contracts = np.array([s['contracts'] for s in spreads], dtype=np.float64)
+        years = np.array([max((s['expiry'] - now).total_seconds(), 0.0) / (365.0 * 86400)
+                          for s in spreads])
+
+        # Brownian motion sampled at each distinct expiry, shared by all spreads
+        horizons, horizon_idx = np.unique(years, return_inverse=True)
+        steps = np.sqrt(np.diff(horizons, prepend=0.0))
+        brownian = np.cumsum(self._rng.standard_normal((self.paths, len(horizons))) * steps,
+                             axis=1)
+
+        log_drift = (self.rate - 0.5 * vol * vol) * years
+        terminal = spot * np.exp(log_drift + vol * brownian[:, horizon_idx])
+
+        # Unpriced underlyings (no spot at all) are taken at their worst case
+        loss = np.clip(short - terminal, 0.0, short - long)
+        loss = np.where(np.isnan(terminal), short - long, loss)
+        pnl = ((credit - loss) * contracts).sum(axis=1)
+
+        tail = np.quantile(pnl, 1.0 - self.confidence)
+        return {
+            'prob_loss': float(np.mean(pnl < 0)),
+            'expected_pnl': float(pnl.mean()),
+            'var': float(max(-tail, 0.0)),
+            'cvar': float(max(-pnl[pnl <= tail].mean(), 0.0)),
+            'worst': float(max(-pnl.min(), 0.0)),
+            'max_loss': float(((short - long - credit) * contracts).sum()),
+        }
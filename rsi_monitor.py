@@ -3,15 +3,29 @@
 Simple SPX RSI Monitor Script
 Use this to get started before full bot automation
 
+Watchlist mode monitors hundreds of tickers: each cycle makes one batched
+download of only the bars the local cache is missing, computes RSI and the
+threshold-cross signal for every symbol in one vectorized step, and prints
+a ranked table.
+
 Run: python rsi_monitor.py
+     python rsi_monitor.py --watchlist SPY QQQ IWM [--watchlist-file tickers.txt]
 """
 
+import argparse
+import os
 import yfinance as yf
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from datetime import datetime
 import time
 
+from indicators import rsi
+
+HISTORY_DAYS = 100
+CACHE_PATH = os.path.join("data", "watchlist_closes.pkl")
+
 def get_spy_data():
     """Get SPY data as proxy for SPX"""
     try:
@@ -65,8 +79,152 @@ def display_status(result):
         print(f"\n⏳ No Signal (RSI {threshold_diff:+.1f} above threshold)")
         print("Waiting for RSI < 35...")
 
+def download_closes(symbols, **kwargs) -> pd.DataFrame:
+    """Daily closes (dates x symbols) for many tickers in one batched request"""
+    data = yf.download(symbols, interval="1d", group_by="column", threads=True,
+                       progress=False, **kwargs)
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    if isinstance(data.columns, pd.MultiIndex):
+        closes = data['Close']
+    else:
+        closes = data[['Close']].set_axis(symbols, axis=1)
+    closes.index = pd.to_datetime(closes.index)
+    if closes.index.tz is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes.astype(np.float64)
+
+
+class CloseCache:
+    """Daily closes of a watchlist kept on disk, refreshed incrementally"""
+
+    def __init__(self, path=CACHE_PATH, history_days=HISTORY_DAYS):
+        """
+        Args:
+            path: Pickle file holding the dates x symbols close table
+            history_days: Days of history kept and returned per symbol
+        """
+        self.path = path
+        self.history_days = history_days
+        self.closes = pd.read_pickle(path) if os.path.exists(path) else pd.DataFrame()
+
+    def update(self, symbols) -> pd.DataFrame:
+        """
+        Bring the cache up to date and return the last history_days of closes
+
+        Symbols already cached only need the bars since the last cached day
+        (refetched, as it may have been in progress); only symbols new to
+        the cache get a full history.
+        """
+        known = [s for s in symbols if s in self.closes.columns]
+        new = [s for s in symbols if s not in self.closes.columns]
+
+        frames = []
+        if new:
+            frames.append(download_closes(new, period=f"{self.history_days}d"))
+        if known:
+            start = self.closes.index[-1].strftime('%Y-%m-%d')
+            frames.append(download_closes(known, start=start))
+
+        closes = self.closes
+        for frame in frames:
+            closes = frame.combine_first(closes)  # Fresh bars win
+        self.closes = closes.sort_index().tail(self.history_days * 2)
+        self._save()
+        return self.closes.reindex(columns=symbols).tail(self.history_days)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        self.closes.to_pickle(tmp)
+        os.replace(tmp, self.path)
+
+
+def check_signals(closes, rsi_threshold=35, period=14) -> pd.DataFrame:
+    """
+    check_signal for a whole watchlist at once
+
+    Args:
+        closes: Daily closes, dates x symbols, oldest first
+
+    Returns:
+        One row per symbol (price, rsi, prev_rsi, signal), signals first,
+        then by RSI ascending; symbols without enough history are dropped
+    """
+    values = closes.ffill().to_numpy()
+    rsi_values = rsi(values, period)
+    current, previous = rsi_values[-1], rsi_values[-2]
+
+    table = pd.DataFrame({
+        'price': values[-1],
+        'rsi': current,
+        'prev_rsi': previous,
+        # Signal: RSI crosses below threshold
+        'signal': (current < rsi_threshold) & (previous >= rsi_threshold),
+    }, index=closes.columns)
+    table = table.dropna(subset=['rsi', 'prev_rsi'])
+    return table.sort_values(['signal', 'rsi'], ascending=[False, True])
+
+
+def display_table(table, rsi_threshold=35, top=25):
+    """Display the ranked watchlist"""
+    print("\n" + "="*50)
+    print("📊 SPX Bull Put Strategy Monitor - Watchlist")
+    print("="*50)
+    print(f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{len(table)} symbols, {int(table['signal'].sum())} new signals, "
+          f"{int((table['rsi'] < rsi_threshold).sum())} below RSI {rsi_threshold}\n")
+    print(f"{'':2}{'symbol':<8}{'price':>10}{'rsi':>8}{'prev':>8}")
+    for symbol, row in table.head(top).iterrows():
+        flag = "🚨" if row['signal'] else ("• " if row['rsi'] < rsi_threshold else "  ")
+        print(f"{flag}{symbol:<8}{row['price']:>10.2f}{row['rsi']:>8.1f}{row['prev_rsi']:>8.1f}")
+
+
+def monitor_watchlist(symbols, rsi_threshold=35, top=25, interval=300):
+    """Watchlist monitoring loop"""
+    cache = CloseCache()
+    print(f"Monitoring {len(symbols)} symbols...")
+    print("Press Ctrl+C to stop")
+
+    try:
+        while True:
+            try:
+                closes = cache.update(symbols)
+            except Exception as e:
+                print(f"Error fetching data: {e}, retrying in 60 seconds...")
+                time.sleep(60)
+                continue
+
+            display_table(check_signals(closes, rsi_threshold), rsi_threshold, top)
+
+            print(f"\nNext check in {interval // 60} minutes...")
+            time.sleep(interval)
+
+    except KeyboardInterrupt:
+        print("\n\nMonitor stopped by user. Happy trading! 📈")
+
+
 def main():
     """Main monitoring loop"""
+    parser = argparse.ArgumentParser(description="RSI monitor for SPY or a watchlist")
+    parser.add_argument('--watchlist', nargs='+', default=[], help="Tickers to monitor")
+    parser.add_argument('--watchlist-file', help="File with one ticker per line")
+    parser.add_argument('--threshold', type=float, default=35)
+    parser.add_argument('--top', type=int, default=25, help="Rows shown in the table")
+    parser.add_argument('--interval', type=int, default=300, help="Seconds between checks")
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in args.watchlist]
+    if args.watchlist_file:
+        with open(args.watchlist_file) as f:
+            symbols += [line.strip().upper() for line in f if line.strip()]
+    if symbols:
+        monitor_watchlist(list(dict.fromkeys(symbols)), args.threshold, args.top, args.interval)
+        return
+
     print("Starting SPX Bull Put Strategy Monitor...")
     print("Press Ctrl+C to stop")
 
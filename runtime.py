@@ -0,0 +1,240 @@
+"""
+Event-driven runtime for the SPX Bull Put Credit Spread Trading Bot
+
+Runs the strategy on ib_insync's asyncio event loop instead of polling:
+- Outside the session the runtime sleeps exactly until the next open in
+  the exchange time zone
+- Underlying price ticks update the incremental RSI and wake the
+  strategy tasks directly
+- Position management and entry scanning are separate tasks, so a slow
+  chain fetch never delays an exit
+"""
+
+import asyncio
+import logging
+import time as time_module
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import Config
+
+EXCHANGE_TZ = ZoneInfo(Config.EXCHANGE_TIMEZONE)
+
+
+def exchange_now() -> datetime:
+    """Current time in the exchange time zone"""
+    return datetime.now(EXCHANGE_TZ)
+
+
+def session_bounds(day) -> tuple:
+    """(open, close) of the regular session on a given date, exchange time"""
+    return (datetime.combine(day, Config.MARKET_OPEN, tzinfo=EXCHANGE_TZ),
+            datetime.combine(day, Config.MARKET_CLOSE, tzinfo=EXCHANGE_TZ))
+
+
+def is_market_open(now: datetime = None) -> bool:
+    """True during the regular weekday session (exchange holidays are not modelled)"""
+    now = now or exchange_now()
+    if now.weekday() >= 5:
+        return False
+    market_open, market_close = session_bounds(now.date())
+    return market_open <= now <= market_close
+
+
+def next_session_open(now: datetime = None) -> datetime:
+    """Start of the current session if open, otherwise of the next one"""
+    now = now or exchange_now()
+    day = now.date()
+    while True:
+        market_open, market_close = session_bounds(day)
+        if day.weekday() < 5 and now <= market_close:
+            return market_open
+        day += timedelta(days=1)
+
+
+class StrategyRuntime:
+    """Asyncio strategy runner built on ib_insync's native async API"""
+
+    def __init__(self, bot, entry_cooldown=60):
+        """
+        Args:
+            bot: Connected SPXBullPutBot on the IB platform
+            entry_cooldown: Minimum seconds between chain scans while the
+                entry signal stays active
+        """
+        self.bot = bot
+        self.ib = bot.ib
+        self.logger = logging.getLogger(__name__)
+        self.entry_cooldown = entry_cooldown
+
+        self.ticker = None
+        self.realtime_bars = None
+        self.underlying = None
+        self._price_event = None
+        self._scan_event = None
+        self._last_scan = -np.inf
+
+    def run(self):
+        """Run the strategy until interrupted"""
+        try:
+            self.ib.run(self.run_async())
+        except KeyboardInterrupt:
+            self.logger.info("Bot stopped by user")
+        finally:
+            # Commit the journal's last opens and closes before exiting
+            self.bot.journal.close()
+
+    async def run_async(self):
+        """Sleep until each session opens, then trade it"""
+        while True:
+            wait = (next_session_open() - exchange_now()).total_seconds()
+            if wait > 0:
+                self.logger.info(f"Market closed, sleeping {wait / 3600:.1f}h until next open")
+                await asyncio.sleep(wait)
+
+            try:
+                await self.run_session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in session: {e}")
+                await asyncio.sleep(60)
+
+    async def run_session(self):
+        """Trade one regular session, returning at the close"""
+        _, market_close = session_bounds(exchange_now().date())
+        self._price_event = asyncio.Event()
+        self._scan_event = asyncio.Event()
+
+        if not self.bot.connection.is_healthy:
+            self.logger.warning("Waiting for the IB connection")
+            await self.bot.connection.wait_healthy()
+        if self.bot.reconcile_pending:
+            self.bot.reconcile_positions()
+
+        current_rsi = await self.bot.update_rsi_async()
+        self.logger.info(f"{self.bot.symbol} session open, RSI: {current_rsi}")
+
+        self.underlying = await self.bot.qualified_underlying_async()
+        if self.bot.intraday_rsi is not None:
+            await self.bot.seed_intraday_async()
+        self._subscribe_underlying()
+        self.bot.order_ib.execDetailsEvent += self._on_fill
+        self.bot.connection.reconnectedEvent += self._on_reconnected
+
+        tasks = [asyncio.ensure_future(self._manage_positions_task()),
+                 asyncio.ensure_future(self._entry_scan_task())]
+        try:
+            await asyncio.sleep(max((market_close - exchange_now()).total_seconds(), 0))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._unsubscribe_underlying()
+            self.bot.order_ib.execDetailsEvent -= self._on_fill
+            self.bot.connection.reconnectedEvent -= self._on_reconnected
+            self.logger.info(f"{self.bot.symbol} session closed")
+
+    def _subscribe_underlying(self):
+        self.ticker = self.ib.reqMktData(self.underlying, '', False, False)
+        self.ticker.updateEvent += self._on_price
+        if self.bot.intraday_rsi is not None:
+            self.realtime_bars = self.ib.reqRealTimeBars(self.underlying, 5, 'TRADES', True)
+            self.realtime_bars.updateEvent += self._on_realtime_bars
+
+    def _unsubscribe_underlying(self):
+        self.ticker.updateEvent -= self._on_price
+        self.ib.cancelMktData(self.underlying)
+        if self.realtime_bars is not None:
+            self.realtime_bars.updateEvent -= self._on_realtime_bars
+            self.ib.cancelRealTimeBars(self.realtime_bars)
+            self.realtime_bars = None
+
+    def _on_reconnected(self, role):
+        """Restart the underlying streams after the data client reconnects"""
+        if role != 'data':
+            return
+        self._unsubscribe_underlying()
+        self._subscribe_underlying()
+        self._price_event.set()
+
+    def _on_realtime_bars(self, bars, has_new_bar):
+        """Update the intraday RSI from each 5-second bar and wake the entry scan"""
+        if bars:
+            self.bot.on_realtime_bar(bars[-1])
+            self._scan_event.set()
+
+    def _on_price(self, ticker):
+        """Fold each underlying tick into today's RSI bar and wake the tasks"""
+        price = ticker.marketPrice()
+        if not price > 0:
+            return
+        today = np.datetime64(exchange_now().date(), 'D')
+        self.bot.rsi_engine.update(today, price)
+        self.bot.publish_market()
+        self._price_event.set()
+        self._scan_event.set()
+
+    def _on_fill(self, trade, fill):
+        self.logger.info(f"Fill: {fill.contract.localSymbol} {fill.execution.side} "
+                         f"{fill.execution.shares} @ {fill.execution.price}")
+        self._price_event.set()
+
+    async def _manage_positions_task(self):
+        """Re-evaluate exits on every price update or fill"""
+        while True:
+            await self._price_event.wait()
+            self._price_event.clear()
+            try:
+                self.bot.manage_positions()
+            except Exception as e:
+                self.logger.error(f"Error managing positions: {e}")
+
+    async def _entry_scan_task(self):
+        """Scan for entries whenever the RSI signal is active"""
+        while True:
+            await self._scan_event.wait()
+            self._scan_event.clear()
+
+            signal_rsi = self.bot.signal_rsi()
+            if not signal_rsi < self.bot.rsi_threshold:
+                continue
+            if time_module.monotonic() - self._last_scan < self.entry_cooldown:
+                continue
+            if not self.bot.check_entry(signal_rsi):
+                continue
+
+            self._last_scan = time_module.monotonic()
+            self.logger.info(f"{self.bot.symbol} entry signal detected!")
+            try:
+                with self.bot.metrics.timer('signal_to_order'):
+                    options_data = await self.bot._get_options_chain_ib_async(
+                        self.bot.symbol, self.bot.expiry_targets)
+                    selection = self.bot.select_spread(options_data, self.ticker.marketPrice())
+                    if selection:
+                        self.bot.open_position(*selection)
+            except Exception as e:
+                self.logger.error(f"Error scanning for entry: {e}")
+
+
+class PortfolioRuntime(StrategyRuntime):
+    """Trades several underlyings concurrently over one IB connection"""
+
+    def __init__(self, bots, entry_cooldown=60):
+        """
+        Args:
+            bots: SPXBullPutBot per underlying, all sharing one IB client
+            entry_cooldown: Minimum seconds between chain scans per symbol
+        """
+        super().__init__(bots[0], entry_cooldown)
+        self.runtimes = [StrategyRuntime(bot, entry_cooldown) for bot in bots]
+
+    async def run_session(self):
+        """Run every symbol's session side by side; one failing leaves the rest trading"""
+        results = await asyncio.gather(*(runtime.run_session() for runtime in self.runtimes),
+                                       return_exceptions=True)
+        for runtime, result in zip(self.runtimes, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error in {runtime.bot.symbol} session: {result}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Multi-underlying scanner for the SPX Bull Put Credit Spread Trading Bot
+
+Runs the bull put strategy on every symbol of Config.WATCHLIST (SPX, XSP,
+SPY, NDX, RUT by default) from one process:
+- One broker connection, one position journal, one metrics registry, one
+  dashboard feed and one alert pipeline are shared by all symbols
+- On Interactive Brokers each symbol gets its own event-driven session,
+  all running concurrently on the same event loop
+- A single PortfolioRiskBudget enforces MAX_PORTFOLIO_RISK across symbols
+
+Run: python scanner.py [--symbols SPX NDX] [--platform IB] [--live]
+"""
+
+import argparse
+import logging
+import time as time_module
+
+from config import Config
+from risk import PortfolioRiskBudget
+from runtime import PortfolioRuntime, is_market_open
+from spx_bull_put_bot import SPXBullPutBot
+
+
+class UnderlyingScanner:
+    """One SPXBullPutBot per watchlist symbol over a shared connection"""
+
+    def __init__(self, symbols=None, platform="IB", paper_trading=True, broker=None,
+                 data_dir="data"):
+        """
+        Args:
+            symbols: Underlyings to trade, defaults to every Config.WATCHLIST key
+            platform: "IB", "TDA", or "ALPACA"
+            paper_trading: Boolean, True for paper trading
+            broker: Already connected IB-compatible client to share
+            data_dir: Directory for the shared bar store and position journal
+        """
+        self.symbols = list(symbols or Config.WATCHLIST)
+        self.platform = platform
+        self.logger = logging.getLogger(__name__)
+        self.risk_budget = PortfolioRiskBudget(Config.MAX_PORTFOLIO_RISK)
+
+        # The first bot opens the connection, journal and metrics; the rest
+        # reuse them
+        first = SPXBullPutBot(platform, paper_trading, broker, data_dir, symbol=self.symbols[0],
+                              risk_budget=self.risk_budget)
+        shared_broker = first.connection if platform == "IB" else broker
+        self.bots = [first] + [
+            SPXBullPutBot(platform, paper_trading, shared_broker, data_dir, symbol=symbol,
+                          journal=first.journal, metrics=first.metrics,
+                          risk_budget=self.risk_budget, dashboard=first.dashboard,
+                          alerts=first.alerts)
+            for symbol in self.symbols[1:]
+        ]
+
+    @property
+    def positions(self) -> dict:
+        """Open positions across all symbols"""
+        return {pid: pos for bot in self.bots for pid, pos in bot.positions.items()}
+
+    def run(self):
+        """Trade every symbol until interrupted"""
+        self.logger.info(f"Scanning {', '.join(self.symbols)} "
+                         f"(portfolio risk limit ${self.risk_budget.limit:,.0f})")
+        self.bots[0].start_alerts()
+        self.bots[0].start_metrics_server()
+        self.bots[0].start_dashboard_server()
+
+        try:
+            if self.platform == "IB":
+                PortfolioRuntime(self.bots).run()
+                return
+
+            while True:
+                try:
+                    if is_market_open():
+                        for bot in self.bots:
+                            bot.poll_once()
+                    time_module.sleep(60)
+
+                except KeyboardInterrupt:
+                    self.logger.info("Scanner stopped by user")
+                    break
+                except Exception as e:
+                    self.logger.error(f"Error in scanner loop: {e}")
+                    time_module.sleep(60)
+        finally:
+            # Shared by every bot
+            self.bots[0].journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-underlying bull put spread scanner")
+    parser.add_argument('--symbols', nargs='+', default=list(Config.WATCHLIST),
+                        help="Underlyings to trade (default: all of Config.WATCHLIST)")
+    parser.add_argument('--platform', default=Config.PREFERRED_PLATFORM,
+                        choices=['IB', 'TDA', 'ALPACA'])
+    parser.add_argument('--live', action='store_true', help="Trade the live account")
+    args = parser.parse_args()
+
+    UnderlyingScanner([s.upper() for s in args.symbols], args.platform,
+                      paper_trading=not args.live).run()
+
+
+if __name__ == "__main__":
+    main()
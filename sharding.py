@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Sharded strategy processes for the SPX Bull Put Credit Spread Trading Bot
+
+Runs several independently parameterized bots as separate processes
+behind a single market data connection:
+- The feed process holds the only market data connection. It publishes
+  underlying prices, daily/1-minute/5-second bars and option quotes to a
+  MarketDataBus in shared memory
+- Each strategy worker (one per Config.STRATEGY_SHARDS entry) runs an
+  unmodified SPXBullPutBot whose market data client is a BusClient reading
+  the bus in place, and whose order client is its own IB connection
+  (clientId, and port for a different account). Its journal, bar store
+  and risk budget live under data/<shard name>, so every shard keeps its
+  own position book
+- Option contracts are qualified and subscribed by the feed the first time
+  any worker asks for them, and then shared by all of them
+
+Workers see quotes at the bus poll interval (20 ms by default) after the
+feed receives them. The launcher restarts the feed if it dies; workers
+treat the gap as a data disconnect and resume when its heartbeat returns.
+
+Run: python sharding.py [--live] [--simulate]
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import queue
+import time as time_module
+
+import numpy as np
+
+from config import Config
+from connection import IBConnectionManager
+from contract_cache import ContractCache
+from market_bus import MINUTE, REALTIME, BusClient, MarketDataBus
+from runtime import exchange_now
+
+
+class MarketDataFeed:
+    """Publishes one market data connection onto a MarketDataBus"""
+
+    def __init__(self, bus, connection, symbols, requests, data_dir="data", history_days=400,
+                 minute_days=3, heartbeat=1.0, poll_interval=0.01):
+        """
+        Args:
+            bus: MarketDataBus to write
+            connection: IBConnectionManager whose data client is used
+            symbols: Underlyings to publish
+            requests: Queue of option contract requests from the workers
+            data_dir: Directory for the feed's contract caches
+            history_days: Daily bars published per underlying
+            minute_days: Days of 1-minute bars published per underlying
+            heartbeat: Seconds between heartbeats while connected
+            poll_interval: Seconds between checks of the request queue
+        """
+        self.bus = bus
+        self.connection = connection
+        self.ib = connection.data
+        self.symbols = list(symbols)
+        self.requests = requests
+        self.data_dir = data_dir
+        self.history_days = history_days
+        self.minute_days = minute_days
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._caches = {}    # symbol -> ContractCache
+        self._streams = {}   # symbol -> [contract, ticker, realtime bars]
+        self._quotes = {}    # slot -> [contract, ticker]
+        self._minutes = {}   # symbol index -> [minute, open, high, low, close, volume]
+
+    def run(self):
+        """Publish until interrupted"""
+        try:
+            self.ib.run(self.run_async())
+        except KeyboardInterrupt:
+            self.logger.info("Market data feed stopped by user")
+
+    async def run_async(self):
+        for symbol in self.symbols:
+            await self._add_symbol(symbol)
+        self._resume_quotes()
+        self.connection.reconnectedEvent += self._on_reconnected
+        self.logger.info(f"Publishing {', '.join(self.symbols)} on {self.bus.name}")
+
+        last_beat = 0.0
+        while True:
+            batch = []
+            while True:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            for kind, payload in batch:
+                if kind == 'options':
+                    await self._add_options(payload)
+
+            now = time_module.monotonic()
+            if now - last_beat >= self.heartbeat and self.connection.is_healthy:
+                self.bus.heartbeat()
+                last_beat = now
+            await asyncio.sleep(self.poll_interval)
+
+    # Underlyings
+
+    def _cache(self, symbol) -> ContractCache:
+        cache = self._caches.get(symbol)
+        if cache is None:
+            cache = self._caches[symbol] = ContractCache(
+                os.path.join(self.data_dir, 'contracts', f"{symbol}.json"))
+        cache.roll()
+        return cache
+
+    async def _add_symbol(self, symbol):
+        from ib_insync import Index, Stock
+
+        try:
+            settings = Config.WATCHLIST.get(symbol, {})
+            if settings.get('sec_type', 'IND') == 'IND':
+                contract = Index(symbol, settings.get('exchange', 'CBOE'), 'USD')
+            else:
+                contract = Stock(symbol, 'SMART', 'USD')
+
+            cache = self._cache(symbol)
+            if cache.underlying is None:
+                await self.ib.qualifyContractsAsync(contract)
+                if not contract.conId:
+                    self.logger.error(f"Could not qualify {symbol}, not publishing it")
+                    return
+                cache.set_underlying(contract)
+            contract = cache.underlying
+            index = self.bus.add_symbol(symbol, contract.conId)
+
+            if cache.chain is None:
+                chains = await self.ib.reqSecDefOptParamsAsync(
+                    symbol, '', contract.secType, contract.conId)
+                if chains:
+                    cache.set_chain(chains[0])
+            if cache.chain is not None:
+                self.bus.set_chain(index, cache.chain['tradingClass'], cache.chain['multiplier'],
+                                   cache.expirations, cache.chain['strikes'])
+
+            daily = await self.ib.reqHistoricalDataAsync(
+                contract, endDateTime='', durationStr=f'{self.history_days} D',
+                barSizeSetting='1 day', whatToShow='TRADES', useRTH=True, formatDate=1)
+            self.bus.publish_daily(index, *self._columns(daily))
+            minutes = await self.ib.reqHistoricalDataAsync(
+                contract, endDateTime='', durationStr=f'{self.minute_days} D',
+                barSizeSetting='1 min', whatToShow='TRADES', useRTH=True, formatDate=2)
+            self.bus.publish_bars(index, MINUTE, *self._columns(minutes))
+
+            self._streams[symbol] = [contract, None, None]
+            self._subscribe(symbol)
+            self.logger.info(f"{symbol}: {len(daily)} daily and {len(minutes)} 1-minute bars "
+                             f"published")
+        except Exception as e:
+            self.logger.error(f"Error publishing {symbol}: {e}")
+
+    @staticmethod
+    def _columns(bars) -> tuple:
+        return ([bar.date for bar in bars], [bar.open for bar in bars],
+                [bar.high for bar in bars], [bar.low for bar in bars],
+                [bar.close for bar in bars], [bar.volume for bar in bars])
+
+    def _subscribe(self, symbol):
+        stream = self._streams[symbol]
+        index = self.bus.symbol_id(symbol)
+        stream[1] = self.ib.reqMktData(stream[0], '', False, False)
+        stream[1].updateEvent += functools.partial(self._on_price, index)
+        stream[2] = self.ib.reqRealTimeBars(stream[0], 5, 'TRADES', True)
+        stream[2].updateEvent += functools.partial(self._on_realtime_bars, index)
+
+    def _on_price(self, index, ticker):
+        price = ticker.marketPrice()
+        if not price or price != price:
+            price = ticker.close
+        if price and price == price:
+            self.bus.publish_spot(index, price, ticker.time)
+
+    def _on_realtime_bars(self, index, bars, has_new_bar):
+        """Publish a 5-second bar and fold it into today's daily and the current minute bar"""
+        if not has_new_bar or not bars:
+            return
+        bar = bars[-1]
+        self.bus.publish_bars(index, REALTIME, [bar.time], [bar.open_], [bar.high], [bar.low],
+                              [bar.close], [bar.volume])
+
+        today = exchange_now().date()
+        daily = self.bus.daily[index][:int(self.bus.symbols['n_daily'][index])]
+        if len(daily) and daily['time'][-1] == np.datetime64(today, 'ns'):
+            last = daily[-1]
+            self.bus.publish_daily(index, [today], [last['open']], [max(last['high'], bar.high)],
+                                   [min(last['low'], bar.low)], [bar.close],
+                                   [last['volume'] + bar.volume])
+        else:
+            self.bus.publish_daily(index, [today], [bar.open_], [bar.high], [bar.low],
+                                   [bar.close], [bar.volume])
+
+        minute = bar.time.replace(second=0, microsecond=0)
+        current = self._minutes.get(index)
+        if current is not None and current[0] != minute:
+            self.bus.publish_bars(index, MINUTE, *([value] for value in current))
+            current = None
+        if current is None:
+            self._minutes[index] = [minute, bar.open_, bar.high, bar.low, bar.close, bar.volume]
+        else:
+            current[2] = max(current[2], bar.high)
+            current[3] = min(current[3], bar.low)
+            current[4] = bar.close
+            current[5] += bar.volume
+
+    # Options
+
+    async def _add_options(self, requested):
+        """Qualify and subscribe option contracts the workers asked for"""
+        from ib_insync import Option
+
+        by_symbol = {}
+        for symbol, expiry, strike, right, trading_class in requested:
+            index = self.bus.symbol_id(symbol)
+            if index < 0 or self.bus.find_quote(index, expiry, strike, right) >= 0:
+                continue  # Unknown underlying, or another worker asked first
+            cache = self._cache(symbol)
+            trading_class = trading_class or (cache.chain or {}).get('tradingClass', '')
+            key = cache.option_key(expiry, strike, right, trading_class)
+            by_symbol.setdefault(symbol, {})[key] = index
+
+        for symbol, keys in by_symbol.items():
+            cache = self._cache(symbol)
+            try:
+                contracts, missing = cache.get_options(list(keys))
+                if missing:
+                    candidates = [Option(symbol, expiry, strike, right, 'SMART', tradingClass=tc)
+                                  for expiry, strike, right, tc in missing]
+                    await self.ib.qualifyContractsAsync(*candidates)
+                    resolved = {key: opt if opt.conId else None
+                                for key, opt in zip(missing, candidates)}
+                    if any(resolved.values()):
+                        cache.add_options(resolved)
+                    contracts.update(resolved)
+            except Exception as e:
+                self.logger.error(f"Error qualifying {symbol} options: {e}")
+                continue
+
+            for key, index in keys.items():
+                expiry, strike, right, _ = key
+                contract = contracts.get(key)
+                # A slot with conId 0 tells the workers the contract does not exist
+                slot = self.bus.add_quote(index, expiry, strike, right,
+                                          contract.conId if contract is not None else 0)
+                if contract is not None:
+                    self._quotes[slot] = [contract, None]
+                    self._subscribe_option(slot)
+
+    def _subscribe_option(self, slot):
+        entry = self._quotes[slot]
+        ticker = self.ib.reqMktData(entry[0], '', False, False)
+        if ticker is not entry[1]:
+            ticker.updateEvent += functools.partial(self._on_quote, slot)
+            entry[1] = ticker
+
+    def _on_quote(self, slot, ticker):
+        self.bus.publish_quote(slot, ticker.bid, ticker.ask, ticker.last, ticker.time)
+
+    def _resume_quotes(self):
+        """Resubscribe the options already on the bus when the feed is restarted"""
+        from ib_insync import Option
+
+        count = self.bus.quote_count
+        for slot in range(count):
+            record = self.bus.quotes[slot]
+            if slot in self._quotes or not record['con_id']:
+                continue
+            symbol = str(self.bus.symbols['name'][record['symbol']])
+            contract = Option(symbol, str(record['expiry']), float(record['strike']),
+                              str(record['right']), 'SMART', conId=int(record['con_id']),
+                              tradingClass=str(self.bus.symbols['trading_class'][record['symbol']]))
+            self._quotes[slot] = [contract, None]
+            self._subscribe_option(slot)
+        if count:
+            self.logger.info(f"Resumed {len(self._quotes)} option quotes")
+
+    def _on_reconnected(self, role):
+        """Restart every stream after the data client reconnects"""
+        if role != 'data':
+            return
+        for symbol in self._streams:
+            self._subscribe(symbol)
+        for slot in self._quotes:
+            self._subscribe_option(slot)
+
+
+async def _random_walk(broker, interval=5.0, vol=0.18):
+    """Move a SimulatedBroker's underlying like a live market"""
+    step = vol * np.sqrt(interval / (252 * 6.5 * 3600))
+    rng = np.random.default_rng()
+    while True:
+        await asyncio.sleep(interval)
+        broker.set_spot(broker.spot * float(np.exp(rng.normal(0, step))))
+
+
+def _port(shard, paper_trading) -> int:
+    return shard.get('port') or (Config.IB_PAPER_PORT if paper_trading else Config.IB_LIVE_PORT)
+
+
+def run_feed(bus_name, requests, symbols, paper_trading=True, data_dir="data", simulate=False):
+    """Feed process entry point"""
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s feed %(name)s %(levelname)s %(message)s")
+    from ib_insync import util
+
+    bus = MarketDataBus(bus_name)
+    if simulate:
+        from sim_broker import SimulatedBroker
+        broker = SimulatedBroker()
+        connection = IBConnectionManager.from_client(broker)
+    else:
+        connection = IBConnectionManager(Config.IB_HOST, _port({}, paper_trading),
+                                         client_id=Config.IB_CLIENT_ID, roles=('data',))
+        connection.connect()
+
+    feed = MarketDataFeed(bus, connection, symbols, requests,
+                          data_dir=os.path.join(data_dir, 'feed'))
+    try:
+        if simulate:
+            util.run(asyncio.gather(feed.run_async(), _random_walk(broker)))
+        else:
+            feed.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def run_worker(bus_name, requests, shard, paper_trading=True, data_dir="data", simulate=False):
+    """Strategy worker process entry point"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s {shard['name']} %(name)s %(levelname)s %(message)s")
+    from spx_bull_put_bot import SPXBullPutBot
+
+    data = BusClient(MarketDataBus(bus_name), requests)
+    if simulate:
+        from sim_broker import SimulatedBroker
+        orders = SimulatedBroker()
+    else:
+        from ib_insync import IB
+        orders = IB()
+    # Orders first, so the shard's client_id is the one its account sees
+    connection = IBConnectionManager(Config.IB_HOST, _port(shard, paper_trading),
+                                     client_id=shard['client_id'],
+                                     clients={'orders': orders, 'data': data})
+    connection.connect()
+
+    bot = SPXBullPutBot("IB", paper_trading, broker=connection,
+                        data_dir=os.path.join(data_dir, shard['name']), symbol=shard['symbol'],
+                        params=shard.get('params'))
+    bot.metrics_port = shard.get('metrics_port')
+    bot.dashboard_port = shard.get('dashboard_port')
+    bot.run_strategy()
+
+
+def run_shards(shards, paper_trading=True, data_dir="data", simulate=False, startup_timeout=120):
+    """
+    Start the feed and one worker per shard, and run until interrupted
+
+    Args:
+        shards: Config.STRATEGY_SHARDS-style list of
+            {"name", "symbol", "client_id", "port", "params", ...}
+        paper_trading: Boolean, True for paper trading
+        data_dir: Root of the per-shard data directories
+        simulate: Use SimulatedBroker instead of TWS for data and orders
+        startup_timeout: Seconds allowed for the feed to publish everything
+    """
+    logger = logging.getLogger(__name__)
+    context = multiprocessing.get_context('spawn')
+    symbols = sorted({shard['symbol'] for shard in shards})
+    bus = MarketDataBus(create=True)
+    requests = context.Queue()
+    feed_args = (bus.name, requests, symbols, paper_trading, data_dir, simulate)
+
+    def start_feed():
+        process = context.Process(target=run_feed, args=feed_args, name='market-data-feed')
+        process.start()
+        return process
+
+    feed = start_feed()
+    workers = []
+    try:
+        deadline = time_module.monotonic() + startup_timeout
+        while not bus.is_alive():
+            if not feed.is_alive() or time_module.monotonic() > deadline:
+                logger.error("Market data feed did not start")
+                return
+            time_module.sleep(0.5)
+
+        for shard in shards:
+            worker = context.Process(target=run_worker, name=shard['name'],
+                                     args=(bus.name, requests, shard, paper_trading, data_dir,
+                                           simulate))
+            worker.start()
+            workers.append(worker)
+        logger.info(f"Running {len(workers)} strategy shards on {', '.join(symbols)}")
+
+        while any(worker.is_alive() for worker in workers):
+            if not feed.is_alive():
+                logger.error(f"Market data feed exited ({feed.exitcode}), restarting")
+                feed = start_feed()
+            time_module.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Shards stopped by user")
+    finally:
+        for process in [feed, *workers]:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        bus.close()
+        bus.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Config.STRATEGY_SHARDS as separate "
+                                                 "processes over one market data feed")
+    parser.add_argument('--live', action='store_true', help="Trade the live accounts")
+    parser.add_argument('--simulate', action='store_true',
+                        help="Use the simulated broker instead of TWS")
+    parser.add_argument('--data-dir', default="data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_shards(Config.STRATEGY_SHARDS, paper_trading=not args.live, data_dir=args.data_dir,
+               simulate=args.simulate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+In-process simulated Interactive Brokers client
+
+Implements the subset of the ib_insync IB API that SPXBullPutBot uses
+(contract qualification, historical bars, streaming market data, option
+chain definitions, combo orders, positions and the related events) on top
+of a synthetic price path, so the bot can be run and timed without TWS.
+Quotes arrive after a configurable latency on the asyncio event loop,
+just like real ticks.
+
+Usage:
+    broker = SimulatedBroker(quote_latency=0.005)
+    bot = SPXBullPutBot(platform="IB", broker=broker)
+"""
+
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from eventkit import Event
+from ib_insync import (BarData, CommissionReport, Contract, Execution, Fill, OptionChain,
+                       OrderStatus, Position, RealTimeBar, RealTimeBarList, Ticker, Trade, util)
+
+from pricing import bs_price
+
+
+class SimulatedBroker:
+    """Drop-in stand-in for ib_insync.IB backed by a synthetic market"""
+
+    def __init__(self, spot=5000.0, vol=0.18, drift=0.0, history_days=400,
+                 quote_latency=0.0, fill_latency=0.0, half_spread=0.05,
+                 risk_free_rate=0.04, seed=0):
+        """
+        Args:
+            spot: Underlying price today
+            vol: Annualized volatility of the price path and option quotes
+            drift: Annualized drift of the historical path
+            history_days: Number of daily bars of synthetic history
+            quote_latency: Seconds from subscription to first quote
+            fill_latency: Seconds from order placement to fill
+            half_spread: Half the bid/ask spread on every option quote
+            risk_free_rate: Rate used to price option quotes
+            seed: Random seed for the price path
+        """
+        self.vol = vol
+        self.quote_latency = quote_latency
+        self.fill_latency = fill_latency
+        self.half_spread = half_spread
+        self.risk_free_rate = risk_free_rate
+
+        rng = self._rng = np.random.default_rng(seed)
+        returns = rng.normal((drift - 0.5 * vol * vol) / 252, vol / np.sqrt(252), history_days)
+        path = np.exp(np.cumsum(returns[::-1]))[::-1]
+        self.history = spot * path / path[-1]
+        today = datetime.now().date()
+        self.history_dates = [today - timedelta(days=history_days - 1 - i)
+                              for i in range(history_days)]
+        self.spot = float(self.history[-1])
+
+        self.updateEvent = Event('updateEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+
+        self._conids = itertools.count(1000)
+        self._contracts = {}
+        self._order_ids = itertools.count(1)
+        self._tickers = {}
+        self._realtime_bars = []
+        self._trades = {}
+        self._positions = {}
+        self._connected = True
+
+    # Connection
+
+    def connect(self, *args, **kwargs):
+        self._connected = True
+        return self
+
+    async def connectAsync(self, *args, **kwargs):
+        return self.connect()
+
+    def disconnect(self):
+        # Like TWS, a dropped connection ends every market data subscription
+        self._connected = False
+        self._tickers.clear()
+        self._realtime_bars.clear()
+        self.disconnectedEvent.emit()
+
+    def isConnected(self) -> bool:
+        return self._connected
+
+    def run(self, *awaitables, timeout=None):
+        return util.run(*awaitables, timeout=timeout)
+
+    def sleep(self, seconds):
+        return util.run(asyncio.sleep(seconds))
+
+    # Market path
+
+    def set_spot(self, spot):
+        """Move the underlying and requote every live subscription"""
+        self.spot = float(spot)
+        tickers = list(self._tickers.values())
+        # Requote everything before notifying, so no listener sees a mix of
+        # old and new legs
+        for ticker in tickers:
+            self._quote(ticker)
+        for ticker in tickers:
+            ticker.updateEvent.emit(ticker)
+        now = datetime.now(timezone.utc)
+        for bars in list(self._realtime_bars):
+            bars.append(RealTimeBar(time=now, open_=self.spot, high=self.spot, low=self.spot,
+                                    close=self.spot))
+            bars.updateEvent.emit(bars, True)
+        self.updateEvent.emit()
+
+    # Contracts
+
+    def qualifyContracts(self, *contracts):
+        return self.run(self.qualifyContractsAsync(*contracts))
+
+    async def qualifyContractsAsync(self, *contracts):
+        for contract in contracts:
+            if not contract.conId:
+                contract.conId = next(self._conids)
+            if contract.secType == 'OPT' and not contract.tradingClass:
+                contract.tradingClass = contract.symbol
+            self._contracts[contract.conId] = contract
+        return list(contracts)
+
+    def reqSecDefOptParams(self, *args):
+        return self.run(self.reqSecDefOptParamsAsync(*args))
+
+    async def reqSecDefOptParamsAsync(self, underlyingSymbol, futFopExchange,
+                                      underlyingSecType, underlyingConId):
+        today = datetime.now().date()
+        # Weekly expiries for 10 weeks, strikes every 5 points around spot
+        fridays = [today + timedelta(days=(4 - today.weekday()) % 7 + 7 * w) for w in range(10)]
+        expirations = [d.strftime('%Y%m%d') for d in fridays]
+        center = round(self.spot / 5) * 5
+        strikes = [float(center + 5 * k) for k in range(-100, 101)]
+        return [OptionChain('SMART', underlyingConId, underlyingSymbol, '100',
+                            expirations, strikes)]
+
+    # Historical data
+
+    def reqHistoricalData(self, contract, endDateTime, durationStr, *args, **kwargs):
+        return self.run(self.reqHistoricalDataAsync(contract, endDateTime, durationStr,
+                                                    *args, **kwargs))
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr,
+                                     barSizeSetting='1 day', *args, **kwargs):
+        days = int(durationStr.split()[0])
+        if barSizeSetting == '1 min':
+            return self._minute_bars(days)
+        start = datetime.now().date() - timedelta(days=days)
+        bars = []
+        for date, close in zip(self.history_dates, self.history):
+            if date > start:
+                bars.append(BarData(date=date, open=close, high=close, low=close,
+                                    close=float(close), volume=0))
+        if bars:
+            bars[-1].close = self.spot
+        return bars
+
+    def _minute_bars(self, days):
+        """Random-walk 1-minute bars over `days` sessions, ending at spot"""
+        n = days * 390
+        returns = self._rng.normal(0, self.vol / np.sqrt(252 * 390), n)
+        path = np.exp(np.cumsum(returns[::-1]))[::-1]
+        closes = self.spot * path / path[-1]
+        end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        return [BarData(date=end - timedelta(minutes=n - 1 - i), open=c, high=c, low=c,
+                        close=float(c), volume=0) for i, c in enumerate(closes)]
+
+    # Market data
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False,
+                   regulatorySnapshot=False, mktDataOptions=None):
+        ticker = self._tickers.get(id(contract))
+        if ticker is None:
+            ticker = Ticker(contract=contract)
+            self._tickers[id(contract)] = ticker
+        loop = util.getLoop()
+        if self.quote_latency > 0:
+            loop.call_later(self.quote_latency, self._publish, ticker)
+        else:
+            loop.call_soon(self._publish, ticker)
+        return ticker
+
+    def cancelMktData(self, contract):
+        self._tickers.pop(id(contract), None)
+
+    def reqRealTimeBars(self, contract, barSize, whatToShow, useRTH, realTimeBarsOptions=None):
+        """5-second bars, one per set_spot call"""
+        bars = RealTimeBarList()
+        bars.contract = contract
+        bars.barSize = barSize
+        self._realtime_bars.append(bars)
+        return bars
+
+    def cancelRealTimeBars(self, bars):
+        if bars in self._realtime_bars:
+            self._realtime_bars.remove(bars)
+
+    def _publish(self, ticker):
+        if id(ticker.contract) not in self._tickers:
+            return
+        self._quote(ticker)
+        ticker.updateEvent.emit(ticker)
+        self.updateEvent.emit()
+
+    def _quote(self, ticker):
+        contract = ticker.contract
+        ticker.time = datetime.now(timezone.utc)
+        if contract.secType != 'OPT':
+            ticker.last = ticker.close = self.spot
+        else:
+            expiry = datetime.strptime(contract.lastTradeDateOrContractMonth, '%Y%m%d')
+            years = max((expiry + timedelta(hours=16) - datetime.now()).total_seconds(), 0) / (
+                365 * 86400)
+            mid = float(bs_price(self.spot, contract.strike, years, self.vol,
+                                 self.risk_free_rate, contract.right))
+            ticker.bid = max(round(mid - self.half_spread, 2), 0.05)
+            ticker.ask = round(max(mid, 0.05) + self.half_spread, 2)
+            ticker.last = round(mid, 2)
+
+    # Orders and positions
+
+    def placeOrder(self, contract, order):
+        # Placing a known order again modifies it, the pending fill picks
+        # up the new limit
+        if order.orderId in self._trades:
+            return self._trades[order.orderId]
+
+        order.orderId = order.orderId or next(self._order_ids)
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status='Submitted',
+                                                    remaining=order.totalQuantity))
+        self._trades[order.orderId] = trade
+        loop = util.getLoop()
+        if self.fill_latency > 0:
+            loop.call_later(self.fill_latency, self._fill, trade)
+        else:
+            loop.call_soon(self._fill, trade)
+        return trade
+
+    def cancelOrder(self, order):
+        trade = self._trades.get(order.orderId)
+        if trade is None or trade.isDone():
+            return trade
+        trade.orderStatus.status = 'Cancelled'
+        trade.statusEvent.emit(trade)
+        trade.cancelledEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+        return trade
+
+    def _fill(self, trade):
+        order = trade.order
+        if trade.orderStatus.status in ('Filled', 'Cancelled'):
+            return
+        now = datetime.now(timezone.utc)
+        execution = Execution(execId=f"sim.{order.orderId}", time=now, side=order.action,
+                              shares=order.totalQuantity, price=order.lmtPrice,
+                              orderId=order.orderId, cumQty=order.totalQuantity,
+                              avgPrice=order.lmtPrice)
+        fill = Fill(trade.contract, execution, CommissionReport(), now)
+        trade.fills.append(fill)
+        trade.orderStatus.status = 'Filled'
+        trade.orderStatus.filled = order.totalQuantity
+        trade.orderStatus.remaining = 0
+        trade.orderStatus.avgFillPrice = order.lmtPrice
+
+        # Legs of a BAG are booked as individual option positions
+        sign = 1 if order.action == 'BUY' else -1
+        for leg in trade.contract.comboLegs or []:
+            leg_sign = sign * (1 if leg.action == 'BUY' else -1)
+            self._positions[leg.conId] = (self._positions.get(leg.conId, 0)
+                                          + leg_sign * leg.ratio * order.totalQuantity)
+
+        trade.fillEvent.emit(trade, fill)
+        trade.statusEvent.emit(trade)
+        trade.filledEvent.emit(trade)
+        self.execDetailsEvent.emit(trade, fill)
+        self.orderStatusEvent.emit(trade)
+        self.updateEvent.emit()
+
+    def positions(self):
+        return [Position('SIM', self._contracts.get(con_id) or Contract(secType='OPT', conId=con_id),
+                         qty, 0.0)
+                for con_id, qty in self._positions.items() if qty]
@@ -19,79 +19,174 @@ import numpy as np
 from datetime import datetime, timedelta, time
 import time as time_module
 import logging
+import os
 from typing import Dict, List, Optional, Tuple
 import asyncio
+import bisect
+import uuid
+
+from alerts import AlertPipeline
+from bar_store import BarStore
+from chain_store import ChainRecorder
+from config import Config
+from connection import IBConnectionManager
+from contract_cache import ContractCache
+from dashboard import DashboardFeed, DashboardServer
+from execution import FILLED, PARTIAL, UNCONFIRMED, ExecutionEngine
+from indicators import IncrementalRSI, MultiTimeframeRSI, bar_seconds
+from journal import PositionJournal
+from metrics import Metrics, MetricsServer
+from option_chain import OptionChain
+from pricing import greeks, implied_vol, years_to_expiry
+from risk import MonteCarloRisk, PortfolioRiskBudget
+from runtime import StrategyRuntime, is_market_open
+
+
+def _load_platform(platform):
+    """
+    Import the SDK for one trading platform into module globals
+
+    Broker SDKs and indicator backends are heavy, so nothing is imported
+    at module load; SPXBullPutBot loads only the platform it was asked for.
+    """
+    global Index, Stock, Option, Contract, ComboLeg, Order, util
+    global TradingClient, StockHistoricalDataClient, StockBarsRequest, TimeFrame
+
+    if platform == "IB":
+        from ib_insync import Index, Stock, Option, Contract, ComboLeg, Order, util
+    elif platform == "TDA":
+        import tda  # noqa: F401 - fail early if the SDK is missing
+    elif platform == "ALPACA":
+        from alpaca.trading.client import TradingClient
+        from alpaca.data.historical import StockHistoricalDataClient
+        from alpaca.data.requests import StockBarsRequest
+        from alpaca.data.timeframe import TimeFrame
 
-# Technical Analysis Libraries
-import talib
-import pandas_ta as ta
-
-# Interactive Brokers imports (choose one platform)
-try:
-    from ib_insync import *
-    PLATFORM = "IB"
-except ImportError:
-    PLATFORM = None
-
-# TD Ameritrade imports (alternative)
-try:
-    import tda
-    from tda import auth, client
-    if PLATFORM is None:
-        PLATFORM = "TDA"
-except ImportError:
-    pass
-
-# Alpaca imports (alternative)
-try:
-    from alpaca.trading.client import TradingClient
-    from alpaca.trading.requests import MarketOrderRequest, OptionLegRequest
-    from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
-    from alpaca.data.historical import StockHistoricalDataClient
-    from alpaca.data.requests import StockBarsRequest
-    from alpaca.data.timeframe import TimeFrame
-    if PLATFORM is None:
-        PLATFORM = "ALPACA"
-except ImportError:
-    pass
 
 class SPXBullPutBot:
-    def __init__(self, platform="IB", paper_trading=True):
+    def __init__(self, platform="IB", paper_trading=True, broker=None, data_dir="data",
+                 symbol="SPX", journal=None, metrics=None, risk_budget=None, dashboard=None,
+                 alerts=None, params=None):
         """
         Initialize the SPX Bull Put Credit Spread Trading Bot
 
         Args:
             platform: "IB", "TDA", or "ALPACA"
             paper_trading: Boolean, True for paper trading
+            broker: Already connected IB-compatible client (e.g.
+                sim_broker.SimulatedBroker), or an IBConnectionManager
+                shared with other bots, to use instead of connecting
+            data_dir: Directory for the bar store and position journal
+            symbol: Underlying to trade; Config.WATCHLIST entries override
+                the default parameters below
+            journal: PositionJournal shared with bots on other underlyings
+            metrics: Metrics registry shared with bots on other underlyings
+            risk_budget: PortfolioRiskBudget shared with bots on other
+                underlyings
+            dashboard: DashboardFeed shared with bots on other underlyings
+            alerts: AlertPipeline shared with bots on other underlyings
+            params: Strategy parameter overrides applied after the
+                Config.WATCHLIST entry, e.g. {"rsi_threshold": 30}
         """
         self.platform = platform
         self.paper_trading = paper_trading
+        self.broker = broker
+        self.data_dir = data_dir
         self.positions = {}
-        self.historical_data = pd.DataFrame()
+        self.reconcile_pending = False  # Restored positions not yet checked at the broker
 
         # Strategy Parameters
         self.rsi_threshold = 35
         self.rsi_period = 14
         self.days_to_expiry = 14
         self.target_delta = 0.5  # 50 delta for short put
+        self.risk_free_rate = 0.04  # Used for implied vol and greeks
         self.spread_width = 10   # 10 points wide
         self.profit_target = 0.5  # 50% profit target
         self.position_size = 1   # Number of contracts per trade
 
+        # Full-surface spread search across expiries and widths instead of
+        # one expiry and spread_width (see Config.SPREAD_SEARCH)
+        self.spread_search = Config.SPREAD_SEARCH
+        self.search_expiries = Config.SEARCH_EXPIRIES  # Target days to expiry
+        self.search_widths = Config.SEARCH_WIDTHS      # Points
+        self.search_rank = Config.SEARCH_RANK
+
         # Risk Management
         self.max_positions = 5
         self.min_dte = 7  # Minimum days to expiry before closing
+        self.max_risk_per_trade = Config.MAX_RISK_PER_TRADE  # Dollars
+        self.max_prob_loss = Config.MAX_PROB_LOSS
+        self.max_portfolio_cvar = Config.MAX_PORTFOLIO_CVAR
+        self.risk_budget = risk_budget or PortfolioRiskBudget(Config.MAX_PORTFOLIO_RISK)
+
+        # Underlying
+        self.symbol = symbol
+        self.sec_type = 'IND'
+        self.exchange = 'CBOE'
+        self.strike_window = (50, 10)  # Points below/above spot to fetch
+        self.proxy = 'SPY'  # ETF standing in for the index where there are no index bars
+        self.contract_multiplier = 100
+
+        # Intraday signals: RSI on these bar sizes built from IB 5-second
+        # real-time bars instead of daily bars (empty for daily signals)
+        self.signal_timeframes = ()   # e.g. ('1m', '5m', '30m')
+        self.confirm_timeframes = None  # How many must be oversold, None = all
+
+        for name, value in {**Config.WATCHLIST.get(symbol, {}), **(params or {})}.items():
+            setattr(self, name, value)
+
+        # Only IB streams the real-time bars intraday signals are built from
+        if self.signal_timeframes and self.platform != "IB":
+            raise ValueError(f"Intraday RSI signals (signal_timeframes) need IB real-time "
+                             f"bars, not available on {self.platform}")
+
+        # Incremental RSI over a bounded ring buffer of daily bars
+        self.rsi_engine = IncrementalRSI(self.rsi_period)
+        self.intraday_rsi = (MultiTimeframeRSI(self.signal_timeframes, self.rsi_period)
+                             if self.signal_timeframes else None)
+
+        # Simulated P&L of the whole book, checked before every entry
+        self.risk_engine = MonteCarloRisk(confidence=Config.RISK_CONFIDENCE,
+                                          rate=self.risk_free_rate)
+
+        # Market Data
+        self.chain_timeout = 1.5  # Max seconds to wait for a chain snapshot
+        self.bar_store = BarStore(os.path.join(data_dir, 'bars'))
+        self._contract_caches = {}  # symbol -> ContractCache, see contract_cache()
+        self.chain_recorder = (ChainRecorder(os.path.join(data_dir, 'chains'))
+                               if Config.RECORD_OPTION_CHAINS else None)
 
         # Logging setup
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+        # Durable record of entries, fills and closes
+        self.journal = journal or PositionJournal(os.path.join(data_dir, 'journal.db'))
+        self._order_positions = {}  # orderId -> position_id
+
+        # Stage latencies and event counters, served on localhost while running
+        self.metrics = metrics or Metrics()
+        self.metrics_port = 9108  # None to disable the endpoint
+
+        # Live RSI, positions, P&L and signals for the web dashboard
+        self.dashboard = dashboard or DashboardFeed()
+        self.dashboard_port = 8080  # None to disable the dashboard server
+
+        # Email / Telegram notifications, delivered off the trading loop
+        self.alerts = alerts or AlertPipeline.from_config()
+
         # Initialize connection based on platform
         self.client = None
         self._initialize_platform()
+        self.restore_positions()
 
     def _initialize_platform(self):
         """Initialize connection to chosen trading platform"""
+        if self.platform not in ("IB", "TDA", "ALPACA"):
+            raise ValueError("Unsupported platform. Choose IB, TDA, or ALPACA")
+        _load_platform(self.platform)
+
         if self.platform == "IB":
             self._initialize_ib()
         elif self.platform == "TDA":
@@ -102,16 +197,37 @@ class SPXBullPutBot:
             raise ValueError("Unsupported platform. Choose IB, TDA, or ALPACA")
 
     def _initialize_ib(self):
-        """Initialize Interactive Brokers connection"""
-        try:
-            self.ib = IB()
-            if self.paper_trading:
-                self.ib.connect('127.0.0.1', 7497, clientId=1)  # Paper trading port
+        """
+        Initialize the Interactive Brokers connection pool
+
+        Market data and orders go over separate clients (clientIds 1 and
+        2). A client that drops, or fails to connect at startup, is
+        reconnected in the background and the strategy pauses until then.
+        """
+        if isinstance(self.broker, IBConnectionManager):
+            self.connection = self.broker
+        elif self.broker is not None:
+            self.connection = IBConnectionManager.from_client(self.broker, metrics=self.metrics)
+            self.logger.info(f"Using supplied broker client {type(self.broker).__name__}")
+        else:
+            port = 7497 if self.paper_trading else 7496  # Paper / live trading port
+            self.connection = IBConnectionManager('127.0.0.1', port, client_id=1,
+                                                  metrics=self.metrics)
+            if self.connection.connect():
+                self.logger.info("Connected to Interactive Brokers")
             else:
-                self.ib.connect('127.0.0.1', 7496, clientId=1)  # Live trading port
-            self.logger.info("Connected to Interactive Brokers")
-        except Exception as e:
-            self.logger.error(f"Failed to connect to IB: {e}")
+                self.logger.error("Not connected to IB, retrying in the background")
+
+        self.ib = self.connection.data
+        self.order_ib = self.connection.orders
+        self.order_ib.execDetailsEvent += self._on_exec_details
+        self.execution = ExecutionEngine(self.order_ib, metrics=self.metrics)
+        self.connection.reconnectedEvent += self._on_reconnected
+
+    @property
+    def is_connected(self) -> bool:
+        """Broker connection health (only monitored on Interactive Brokers)"""
+        return self.platform != "IB" or self.connection.is_healthy
 
     def _initialize_tda(self):
         """Initialize TD Ameritrade connection"""
@@ -137,12 +253,52 @@ class SPXBullPutBot:
                     secret_key="YOUR_LIVE_SECRET_KEY",
                     paper=False
                 )
+            # One data client for every bar request
+            self.data_client = StockHistoricalDataClient(
+                api_key="YOUR_DATA_API_KEY",
+                secret_key="YOUR_DATA_SECRET_KEY"
+            )
             self.logger.info("Connected to Alpaca")
         except Exception as e:
             self.logger.error(f"Failed to connect to Alpaca: {e}")
 
     def get_spx_data(self, days=100) -> pd.DataFrame:
-        """Get historical SPX price data for RSI calculation"""
+        """
+        Get historical price data of the underlying for RSI calculation
+
+        History is served from the local bar store. Only the bars from the
+        last stored day onwards are requested from the platform, unless the
+        store does not yet reach back far enough.
+        """
+        data = self._fetch_spx_data(self._days_to_fetch(days))
+        return self._store_bars(data, days)
+
+    def _days_to_fetch(self, days) -> int:
+        """Number of days the platform must supply to cover the last `days`"""
+        symbol = f"{self.platform}_{self.symbol}"
+        now = datetime.now()
+        start = now - timedelta(days=days)
+
+        first = self.bar_store.first_timestamp(symbol, '1 day')
+        last = self.bar_store.last_timestamp(symbol, '1 day')
+        if first is None or first > start + timedelta(days=5):
+            return days
+        # Refetch the last stored day too, it may have been in progress
+        return max((now.date() - last.date()).days + 1, 1)
+
+    def _store_bars(self, data, days) -> pd.DataFrame:
+        """Merge freshly fetched bars into the store and return the last `days`"""
+        symbol = f"{self.platform}_{self.symbol}"
+        if data is not None and not data.empty:
+            if 'close' not in data.columns:
+                data = data.rename(columns=str.lower)
+            self.bar_store.merge(symbol, '1 day', self._bar_times(data), data)
+
+        start = datetime.now() - timedelta(days=days)
+        return self.bar_store.load(symbol, '1 day', start=start)
+
+    def _fetch_spx_data(self, days) -> pd.DataFrame:
+        """Request the last `days` of underlying bars from the platform"""
         if self.platform == "IB":
             return self._get_spx_data_ib(days)
         elif self.platform == "TDA":
@@ -152,12 +308,16 @@ class SPXBullPutBot:
 
     def _get_spx_data_ib(self, days) -> pd.DataFrame:
         """Get SPX data from Interactive Brokers"""
+        return self.ib.run(self._get_spx_data_ib_async(days))
+
+    async def _get_spx_data_ib_async(self, days) -> pd.DataFrame:
+        """Get SPX data from Interactive Brokers without blocking the event loop"""
         try:
-            spx = Index('SPX', 'CBOE', 'USD')
-            self.ib.qualifyContracts(spx)
+            underlying = self.underlying_contract()
+            await self.ib.qualifyContractsAsync(underlying)
 
-            bars = self.ib.reqHistoricalData(
-                spx,
+            bars = await self.ib.reqHistoricalDataAsync(
+                underlying,
                 endDateTime='',
                 durationStr=f'{days} D',
                 barSizeSetting='1 day',
@@ -171,7 +331,7 @@ class SPXBullPutBot:
             return df
 
         except Exception as e:
-            self.logger.error(f"Error getting SPX data from IB: {e}")
+            self.logger.error(f"Error getting {self.symbol} data from IB: {e}")
             return pd.DataFrame()
 
     def _get_spx_data_tda(self, days) -> pd.DataFrame:
@@ -183,18 +343,13 @@ class SPXBullPutBot:
     def _get_spx_data_alpaca(self, days) -> pd.DataFrame:
         """Get SPX data from Alpaca"""
         try:
-            data_client = StockHistoricalDataClient(
-                api_key="YOUR_DATA_API_KEY",
-                secret_key="YOUR_DATA_SECRET_KEY"
-            )
-
             request = StockBarsRequest(
-                symbol_or_symbols=["SPY"],  # Use SPY as proxy for SPX
+                symbol_or_symbols=[self.proxy],  # ETF proxy for the index
                 timeframe=TimeFrame.Day,
                 start=datetime.now() - timedelta(days=days)
             )
 
-            bars = data_client.get_stock_bars(request)
+            bars = self.data_client.get_stock_bars(request)
             df = bars.df
             return df
 
@@ -208,38 +363,187 @@ class SPXBullPutBot:
             data = data.rename(columns={'Close': 'close'})
 
         # Calculate RSI using pandas_ta
+        import pandas_ta as ta
         data['rsi'] = ta.rsi(data['close'], length=self.rsi_period)
 
         return data
 
-    def should_enter_trade(self) -> bool:
-        """Check if conditions are met to enter a new trade"""
-        # Get latest SPX data
-        data = self.get_spx_data(100)
+    @staticmethod
+    def _bar_times(data: pd.DataFrame) -> np.ndarray:
+        """Bar timestamps as naive UTC datetime64[ns], whatever the source index"""
+        index = data.index
+        if isinstance(index, pd.MultiIndex):
+            index = index.get_level_values(-1)  # Alpaca: (symbol, timestamp)
+        return pd.to_datetime(index, utc=True).tz_convert(None).to_numpy(dtype='datetime64[ns]')
+
+    def update_rsi(self) -> float:
+        """
+        Bring the incremental RSI up to date and return the latest value
+
+        The first call seeds Wilder's smoothing from 100 days of history.
+        Later calls only fetch the bars from the engine's last bar onwards,
+        however long ago that was: new bars advance the state, while the
+        in-progress bar is revised in place.
+        """
+        days, seed = self._rsi_days()
+        with self.metrics.timer('data_fetch'):
+            data = self.get_spx_data(days)
+        return self._feed_rsi(data, seed=seed)
+
+    async def update_rsi_async(self) -> float:
+        """update_rsi for the IB event loop"""
+        days, seed = self._rsi_days()
+        with self.metrics.timer('data_fetch'):
+            data = await self._get_spx_data_ib_async(self._days_to_fetch(days))
+            data = self._store_bars(data, days)
+        return self._feed_rsi(data, seed=seed)
+
+    def _rsi_days(self) -> tuple:
+        """(days of history to load, whether to reseed) for the next RSI update"""
+        last_time = self.rsi_engine.bars.last_time
+        if not self.rsi_engine.is_ready or last_time is None:
+            return 100, True
+        last_day = pd.Timestamp(last_time).date()
+        days = max((datetime.now().date() - last_day).days + 1, 2)
+        if days >= 100:
+            return 100, True
+        return days, False
+
+    def _feed_rsi(self, data, seed) -> float:
+        with self.metrics.timer('rsi'):
+            value = self._feed_rsi_bars(data, seed)
+        self.publish_market()
+        return value
+
+    def _feed_rsi_bars(self, data, seed) -> float:
         if data.empty:
-            return False
+            return np.nan
+
+        if 'close' not in data.columns:
+            data = data.rename(columns={'Close': 'close'})
+
+        times = self._bar_times(data)
+        if seed:
+            return self.rsi_engine.seed(times, data['close'].to_numpy())
+
+        for ts, close in zip(times, data['close'].to_numpy()):
+            self.rsi_engine.update(ts, close)
+        return self.rsi_engine.value
+
+    def signal_rsi(self) -> float:
+        """
+        RSI the entry signal is judged on
 
-        # Calculate RSI
-        data = self.calculate_rsi(data)
+        Daily RSI by default. In intraday mode it is the RSI of the
+        confirm_timeframes-th most oversold timeframe, so it is below the
+        threshold only when that many timeframes agree.
+        """
+        if self.intraday_rsi is not None:
+            return self.intraday_rsi.confirmation_rsi(self.confirm_timeframes)
+        return self.rsi_engine.value
+
+    async def seed_intraday_async(self):
+        """
+        Warm up the intraday timeframes with one request for 1-minute bars
 
-        # Get latest RSI value
-        current_rsi = data['rsi'].iloc[-1]
+        Covers enough regular sessions for the longest timeframe to have
+        a full RSI lookback; the real-time stream takes over from there.
+        """
+        longest = max(bar_seconds(tf) for tf in self.signal_timeframes)
+        session_seconds = 6.5 * 3600
+        days = int(np.ceil(longest * (self.rsi_period + 1) / session_seconds)) + 1
+        try:
+            bars = await self.ib.reqHistoricalDataAsync(
+                self.underlying_contract(),
+                endDateTime='',
+                durationStr=f'{days} D',
+                barSizeSetting='1 min',
+                whatToShow='TRADES',
+                useRTH=True,
+                formatDate=2
+            )
+            self.intraday_rsi.seed([int(bar.date.timestamp()) for bar in bars],
+                                   [bar.close for bar in bars])
+            self.logger.info(f"{self.symbol} intraday RSI seeded from {len(bars)} bars: "
+                             f"{self.intraday_rsi.values}")
+        except Exception as e:
+            self.logger.error(f"Error seeding intraday RSI for {self.symbol}: {e}")
+
+    def on_realtime_bar(self, bar):
+        """Fold one IB real-time bar into every intraday timeframe"""
+        with self.metrics.timer('rsi'):
+            self.intraday_rsi.update(int(bar.time.timestamp()), bar.close)
+        self.publish_market()
+
+    def publish_market(self):
+        """Share the underlying's latest price and RSI with the dashboard and risk engine"""
+        # Bots on other underlyings value this one's spreads from here
+        self.risk_budget.update_market(self.symbol, spot=self.rsi_engine.bars.last_close)
+        self.dashboard.update('market', self.symbol, {
+            'price': self.rsi_engine.bars.last_close,
+            'rsi': self.rsi_engine.value,
+            'signal_rsi': self.signal_rsi(),
+            'threshold': self.rsi_threshold,
+            'timeframes': self.intraday_rsi.values if self.intraday_rsi is not None else None,
+            'time': datetime.now(),
+        })
+
+    def should_enter_trade(self) -> bool:
+        """Check if conditions are met to enter a new trade"""
+        if self.intraday_rsi is not None:
+            # Kept current by the real-time bar stream, nothing to fetch
+            return self.check_entry(self.signal_rsi())
+        return self.check_entry(self.update_rsi())
+
+    def check_entry(self, current_rsi) -> bool:
+        """Check the entry conditions against an already computed RSI"""
+        if np.isnan(current_rsi):
+            return False
+        if not self.is_connected:
+            self.logger.warning("Broker connection down, not entering")
+            return False
 
         self.logger.info(f"Current RSI: {current_rsi}")
 
         # Check entry conditions
         if current_rsi < self.rsi_threshold:
             # Additional checks
-            if len(self.positions) < self.max_positions:
-                return True
-            else:
+            if len(self.positions) >= self.max_positions:
                 self.logger.info("Maximum positions reached")
                 return False
+            if self.risk_budget.available <= 0:
+                self.logger.info("Portfolio risk budget exhausted")
+                return False
+            self.metrics.inc('signals')
+            self.dashboard.append('signals', {'time': datetime.now(), 'symbol': self.symbol,
+                                              'rsi': current_rsi, 'action': 'SIGNAL'})
+            self.alerts.notify('SIGNAL', f"{self.symbol} RSI {current_rsi:.1f} below "
+                                         f"{self.rsi_threshold}")
+            return True
 
         return False
 
-    def get_options_chain(self, symbol="SPX", expiry_days=14):
-        """Get options chain for SPX"""
+    def underlying_contract(self):
+        """IB contract for the underlying"""
+        if self.sec_type == 'IND':
+            return Index(self.symbol, self.exchange, 'USD')
+        return Stock(self.symbol, 'SMART', 'USD')
+
+    @property
+    def expiry_targets(self):
+        """Days out of the expiries to fetch: every searched one, or days_to_expiry"""
+        return self.search_expiries if self.spread_search else self.days_to_expiry
+
+    def get_options_chain(self, symbol=None, expiry_days=14):
+        """
+        Get options chain for the underlying
+
+        Args:
+            symbol: Underlying, defaults to self.symbol
+            expiry_days: Target days to expiry, or a sequence of them to
+                fetch the nearest expiry of each in one chain
+        """
+        symbol = symbol or self.symbol
         if self.platform == "IB":
             return self._get_options_chain_ib(symbol, expiry_days)
         elif self.platform == "TDA":
@@ -249,100 +553,223 @@ class SPXBullPutBot:
 
     def _get_options_chain_ib(self, symbol, expiry_days):
         """Get options chain from Interactive Brokers"""
-        try:
-            # Create underlying contract
-            if symbol == "SPX":
-                underlying = Index('SPX', 'CBOE', 'USD')
+        return self.ib.run(self._get_options_chain_ib_async(symbol, expiry_days))
+
+    async def _get_options_chain_ib_async(self, symbol, expiry_days):
+        """Get options chain from Interactive Brokers without blocking the event loop"""
+        with self.metrics.timer('chain'):
+            return await self._fetch_options_chain_ib(symbol, expiry_days)
+
+    def contract_cache(self, symbol=None) -> ContractCache:
+        """Session cache of contract definitions for an underlying"""
+        symbol = symbol or self.symbol
+        if symbol not in self._contract_caches:
+            self._contract_caches[symbol] = ContractCache(
+                os.path.join(self.data_dir, 'contracts', f"{symbol}.json"))
+        cache = self._contract_caches[symbol]
+        cache.roll()
+        return cache
+
+    async def qualified_underlying_async(self, symbol=None):
+        """Qualified IB contract for an underlying, qualified once per session"""
+        symbol = symbol or self.symbol
+        cache = self.contract_cache(symbol)
+        if cache.underlying is None:
+            if symbol == self.symbol:
+                underlying = self.underlying_contract()
             else:
                 underlying = Stock(symbol, 'SMART', 'USD')
-
-            self.ib.qualifyContracts(underlying)
+            await self.ib.qualifyContractsAsync(underlying)
+            cache.set_underlying(underlying)
+        return cache.underlying
+
+    async def _fetch_options_chain_ib(self, symbol, expiry_days):
+        # The underlying and leg quote waits share one chain_timeout budget
+        deadline = time_module.monotonic() + self.chain_timeout
+        subscribed = []   # Contracts to cancel market data for, however this ends
+        try:
+            cache = self.contract_cache(symbol)
+            underlying = await self.qualified_underlying_async(symbol)
 
             # Get current price
             ticker = self.ib.reqMktData(underlying, '', False, False)
-            self.ib.sleep(2)  # Wait for price update
-            current_price = ticker.last
-
-            # Calculate target expiry date
-            target_date = datetime.now() + timedelta(days=expiry_days)
+            subscribed.append(underlying)
+            await self._wait_for_quotes([ticker], deadline - time_module.monotonic(),
+                                        two_sided=False)
+            current_price = ticker.marketPrice()
+            if not current_price or current_price != current_price:
+                current_price = ticker.close
+
+            # Get option chain (once per session)
+            if cache.chain is None:
+                chains = await self.ib.reqSecDefOptParamsAsync(
+                    underlying.symbol, '', underlying.secType, underlying.conId
+                )
 
-            # Get option chain
-            chains = self.ib.reqSecDefOptParams(
-                underlying.symbol, '', underlying.secType, underlying.conId
+                if not chains:
+                    self.logger.error("No option chains found")
+                    return None
+
+                cache.set_chain(chains[0])
+
+            # Find the expiries closest to the target dates
+            now = datetime.now()
+            expiries = sorted({cache.nearest_expiry(now + timedelta(days=int(days)))
+                               for days in np.atleast_1d(expiry_days)} - {None})
+
+            # Get put options around current price, far enough down for the
+            # widest searched spread
+            below, above = self.strike_window
+            if self.spread_search:
+                below += max(self.search_widths)
+            strikes = cache.chain['strikes']
+            put_strikes = strikes[bisect.bisect_left(strikes, current_price - below):
+                                  bisect.bisect_right(strikes, current_price + above)]
+
+            keys = [cache.option_key(expiry, strike, 'P', cache.chain['tradingClass'])
+                    for expiry in expiries for strike in put_strikes]
+            contracts, missing = cache.get_options(keys)
+            if missing:
+                # Qualify the strikes not seen this session in one round-trip
+                candidates = [Option(symbol, expiry, strike, 'P', 'SMART', tradingClass=tc)
+                              for expiry, strike, _, tc in missing]
+                await self.ib.qualifyContractsAsync(*candidates)
+                resolved = {key: opt if opt.conId else None
+                            for key, opt in zip(missing, candidates)}
+                # Remember strikes IB could not resolve, unless the whole
+                # request failed
+                if any(resolved.values()):
+                    cache.add_options(resolved)
+                contracts.update(resolved)
+
+            # Drop anything IB could not resolve
+            options = [contracts[key] for key in keys if contracts[key] is not None]
+
+            # Subscribe every leg at once and wait for two-sided quotes
+            tickers = []
+            for opt in options:
+                tickers.append(self.ib.reqMktData(opt, '', False, False))
+                subscribed.append(opt)
+            await self._wait_for_quotes(tickers, deadline - time_module.monotonic())
+
+            chain = OptionChain(
+                strike=[opt.strike for opt in options],
+                bid=[ticker.bid for ticker in tickers],
+                ask=[ticker.ask for ticker in tickers],
+                last=[ticker.last for ticker in tickers],
+                expiry=[opt.lastTradeDateOrContractMonth for opt in options],
+                con_id=[opt.conId for opt in options],
+                contracts=options,
+                timestamps=[ticker.time for ticker in tickers],
             )
+            return chain
 
-            if not chains:
-                self.logger.error("No option chains found")
-                return None
-
-            chain = chains[0]
-
-            # Find closest expiry to target date
-            target_expiry = min(chain.expirations, 
-                              key=lambda x: abs((datetime.strptime(x, '%Y%m%d') - target_date).days))
+        except Exception as e:
+            self.logger.error(f"Error getting options chain from IB: {e}")
+            return None
+        finally:
+            for contract in subscribed:
+                self.ib.cancelMktData(contract)
 
-            # Get put options around current price
-            put_strikes = [s for s in chain.strikes 
-                          if current_price - 50 <= s <= current_price + 10]
+    async def _wait_for_quotes(self, tickers, timeout, two_sided=True):
+        """
+        Wait until every ticker has a usable quote or the deadline passes
 
-            options = []
-            for strike in put_strikes:
-                opt = Option('SPX', target_expiry, strike, 'P', 'SMART')
-                options.append(opt)
+        Args:
+            tickers: ib_insync Ticker objects with live subscriptions
+            timeout: Maximum seconds to wait
+            two_sided: Require both bid and ask; otherwise any price will do
 
-            # Qualify contracts and get market data
-            self.ib.qualifyContracts(*options)
+        Returns:
+            True if all tickers were quoted before the deadline
+        """
+        def is_quoted(ticker):
+            if two_sided:
+                return ticker.bid > 0 and ticker.ask > 0
+            return ticker.marketPrice() > 0 or ticker.close > 0
+
+        deadline = time_module.monotonic() + timeout
+        pending = [t for t in tickers if not is_quoted(t)]
+        while pending:
+            remaining = deadline - time_module.monotonic()
+            if remaining <= 0:
+                self.logger.warning(f"{len(pending)} of {len(tickers)} legs unquoted after "
+                                    f"{max(timeout, 0):.2f}s")
+                return False
+            try:
+                await asyncio.wait_for(self.ib.updateEvent, remaining)
+            except asyncio.TimeoutError:
+                pass
+            pending = [t for t in pending if not is_quoted(t)]
+        return True
 
-            option_data = []
-            for opt in options:
-                ticker = self.ib.reqMktData(opt, '', False, False)
-                self.ib.sleep(1)
+    def add_greeks(self, chain: OptionChain, current_price):
+        """
+        Add implied vol and greeks to every option in the chain, in place
 
-                option_data.append({
-                    'contract': opt,
-                    'strike': opt.strike,
-                    'bid': ticker.bid,
-                    'ask': ticker.ask,
-                    'last': ticker.last,
-                    'expiry': opt.lastTradeDateOrContractMonth
-                })
+        The whole chain is priced in one vectorized pass from the mid of
+        each quote. Legs without a usable quote get NaN greeks.
+        """
+        if not len(chain):
+            return chain
 
-            return option_data
+        years = years_to_expiry(chain.expiry)
+        chain.iv = implied_vol(chain.mid, current_price, chain.strike, years, self.risk_free_rate)
+        chain_greeks = greeks(current_price, chain.strike, years, chain.iv, self.risk_free_rate)
+        for name in ('delta', 'gamma', 'theta', 'vega'):
+            setattr(chain, name, np.asarray(chain_greeks[name], dtype=np.float64))
 
-        except Exception as e:
-            self.logger.error(f"Error getting options chain from IB: {e}")
-            return None
+        return chain
 
-    def find_bull_put_spread(self, options_data, current_price):
+    def find_bull_put_spread(self, chain: OptionChain, current_price):
         """Find suitable bull put spread based on strategy criteria"""
-        if not options_data:
+        if chain is None or not len(chain):
             return None, None
 
-        # Find ATM put (closest to 50 delta / current price)
-        short_put = None
-        long_put = None
+        # Find short put (sell) - delta closest to target_delta across the
+        # chain, falling back to the strike closest to ATM without greeks
+        delta_error = np.abs(np.abs(chain.delta) - self.target_delta)
+        if not np.isnan(delta_error).all():
+            short_idx = int(np.nanargmin(delta_error))
+        else:
+            short_idx = chain.nearest(current_price, tolerance=2 * self.spread_width)
+            if short_idx < 0:
+                return None, None
 
-        # Find short put (sell) - closest to ATM
-        atm_candidates = [opt for opt in options_data 
-                         if abs(opt['strike'] - current_price) <= 20]
+        # Find long put (buy) - spread_width points below the short put
+        long_idx = chain.below(short_idx, self.spread_width, tolerance=self.spread_width / 2)
+        long_put = chain[long_idx] if long_idx >= 0 and long_idx != short_idx else None
 
-        if not atm_candidates:
-            return None, None
+        return chain[short_idx], long_put
 
-        # Sort by proximity to current price
-        atm_candidates.sort(key=lambda x: abs(x['strike'] - current_price))
-        short_put = atm_candidates[0]
-
-        # Find long put (buy) - 10 points below short put
-        target_long_strike = short_put['strike'] - self.spread_width
-        long_candidates = [opt for opt in options_data 
-                          if abs(opt['strike'] - target_long_strike) <= 5]
+    def search_spreads(self, chain: OptionChain, current_price) -> tuple:
+        """
+        Rank every bull put spread in a chain, across all its expiries
 
-        if long_candidates:
-            long_candidates.sort(key=lambda x: abs(x['strike'] - target_long_strike))
-            long_put = long_candidates[0]
+        Each strike is paired with every width in search_widths within its
+        own expiry, and all pairs are priced in one vectorized pass. Kept
+        are spreads that are quoted, pay a credit, risk at most
+        max_risk_per_trade, expire after min_dte and sell a put no deeper
+        than target_delta.
 
-        return short_put, long_put
+        Returns:
+            (short_idx, long_idx, metrics arrays), best first by search_rank
+        """
+        short_idx, long_idx = chain.spread_candidates(self.search_widths, tolerance=0.01)
+        metrics = chain.spread_metrics(short_idx, long_idx, self.profit_target,
+                                       spot=current_price, rate=self.risk_free_rate)
+
+        with np.errstate(invalid='ignore'):
+            keep = ((metrics['net_credit'] > 0) & (metrics['max_risk'] > 0)
+                    & (self.position_risk(metrics['max_risk']) <= self.max_risk_per_trade)
+                    & (metrics['years'] * 365 > self.min_dte)
+                    & ~(np.abs(chain.delta[short_idx]) > self.target_delta))
+        score = np.nan_to_num(metrics[self.search_rank][keep], nan=-np.inf)
+        order = np.argsort(-score, kind='stable')
+        self.logger.info(f"Searched {len(short_idx)} spreads over "
+                         f"{len(np.unique(chain.expiry))} expiries, {len(order)} qualify")
+        return (short_idx[keep][order], long_idx[keep][order],
+                {name: values[keep][order] for name, values in metrics.items()})
 
     def calculate_spread_metrics(self, short_put, long_put):
         """Calculate spread risk, reward, and other metrics"""
@@ -378,51 +805,77 @@ class SPXBullPutBot:
         elif self.platform == "ALPACA":
             return self._place_order_alpaca(short_put, long_put, quantity)
 
+    def _spread_combo(self, short_put, long_put):
+        """Build the IB BAG contract for a bull put spread"""
+        combo = Contract()
+        combo.symbol = short_put['contract'].symbol
+        combo.secType = 'BAG'
+        combo.currency = 'USD'
+        combo.exchange = 'SMART'
+
+        # Create legs
+        leg1 = ComboLeg()
+        leg1.conId = short_put['contract'].conId
+        leg1.ratio = 1
+        leg1.action = 'SELL'
+        leg1.exchange = 'SMART'
+
+        leg2 = ComboLeg()
+        leg2.conId = long_put['contract'].conId  
+        leg2.ratio = 1
+        leg2.action = 'BUY'
+        leg2.exchange = 'SMART'
+
+        combo.comboLegs = [leg1, leg2]
+        return combo
+
     def _place_order_ib(self, short_put, long_put, quantity):
-        """Place order using Interactive Brokers"""
+        """
+        Place order using Interactive Brokers
+
+        The execution engine works the order from the mid credit toward the
+        natural credit (short bid - long ask) and cancels it at ORDER_TIMEOUT.
+        """
         try:
             # Create combo order for spread
-            combo = Contract()
-            combo.symbol = 'SPX'
-            combo.secType = 'BAG'
-            combo.currency = 'USD'
-            combo.exchange = 'SMART'
-
-            # Create legs
-            leg1 = ComboLeg()
-            leg1.conId = short_put['contract'].conId
-            leg1.ratio = 1
-            leg1.action = 'SELL'
-            leg1.exchange = 'SMART'
-
-            leg2 = ComboLeg()
-            leg2.conId = long_put['contract'].conId  
-            leg2.ratio = 1
-            leg2.action = 'BUY'
-            leg2.exchange = 'SMART'
-
-            combo.comboLegs = [leg1, leg2]
+            combo = self._spread_combo(short_put, long_put)
 
             # Create order
             order = Order()
             order.action = 'BUY'  # Buy the spread (net credit)
-            order.orderType = 'LMT'
             order.totalQuantity = quantity
 
-            # Calculate net credit for limit price
             metrics = self.calculate_spread_metrics(short_put, long_put)
-            order.lmtPrice = metrics['net_credit'] * 0.95  # Slightly below mid-price
+            natural = short_put['bid'] - long_put['ask']
+            working = self.execution.submit(combo, order, metrics['net_credit'], natural,
+                                            on_done=self._on_order_done)
 
-            # Place order
-            trade = self.ib.placeOrder(combo, order)
-
-            self.logger.info(f"Bull put spread order placed: {trade}")
-            return trade
+            self.logger.info(f"Bull put spread order placed: {working.trade}")
+            return working.trade
 
         except Exception as e:
             self.logger.error(f"Error placing order with IB: {e}")
             return None
 
+    def _close_order_ib(self, position, quantity):
+        """Buy back an open spread, worked from its mid toward its natural price"""
+        try:
+            combo = self._spread_combo(position['short_put'], position['long_put'])
+
+            order = Order()
+            order.action = 'SELL'  # Reverse of the opening order
+            order.totalQuantity = quantity
+            mid = position.get('mid') or position['profit_target']
+            working = self.execution.submit(combo, order, mid, position.get('natural'),
+                                            on_done=self._on_order_done)
+
+            self.logger.info(f"Bull put spread close order placed: {working.trade}")
+            return working.trade
+
+        except Exception as e:
+            self.logger.error(f"Error placing close order with IB: {e}")
+            return None
+
     def _place_order_alpaca(self, short_put, long_put, quantity):
         """Place order using Alpaca"""
         # Implementation for Alpaca multi-leg orders
@@ -431,97 +884,594 @@ class SPXBullPutBot:
 
     def manage_positions(self):
         """Check and manage existing positions"""
-        for position_id, position in self.positions.items():
-            # Check if profit target is reached
-            current_value = self.get_position_value(position)
+        with self.metrics.timer('manage_positions'):
+            # Iterate over a snapshot, closing removes entries from the dict
+            for position_id in list(self.positions):
+                self._check_exit(position_id)
+
+    def _check_exit(self, position_id):
+        """Close a position if its profit target or DTE exit has been reached"""
+        position = self.positions.get(position_id)
+        if position is None or position.get('closing') or position.get('working'):
+            return
+        # Exits need the order client, hold them until it reconnects
+        if not self.is_connected:
+            return
+
+        # Check if profit target is reached
+        current_value = self.get_position_value(position)
+
+        if current_value is not None and current_value <= position['profit_target']:
+            self.logger.info(f"Closing position {position_id} - profit target reached "
+                             f"(mark {current_value:.2f} <= {position['profit_target']:.2f})")
+            self.close_position(position_id, reason='profit_target')
+            return
+
+        # Check if close to expiration
+        days_to_expiry = (position['expiry'] - datetime.now()).days
+        if days_to_expiry <= self.min_dte:
+            self.logger.info(f"Closing position {position_id} - approaching expiration")
+            self.close_position(position_id, reason='min_dte')
+
+    def _subscribe_position(self, position_id):
+        """Stream both legs of a position and re-mark it on every quote"""
+        position = self.positions[position_id]
+
+        def on_quote(ticker):
+            self._on_leg_quote(position_id)
+
+        tickers = []
+        for leg in ('short_put', 'long_put'):
+            ticker = self.ib.reqMktData(position[leg]['contract'], '', False, False)
+            ticker.updateEvent += on_quote
+            tickers.append(ticker)
+        position['tickers'] = tickers
+        position['quote_handler'] = on_quote
+
+    def _on_leg_quote(self, position_id):
+        """Refresh the spread marks and evaluate exits as soon as a leg quote changes"""
+        position = self.positions.get(position_id)
+        if position is None:
+            return
+        short_ticker, long_ticker = position['tickers']
+        if not (short_ticker.bid > 0 and short_ticker.ask > 0 and long_ticker.bid > 0
+                and long_ticker.ask > 0):
+            return
+
+        # Cost to buy the spread back: mid, and natural (pay the ask, hit the bid)
+        position['mid'] = ((short_ticker.bid + short_ticker.ask)
+                           - (long_ticker.bid + long_ticker.ask)) / 2
+        position['natural'] = short_ticker.ask - long_ticker.bid
+        position['mark_time'] = max(short_ticker.time, long_ticker.time)
+        with self.metrics.timer('position_mark'):
+            self._check_exit(position_id)
+        self.publish_position(position_id)
+
+    def publish_position(self, position_id):
+        """Push a position's mark and P&L to the dashboard, or its removal"""
+        position = self.positions.get(position_id)
+        if position is None:
+            self.dashboard.update('positions', position_id, None)
+            return
+
+        mark = position.get('mid')
+        status = ('WORKING' if position.get('working') else
+                  'CLOSING' if position.get('closing') else 'OPEN')
+        self.dashboard.update('positions', position_id, {
+            'symbol': position['symbol'],
+            'entry_time': position['entry_time'],
+            'short_strike': position['short_put']['strike'],
+            'long_strike': position['long_put']['strike'],
+            'expiry': position['expiry'].date(),
+            'dte': (position['expiry'] - datetime.now()).days,
+            'quantity': position['quantity'],
+            'net_credit': position['net_credit'],
+            'mark': mark,
+            'pnl': None if mark is None else self.position_pnl(position, mark),
+            'max_risk': position['max_risk'],
+            'status': status,
+        })
+
+    def select_spread(self, options_data, current_price):
+        """
+        Pick the spread to trade from a chain snapshot
+
+        Returns:
+            (short_put, long_put, metrics), or None if nothing qualifies
+        """
+        if not options_data:
+            return None
+        if not isinstance(options_data, OptionChain):
+            options_data = OptionChain.from_records(options_data)
+
+        with self.metrics.timer('selection'):
+            return self._select_spread(options_data, current_price)
+
+    def _select_spread(self, chain, current_price):
+        self.add_greeks(chain, current_price)
+        self.risk_budget.update_market(self.symbol, current_price)
+        if self.chain_recorder is not None:
+            self.chain_recorder.record(self.symbol, chain, current_price)
+
+        # Find suitable spread
+        if self.spread_search:
+            short_idx, long_idx, ranked = self.search_spreads(chain, current_price)
+            if not len(short_idx):
+                return None
+            short_put, long_put = chain[short_idx[0]], chain[long_idx[0]]
+            self.logger.info(f"Best spread by {self.search_rank}: "
+                             f"{self._describe(short_put, long_put)}, "
+                             f"P(profit) {ranked['prob_profit'][0]:.1%}, "
+                             f"annualized return on risk {ranked['return_on_risk'][0]:.1%}")
+        else:
+            short_put, long_put = self.find_bull_put_spread(chain, current_price)
+        if not short_put or not long_put:
+            return None
 
-            if current_value <= position['profit_target']:
-                self.close_position(position_id)
-                self.logger.info(f"Closing position {position_id} - profit target reached")
+        # ATM vol of the spread's own expiry, for the portfolio simulation
+        atm = chain.nearest(current_price, expiry=short_put['expiry'])
+        if atm >= 0:
+            self.risk_budget.update_market(self.symbol, vol=chain.iv[atm])
 
-            # Check if close to expiration
-            days_to_expiry = (position['expiry'] - datetime.now()).days
-            if days_to_expiry <= self.min_dte:
-                self.close_position(position_id)
-                self.logger.info(f"Closing position {position_id} - approaching expiration")
+        # Calculate metrics
+        metrics = self.calculate_spread_metrics(short_put, long_put)
+
+        self.logger.info(f"Spread metrics: {metrics}")
+
+        # Only trade if metrics are acceptable
+        risk = self.position_risk(metrics['max_risk'])
+        if not (metrics['net_credit'] > 0 and risk <= self.max_risk_per_trade
+                and self.risk_budget.can_take(risk)):
+            self.metrics.inc('spread_rejections')
+            return None
+
+        # ...and the book including it stays within the simulated risk limits
+        spread = self._risk_spread(short_put, long_put, metrics['net_credit'], current_price)
+        with self.metrics.timer('portfolio_risk'):
+            book = self.risk_engine.simulate(self.risk_budget.spreads + [spread],
+                                             self.risk_budget.markets)
+        self.logger.info(f"Book with new spread: P(loss) {book['prob_loss']:.1%}, "
+                         f"E[P&L] ${book['expected_pnl']:,.0f}, VaR ${book['var']:,.0f}, "
+                         f"CVaR ${book['cvar']:,.0f}")
+        if book['prob_loss'] > self.max_prob_loss or book['cvar'] > self.max_portfolio_cvar:
+            self.logger.info("Spread rejected by portfolio risk limits")
+            self.metrics.inc('spread_rejections')
+            return None
+
+        metrics['portfolio'] = book
+        return short_put, long_put, metrics
+
+    def position_risk(self, max_risk, quantity=None) -> float:
+        """Dollar max loss of a position from its per-share max risk"""
+        quantity = self.position_size if quantity is None else quantity
+        return max_risk * self.contract_multiplier * quantity
+
+    def _risk_spread(self, short_put, long_put, credit, spot=None, quantity=None) -> dict:
+        """Terms of a spread as MonteCarloRisk.simulate takes them"""
+        return {
+            'symbol': self.symbol,
+            'short_strike': short_put['strike'],
+            'long_strike': long_put['strike'],
+            'credit': credit,
+            'contracts': self.contract_multiplier * (self.position_size if quantity is None
+                                                     else quantity),
+            # Settles at the close on expiry day
+            'expiry': datetime.strptime(short_put['expiry'], '%Y%m%d') + timedelta(hours=16),
+            'spot': spot,
+            'iv': short_put.get('iv'),
+        }
+
+    def _describe(self, short_put, long_put, quantity=None) -> str:
+        """e.g. '5000/4990P 20250919 x1'"""
+        return (f"{short_put['strike']:g}/{long_put['strike']:g}P {short_put['expiry']} "
+                f"x{self.position_size if quantity is None else quantity:g}")
+
+    def position_pnl(self, position, close_price) -> float:
+        """Dollar P&L of a position if bought back at close_price"""
+        return ((position['net_credit'] - close_price) * self.contract_multiplier
+                * position.get('quantity', self.position_size))
+
+    def open_position(self, short_put, long_put, metrics):
+        """Place the spread order and store the position for management"""
+        # Seconds plus a random suffix so same-minute entries never collide
+        position_id = (f"{self.symbol}_BPS_{datetime.now().strftime('%Y%m%d_%H%M%S')}_"
+                       f"{uuid.uuid4().hex[:6]}")
+        risk = self.position_risk(metrics['max_risk'])
+        spread = self._risk_spread(short_put, long_put, metrics['net_credit'])
+        if not self.risk_budget.reserve(position_id, risk, spread):
+            self.metrics.inc('spread_rejections')
+            return None
+
+        with self.metrics.timer('order'):
+            order = self.place_bull_put_spread_order(short_put, long_put, self.position_size)
+
+        if not order:
+            self.risk_budget.release(position_id)
+        else:
+            self.metrics.inc('orders')
+            self.positions[position_id] = {
+                'symbol': self.symbol,
+                'short_put': short_put,
+                'long_put': long_put,
+                'order': order,
+                'quantity': self.position_size,
+                'working': self.platform == "IB",  # Entry order still being worked
+                'entry_time': datetime.now(),
+                'net_credit': metrics['net_credit'],
+                'profit_target': metrics['profit_target'],
+                'max_risk': risk,
+                'expiry': datetime.strptime(short_put['expiry'], '%Y%m%d')
+            }
+            if self.platform == "IB":
+                self._order_positions[order.order.orderId] = position_id
+                self._subscribe_position(position_id)
+            self.journal.record_open(position_id, self._journal_entry(self.positions[position_id]))
+            self.publish_position(position_id)
+            self.dashboard.append('signals', {'time': datetime.now(), 'symbol': self.symbol,
+                                              'rsi': self.signal_rsi(), 'action': 'ENTERED'})
+            self.alerts.notify('ORDER', f"{self.symbol} {self._describe(short_put, long_put)} "
+                                        f"for {metrics['net_credit']:.2f} credit")
+
+        return order
+
+    @staticmethod
+    def _journal_entry(position) -> dict:
+        """JSON-friendly subset of a position, enough to rebuild it after a restart"""
+        def leg(option):
+            contract = option['contract']
+            return {
+                'strike': option['strike'],
+                'expiry': option['expiry'],
+                'bid': option['bid'],
+                'ask': option['ask'],
+                'conId': getattr(contract, 'conId', None),
+                'symbol': getattr(contract, 'symbol', None),
+                'tradingClass': getattr(contract, 'tradingClass', None),
+            }
+
+        order = position.get('order')
+        return {
+            'symbol': position['symbol'],
+            'short_put': leg(position['short_put']),
+            'long_put': leg(position['long_put']),
+            'order_id': getattr(getattr(order, 'order', None), 'orderId', None),
+            'quantity': position['quantity'],
+            'entry_time': position['entry_time'],
+            'net_credit': position['net_credit'],
+            'profit_target': position['profit_target'],
+            'max_risk': position['max_risk'],
+            'expiry': position['expiry'],
+        }
+
+    def _position_from_journal(self, data) -> dict:
+        """Rebuild an in-memory position from its journal entry"""
+        def leg(entry):
+            option = {k: entry[k] for k in ('strike', 'expiry', 'bid', 'ask')}
+            option['contract'] = None
+            if self.platform == "IB":
+                option['contract'] = Option(entry['symbol'], entry['expiry'], entry['strike'], 'P',
+                                            'SMART', tradingClass=entry['tradingClass'] or '',
+                                            conId=entry['conId'])
+            return option
+
+        # Entries from before the multi-symbol journal are SPX, and had
+        # their risk in points per share
+        spread_width = data['short_put']['strike'] - data['long_put']['strike']
+        return {
+            'symbol': data.get('symbol', 'SPX'),
+            'short_put': leg(data['short_put']),
+            'long_put': leg(data['long_put']),
+            'order': None,
+            'order_id': data['order_id'],
+            'quantity': data.get('quantity', self.position_size),
+            'entry_time': datetime.fromisoformat(data['entry_time']),
+            'net_credit': data['net_credit'],
+            'profit_target': data['profit_target'],
+            'max_risk': data.get('max_risk',
+                                 self.position_risk(spread_width - data['net_credit'],
+                                                    data.get('quantity'))),
+            'expiry': datetime.fromisoformat(data['expiry']),
+        }
+
+    def restore_positions(self):
+        """Rebuild open positions from the journal and reconcile them with the broker"""
+        start = time_module.perf_counter()
+        for position_id, data in self.journal.load_open_positions().items():
+            if data.get('symbol', 'SPX') != self.symbol:
+                continue
+            self.positions[position_id] = self._position_from_journal(data)
+            position = self.positions[position_id]
+            self.risk_budget.restore(position_id, position['max_risk'],
+                                     self._risk_spread(position['short_put'], position['long_put'],
+                                                       position['net_credit'],
+                                                       quantity=position['quantity']))
+            if data['order_id'] is not None:
+                self._order_positions[data['order_id']] = position_id
+            self.publish_position(position_id)
+
+        if self.positions:
+            self.logger.info(f"Restored {len(self.positions)} open positions from journal in "
+                             f"{(time_module.perf_counter() - start) * 1000:.1f} ms")
+            self.reconcile_pending = True
+            self.reconcile_positions()
+
+    def reconcile_positions(self):
+        """
+        Compare the restored book with the broker's positions
+
+        Spreads whose short leg is no longer held were closed while the
+        bot was down and are marked closed, and a spread held in a
+        different size than the book says is resized to match. Positions
+        with an order still being worked are left to that order. Option
+        positions the journal does not know about are reported but left
+        alone. If IB is down this waits for _on_reconnected to run it once
+        every client is back.
+        """
+        if self.platform != "IB" or not self.connection.is_healthy:
+            if self.positions:
+                self.logger.warning("IB not connected, reconciling positions on reconnect")
+            return
+        self.reconcile_pending = False
+
+        held = {p.contract.conId: p.position for p in self.order_ib.positions()}
+        live = {self._order_positions.get(order_id) for order_id in self.execution.working}
+        booked = {}   # short leg conId -> position ids on it
+        for position_id, position in self.positions.items():
+            booked.setdefault(position['short_put']['contract'].conId, []).append(position_id)
+
+        known = set()
+        for position_id in list(self.positions):
+            position = self.positions[position_id]
+            short_id = position['short_put']['contract'].conId
+            legs = (short_id, position['long_put']['contract'].conId)
+            if position_id in live:
+                known.update(legs)
+                continue
+            if held.get(short_id, 0) >= 0:
+                self.logger.warning(f"Position {position_id} not held at broker, marking closed")
+                del self.positions[position_id]
+                self.risk_budget.release(position_id)
+                self.publish_position(position_id)
+                self.journal.record_close(position_id, {'reason': 'reconcile'})
+                continue
+            known.update(legs)
+            if booked[short_id] == [position_id] and -held[short_id] != position['quantity']:
+                self.logger.warning(f"Position {position_id} is x{-held[short_id]:g} at broker, "
+                                    f"not x{position['quantity']:g}; resizing")
+                self._resize_position(position_id, -held[short_id])
+            if 'tickers' not in position:
+                self._subscribe_position(position_id)
+
+        # Other underlyings' bots may share this connection, only check ours
+        for p in self.order_ib.positions():
+            if (p.contract.secType == 'OPT' and p.contract.symbol == self.symbol
+                    and p.contract.conId not in known):
+                self.logger.warning(f"Broker position not in journal: {p.contract.localSymbol} "
+                                    f"x{p.position}")
+
+    def _resize_position(self, position_id, quantity, credit=None):
+        """Set the number of spreads held, scaling risk and updating the budget and journal"""
+        position = self.positions[position_id]
+        if credit is not None:
+            position['net_credit'] = credit
+            position['profit_target'] = credit * (1 - self.profit_target)
+        position['max_risk'] = position['max_risk'] / position['quantity'] * quantity
+        position['quantity'] = quantity
+        self.risk_budget.restore(position_id, position['max_risk'],
+                                 self._risk_spread(position['short_put'], position['long_put'],
+                                                   position['net_credit'], quantity=quantity))
+        self.journal.record_open(position_id, self._journal_entry(position))
+        self.publish_position(position_id)
+
+    def _on_order_done(self, working):
+        """Settle a position once its opening or closing order has finished"""
+        position_id = self._order_positions.get(working.order_id)
+        position = self.positions.get(position_id)
+        if position is None:
+            return
+
+        if working.status == UNCONFIRMED:
+            # The order may still be live or filled; keep the position and its
+            # risk until the broker settles it, and check the book meanwhile
+            self.logger.warning(f"Order {working.order_id} for {position_id} not confirmed "
+                                f"cancelled, reconciling with the broker")
+            self.reconcile_pending = True
+            self.reconcile_positions()
+            return
+
+        if position.get('closing'):
+            if working.status == FILLED:
+                self._finish_close(position_id, fill_price=working.fill_price)
+                return
+            if working.status == PARTIAL:
+                self._resize_position(position_id, position['quantity'] - working.filled)
+            # Still held at the broker, the next exit check tries again
+            position['closing'] = False
+            self.publish_position(position_id)
+        elif working.status in (FILLED, PARTIAL):
+            # Manage the position from the credit and quantity actually filled
+            position['working'] = False
+            self._resize_position(position_id, working.filled or position['quantity'],
+                                  credit=working.fill_price)
+            spread = self._describe(position['short_put'], position['long_put'],
+                                    position['quantity'])
+            self.alerts.notify('FILL', f"{self.symbol} {spread} filled at "
+                                       f"{working.fill_price:.2f}")
+        else:
+            self.logger.warning(f"Entry order for {position_id} {working.status}, dropping it")
+            position['close_reason'] = f"entry_{working.status}"
+            self._finish_close(position_id)
+
+    def _on_reconnected(self, role):
+        """Re-request leg quotes of open positions once the data client is back"""
+        if role == 'data':
+            resubscribed = 0
+            for position_id, position in list(self.positions.items()):
+                if 'tickers' not in position:
+                    continue
+                for ticker in position['tickers']:
+                    ticker.updateEvent -= position['quote_handler']
+                self._subscribe_position(position_id)
+                resubscribed += 1
+            self.logger.info(f"Resubscribed {resubscribed} {self.symbol} positions")
+        if self.reconcile_pending:
+            # Positions restored while IB was down have no streams yet
+            self.reconcile_positions()
+
+    def _on_exec_details(self, trade, fill):
+        """Journal executions against the position their order belongs to"""
+        position_id = self._order_positions.get(trade.order.orderId)
+        if position_id is None:
+            return
+        self.journal.record_fill(position_id, {
+            'order_id': trade.order.orderId,
+            'exec_id': fill.execution.execId,
+            'side': fill.execution.side,
+            'shares': fill.execution.shares,
+            'price': fill.execution.price,
+            'time': fill.time,
+        })
+
+    def enter_trade(self, current_price):
+        """Fetch the chain, select a spread and open it"""
+        with self.metrics.timer('signal_to_order'):
+            options_data = self.get_options_chain(expiry_days=self.expiry_targets)
+            selection = self.select_spread(options_data, current_price)
+            if selection:
+                return self.open_position(*selection)
+            return None
 
     def run_strategy(self):
-        """Main strategy execution loop"""
+        """
+        Main strategy execution loop
+
+        Interactive Brokers runs on the event-driven StrategyRuntime. The
+        other platforms have no streaming data here and poll once a minute.
+        """
         self.logger.info("Starting SPX Bull Put Credit Spread Bot")
+        self.start_alerts()
+        self.start_metrics_server()
+        self.start_dashboard_server()
 
-        while True:
-            try:
-                # Check market hours (9:30 AM - 4:00 PM ET)
-                current_time = datetime.now().time()
-                market_open = time(9, 30)
-                market_close = time(16, 0)
-
-                if market_open <= current_time <= market_close:
-                    # Manage existing positions
-                    self.manage_positions()
-
-                    # Check for new entry signals
-                    if self.should_enter_trade():
-                        self.logger.info("Entry signal detected!")
-
-                        # Get current SPX price
-                        spx_data = self.get_spx_data(1)
-                        if not spx_data.empty:
-                            current_price = spx_data['close'].iloc[-1]
-
-                            # Get options chain
-                            options_data = self.get_options_chain()
-
-                            if options_data:
-                                # Find suitable spread
-                                short_put, long_put = self.find_bull_put_spread(
-                                    options_data, current_price
-                                )
-
-                                if short_put and long_put:
-                                    # Calculate metrics
-                                    metrics = self.calculate_spread_metrics(short_put, long_put)
-
-                                    self.logger.info(f"Spread metrics: {metrics}")
-
-                                    # Place order if metrics are acceptable
-                                    if metrics['net_credit'] > 0 and metrics['max_risk'] < 1000:
-                                        order = self.place_bull_put_spread_order(
-                                            short_put, long_put, self.position_size
-                                        )
-
-                                        if order:
-                                            # Store position for management
-                                            position_id = f"SPX_BPS_{datetime.now().strftime('%Y%m%d_%H%M')}"
-                                            self.positions[position_id] = {
-                                                'short_put': short_put,
-                                                'long_put': long_put,
-                                                'order': order,
-                                                'entry_time': datetime.now(),
-                                                'profit_target': metrics['profit_target'],
-                                                'expiry': datetime.strptime(short_put['expiry'], '%Y%m%d')
-                                            }
-
-                # Sleep for 1 minute before next check
-                time_module.sleep(60)
-
-            except KeyboardInterrupt:
-                self.logger.info("Bot stopped by user")
-                break
-            except Exception as e:
-                self.logger.error(f"Error in main loop: {e}")
-                time_module.sleep(60)
+        try:
+            if self.platform == "IB":
+                StrategyRuntime(self).run()
+                return
+
+            while True:
+                try:
+                    if is_market_open():
+                        self.poll_once()
+
+                    # Sleep for 1 minute before next check
+                    time_module.sleep(60)
+
+                except KeyboardInterrupt:
+                    self.logger.info("Bot stopped by user")
+                    break
+                except Exception as e:
+                    self.logger.error(f"Error in main loop: {e}")
+                    time_module.sleep(60)
+        finally:
+            self.journal.close()
+
+    def poll_once(self):
+        """One polling pass: manage positions, then look for an entry"""
+        self.manage_positions()
+
+        # Check for new entry signals
+        if self.should_enter_trade():
+            self.logger.info(f"{self.symbol} entry signal detected!")
+
+            # Current price of the underlying (just refreshed by the RSI update)
+            current_price = self.rsi_engine.bars.last_close
+            if current_price is not None:
+                self.enter_trade(current_price)
+
+    def start_metrics_server(self):
+        """Serve self.metrics on localhost if a port is configured"""
+        if not self.metrics_port:
+            return None
+        try:
+            return MetricsServer(self.metrics, port=self.metrics_port).start()
+        except OSError as e:
+            self.logger.error(f"Could not start metrics endpoint: {e}")
+            return None
+
+    def start_alerts(self):
+        """Start alert delivery and move log output (and the log file) onto its thread"""
+        if not self.alerts.running:
+            self.alerts.start()
+            self.alerts.install_logging(getattr(logging, Config.LOG_LEVEL, logging.INFO),
+                                        Config.LOG_FILE if Config.LOG_TO_FILE else None)
+        return self.alerts
+
+    def start_dashboard_server(self):
+        """Stream self.dashboard to the web dashboard if a port is configured"""
+        if not self.dashboard_port:
+            return None
+        try:
+            return DashboardServer(self.dashboard, port=self.dashboard_port).start()
+        except OSError as e:
+            self.logger.error(f"Could not start dashboard server: {e}")
+            return None
 
     def get_position_value(self, position):
-        """Get current value of a position"""
-        # Implementation to get current position value
-        return 0
+        """
+        Get current value of a position
+
+        Returns:
+            Streaming mid cost to close the spread, or None until both legs
+            have been quoted
+        """
+        return position.get('mid')
 
-    def close_position(self, position_id):
+    def close_position(self, position_id, reason=None):
         """Close a specific position"""
-        # Implementation to close position
-        if position_id in self.positions:
-            del self.positions[position_id]
+        position = self.positions.get(position_id)
+        if position is None or position.get('closing'):
+            return
+        position['closing'] = True
+        position['close_reason'] = reason
+
+        if self.platform == "IB":
+            trade = self._close_order_ib(position, position['quantity'])
+            if trade is None:
+                position['closing'] = False
+            else:
+                # Settled by _on_order_done once the close order finishes
+                self._order_positions[trade.order.orderId] = position_id
+            self.publish_position(position_id)
+            return
+
+        self._finish_close(position_id)
+
+    def _finish_close(self, position_id, fill_price=None):
+        """Drop a closed position from the book and the journal"""
+        position = self.positions.pop(position_id)
+        for leg, ticker in zip(('short_put', 'long_put'), position.get('tickers', ())):
+            ticker.updateEvent -= position['quote_handler']
+            self.ib.cancelMktData(position[leg]['contract'])
+
+        self.risk_budget.release(position_id)
+        self.journal.record_close(position_id, {'reason': position.get('close_reason'),
+                                                'mark': position.get('mid'),
+                                                'fill_price': fill_price})
+
+        self.publish_position(position_id)
+        exit_price = fill_price if fill_price is not None else position.get('mid')
+        if not position.get('working') and exit_price is not None:
+            pnl = self.position_pnl(position, exit_price)
+            self.dashboard.record_trade(pnl, (datetime.now() - position['entry_time']).days)
+            self.dashboard.append('signals', {'time': datetime.now(), 'symbol': self.symbol,
+                                              'rsi': self.signal_rsi(), 'action': 'CLOSED',
+                                              'outcome': 'WIN' if pnl > 0 else 'LOSS',
+                                              'pnl': pnl})
+            spread = self._describe(position['short_put'], position['long_put'],
+                                    position['quantity'])
+            self.alerts.notify('CLOSE', f"{self.symbol} {spread} closed "
+                                        f"({position.get('close_reason')}) at {exit_price:.2f}, "
+                                        f"P&L ${pnl:,.2f}")
 
 
 # Example usage and setup instructions
@@ -547,6 +1497,10 @@ def main():
         bot = SPXBullPutBot(platform=platform, paper_trading=paper)
 
         # Run backtest first (optional)
+        if input("Run backtest first? (y/n): ").lower() == 'y':
+            from backtest import BullPutBacktest, load_history, print_report
+            print_report(BullPutBacktest().run(load_history()))
+
         print("\nRunning strategy...")
         bot.run_strategy()
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep for the SPX Bull Put Credit Spread strategy
+
+Evaluates a grid (or a random sample of it) of strategy settings with
+the vectorized backtest, spread across all cores with a process pool.
+The price history is placed in shared memory once and every worker maps
+it read-only, so nothing is copied per worker or per task. Results are
+collected into one table ranked by the chosen metric.
+
+Run: python sweep.py --samples 5000 --metric total_pnl
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import BullPutBacktest, load_history
+
+# Strategy knobs and the values to try for each
+PARAM_GRID = {
+    'rsi_threshold': [25, 30, 35, 40, 45],
+    'rsi_period': [7, 10, 14, 21],
+    'days_to_expiry': [7, 10, 14, 21, 30, 45],
+    'spread_width': [5, 10, 15],  # Wider spreads risk more than MAX_RISK_PER_TRADE
+    'profit_target': [0.25, 0.5, 0.75],
+    'min_dte': [0, 3, 5, 7, 10],
+}
+
+METRICS = ['total_pnl', 'win_rate', 'max_drawdown', 'num_trades', 'pnl_to_drawdown']
+
+# Per-worker views onto the shared price history, set by _init_worker
+_worker_days = None
+_worker_closes = None
+_worker_shm = None
+
+
+def param_grid(grid=PARAM_GRID) -> list:
+    """Every valid combination in the grid (min_dte must be below days_to_expiry)"""
+    names = list(grid)
+    combos = (dict(zip(names, values)) for values in itertools.product(*grid.values()))
+    return [c for c in combos if c.get('min_dte', 0) < c.get('days_to_expiry', np.inf)]
+
+
+def random_sample(n, grid=PARAM_GRID, seed=None) -> list:
+    """Up to n distinct valid combinations drawn uniformly from the grid"""
+    combos = param_grid(grid)
+    return random.Random(seed).sample(combos, min(n, len(combos)))
+
+
+def _init_worker(shm_name, n):
+    global _worker_days, _worker_closes, _worker_shm
+    # Workers share the parent's resource tracker, so attaching here
+    # does not take ownership; only run_sweep unlinks the block
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_days = np.ndarray((n,), dtype='datetime64[D]', buffer=_worker_shm.buf, offset=0)
+    _worker_closes = np.ndarray((n,), dtype=np.float64, buffer=_worker_shm.buf, offset=8 * n)
+
+
+def _evaluate(chunk) -> list:
+    """Run the backtest for a chunk of parameter sets in a worker"""
+    index = pd.DatetimeIndex(_worker_days)
+    rows = []
+    for params in chunk:
+        result = BullPutBacktest(**params).run_arrays(_worker_days, _worker_closes, index)
+        drawdown = result['max_drawdown']
+        # Undefined without trades (NaN sorts last); a profit that never drew
+        # down beats any finite ratio
+        if result['num_trades'] == 0:
+            ratio = np.nan
+        elif drawdown > 0:
+            ratio = result['total_pnl'] / drawdown
+        else:
+            ratio = np.inf if result['total_pnl'] > 0 else 0.0
+        rows.append({
+            **params,
+            'num_trades': result['num_trades'],
+            'win_rate': result['win_rate'],
+            'total_pnl': result['total_pnl'],
+            'max_drawdown': drawdown,
+            'pnl_to_drawdown': ratio,
+        })
+    return rows
+
+
+def run_sweep(prices, combos, metric='total_pnl', workers=None, chunk_size=64) -> pd.DataFrame:
+    """
+    Evaluate parameter sets in parallel
+
+    Args:
+        prices: Series of daily closes indexed by date
+        combos: List of parameter dicts (see param_grid / random_sample)
+        metric: Column to rank by; max_drawdown ranks ascending
+        workers: Process count, defaults to all cores
+        chunk_size: Parameter sets per task
+
+    Returns:
+        DataFrame with one row per parameter set, best first; sets that
+        never traded come last whatever the metric
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}")
+
+    prices = prices.dropna()
+    days = pd.DatetimeIndex(prices.index).tz_localize(None).normalize().to_numpy(dtype='datetime64[D]')
+    closes = prices.to_numpy(dtype=np.float64)
+    n = len(closes)
+
+    shm = shared_memory.SharedMemory(create=True, size=16 * max(n, 1))
+    try:
+        np.ndarray((n,), dtype='datetime64[D]', buffer=shm.buf, offset=0)[:] = days
+        np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * n)[:] = closes
+
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(shm.name, n)) as pool:
+            for chunk_rows in pool.map(_evaluate, chunks):
+                rows.extend(chunk_rows)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    ascending = metric == 'max_drawdown'
+    results = results.sort_values(metric, ascending=ascending, kind='stable')
+    results = results.sort_values('num_trades', key=lambda trades: trades == 0,
+                                  kind='stable').reset_index(drop=True)
+    results.index.name = 'rank'
+    return results
+
+
+def main():
+    """Sweep the strategy settings over the configured backtest period"""
+    parser = argparse.ArgumentParser(description="Parameter sweep for the SPX bull put strategy")
+    parser.add_argument('--samples', type=int, default=0,
+                        help="Random sample size (0 = full grid)")
+    parser.add_argument('--metric', default='total_pnl', choices=METRICS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    prices = load_history()
+    if prices.empty:
+        print("No price history available")
+        return
+
+    combos = random_sample(args.samples, seed=args.seed) if args.samples else param_grid()
+    print(f"Evaluating {len(combos)} parameter sets...")
+
+    start = time.perf_counter()
+    results = run_sweep(prices, combos, metric=args.metric, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    results.to_csv(args.output)
+    print(f"Done in {elapsed:.1f}s, results written to {args.output}")
+    print(results.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
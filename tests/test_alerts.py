@@ -0,0 +1,287 @@
+"""
+Tests for alerts.py: the email and Telegram channels against local stand-in
+servers, and the pipeline's batching, rate limiting and retries with a
+recording channel.
+"""
+
+import json
+import logging
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alerts import AlertPipeline, DeliveryError, EmailChannel, TelegramChannel
+
+
+class RecordingChannel:
+    """Channel that records every message and fails while `failures` is non-empty"""
+
+    name = 'recording'
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []       # (monotonic time, subject, body)
+        self.attempts = []   # monotonic time of every send call
+
+    def send(self, subject, body):
+        self.attempts.append(time.monotonic())
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((time.monotonic(), subject, body))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def pipelines():
+    started = []
+
+    def make(*channels, **kwargs):
+        pipeline = AlertPipeline(channels, **kwargs).start()
+        started.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in started:
+        pipeline.stop(timeout=5)
+
+
+# Channels
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib.send_message without STARTTLS or AUTH"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost stub")
+        message = {'rcpt': []}
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            command = line.upper()
+            if not line or command.startswith("QUIT"):
+                self.reply("221 bye")
+                return
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command.startswith("MAIL FROM:"):
+                message['from'] = line[10:].strip()
+                self.reply("250 ok")
+            elif command.startswith("RCPT TO:"):
+                message['rcpt'].append(line[8:].strip())
+                self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                data = []
+                while True:
+                    chunk = self.rfile.readline().decode()
+                    if chunk in (".\r\n", ""):
+                        break
+                    data.append(chunk)
+                message['data'] = "".join(data)
+                self.server.messages.append(message)
+                message = {'rcpt': []}
+                self.reply("250 queued")
+            else:
+                self.reply("502 not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_email_channel_sends_message(smtp_server):
+    host, port = smtp_server.server_address
+    channel = EmailChannel(host, port, recipients=['a@example.com', 'b@example.com'],
+                           sender='bot@example.com', starttls=False, timeout=5)
+    channel.send("SPX bot: FILL", "filled at 1.25")
+
+    assert len(smtp_server.messages) == 1
+    message = smtp_server.messages[0]
+    assert message['from'] == '<bot@example.com>'
+    assert message['rcpt'] == ['<a@example.com>', '<b@example.com>']
+    assert "Subject: SPX bot: FILL" in message['data']
+    assert "filled at 1.25" in message['data']
+
+
+class _TelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.server.requests.append((self.path, json.loads(self.rfile.read(length))))
+        status, payload = self.server.responses.pop(0)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def telegram_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _TelegramHandler)
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_telegram_channel_ok_then_rate_limited(telegram_server):
+    host, port = telegram_server.server_address
+    telegram_server.responses = [
+        (200, {'ok': True, 'result': {}}),
+        (429, {'ok': False, 'error_code': 429, 'description': "Too Many Requests: retry after 7",
+               'parameters': {'retry_after': 7}}),
+    ]
+    channel = TelegramChannel('TOKEN', 42, api_url=f"http://{host}:{port}/", timeout=5)
+
+    channel.send("SPX bot: SIGNAL", "RSI 31.2")
+    with pytest.raises(DeliveryError) as error:
+        channel.send("SPX bot: ORDER", "x" * 5000)
+
+    assert error.value.retry_after == 7
+    path, payload = telegram_server.requests[0]
+    assert path == "/botTOKEN/sendMessage"
+    assert payload == {'chat_id': 42, 'text': "SPX bot: SIGNAL\n\nRSI 31.2"}
+    assert len(telegram_server.requests[1][1]['text']) == TelegramChannel.MAX_LENGTH
+
+
+# Pipeline
+
+def test_alerts_in_one_window_are_batched(pipelines):
+    channel = RecordingChannel()
+    pipeline = pipelines(channel, batch_window=0.2, min_interval=0)
+    for kind in ('SIGNAL', 'ORDER', 'FILL'):
+        pipeline.notify(kind, f"{kind.lower()} message")
+
+    assert wait_for(lambda: channel.sent)
+    time.sleep(0.3)
+    assert len(channel.sent) == 1
+    _, subject, body = channel.sent[0]
+    assert subject == "SPX bot: 1 SIGNAL, 1 ORDER, 1 FILL"
+    assert body.count("\n") == 2 and "fill message" in body
+
+
+def test_max_batch_sends_before_window_ends(pipelines):
+    channel = RecordingChannel()
+    pipeline = pipelines(channel, batch_window=30, max_batch=3, min_interval=0)
+    for i in range(3):
+        pipeline.notify('SIGNAL', str(i))
+    assert wait_for(lambda: channel.sent, timeout=2)
+
+
+def test_min_interval_holds_back_and_merges(pipelines):
+    channel = RecordingChannel()
+    pipeline = pipelines(channel, batch_window=0.01, min_interval=0.5)
+    pipeline.notify('SIGNAL', "first")
+    assert wait_for(lambda: channel.sent)
+    pipeline.notify('ORDER', "second")
+    time.sleep(0.05)
+    pipeline.notify('FILL', "third")
+
+    time.sleep(0.2)
+    assert len(channel.sent) == 1
+    assert wait_for(lambda: len(channel.sent) == 2)
+    (first, _, _), (second, subject, _) = channel.sent
+    assert second - first >= 0.45
+    assert subject == "SPX bot: 1 ORDER, 1 FILL"
+
+
+def test_failed_delivery_is_retried_after_requested_delay(pipelines):
+    channel = RecordingChannel([DeliveryError("Too Many Requests", retry_after=0.3)])
+    pipeline = pipelines(channel, batch_window=0.01, min_interval=0, backoff=(0.01, 1.0))
+    pipeline.notify('CLOSE', "closed")
+
+    assert wait_for(lambda: channel.sent)
+    assert channel.attempts[1] - channel.attempts[0] >= 0.29
+    assert "closed" in channel.sent[0][2]
+    assert pipeline.dropped == 0
+
+
+def test_alerts_dropped_after_retries(pipelines):
+    channel = RecordingChannel([OSError("down")] * 3)
+    pipeline = pipelines(channel, batch_window=0.01, min_interval=0, retries=2,
+                         backoff=(0.01, 0.01))
+    pipeline.notify('SIGNAL', "a")
+    pipeline.notify('SIGNAL', "b")
+
+    assert wait_for(lambda: pipeline.dropped == 2)
+    assert len(channel.attempts) == 3
+    assert channel.sent == []
+
+    # The channel recovers for later alerts
+    pipeline.notify('SIGNAL', "c")
+    assert wait_for(lambda: channel.sent)
+    assert channel.sent[0][1] == "SPX bot: SIGNAL c"
+
+
+def test_flush_sends_pending_alerts(pipelines):
+    channel = RecordingChannel()
+    pipeline = pipelines(channel, batch_window=60, min_interval=60)
+    pipeline.notify('SIGNAL', "now")
+    assert pipeline.flush(timeout=5)
+    assert len(channel.sent) == 1
+
+
+# Logging
+
+class _ThreadRecorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []   # (thread name, message)
+
+    def emit(self, record):
+        self.records.append((threading.current_thread().name, record.getMessage()))
+
+
+def test_install_logging_moves_root_handlers_to_worker(pipelines):
+    root = logging.getLogger()
+    console = _ThreadRecorder()
+    root.addHandler(console)
+    level = root.level
+    channel = RecordingChannel()
+    pipeline = pipelines(channel, batch_window=0.01, min_interval=0)
+    try:
+        pipeline.install_logging(logging.INFO)
+        assert console not in root.handlers
+
+        logging.getLogger('spx_bull_put_bot').info("routine")
+        logging.getLogger('spx_bull_put_bot').error("broken")
+        assert pipeline.flush(timeout=5)
+
+        assert console.records == [('alert-pipeline', "routine"), ('alert-pipeline', "broken")]
+        assert [subject for _, subject, _ in channel.sent] == ["SPX bot: ERROR broken"]
+
+        # stop() hands the console back to the root logger
+        pipeline.stop(timeout=5)
+        assert console in root.handlers
+        assert not any(h.__class__.__name__ == '_PipelineHandler' for h in root.handlers)
+    finally:
+        pipeline.stop(timeout=5)
+        root.removeHandler(console)
+        root.setLevel(level)
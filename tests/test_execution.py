@@ -0,0 +1,176 @@
+"""
+Tests for execution.py: the reprice schedule, the slippage clamp, and how
+orders settle on fill, timeout, partial fill and unconfirmed cancels.
+"""
+
+import asyncio
+import math
+
+import pytest
+from ib_insync import Contract, Order, OrderStatus, Trade, util
+
+from execution import (FILLED, PARTIAL, REJECTED, TIMED_OUT, UNCONFIRMED, WORKING,
+                       ExecutionEngine)
+from sim_broker import SimulatedBroker
+
+
+class FakeClient:
+    """
+    Order routing that never fills by itself
+
+    on_cancel decides what the broker answers to a cancel: a
+    (status, filled, avg price) tuple sent after `delay` seconds, or None
+    for no answer at all.
+    """
+
+    def __init__(self, on_cancel=('Cancelled', 0, 0.0), delay=0.0):
+        self.on_cancel = on_cancel
+        self.delay = delay
+        self.trade = None
+        self.limits = []      # lmtPrice of every placeOrder call
+        self.cancels = 0
+
+    def placeOrder(self, contract, order):
+        if self.trade is None:
+            self.trade = Trade(contract=contract, order=order,
+                               orderStatus=OrderStatus(status='Submitted'))
+        self.limits.append(order.lmtPrice)
+        return self.trade
+
+    def cancelOrder(self, order):
+        self.cancels += 1
+        if self.on_cancel is not None:
+            util.getLoop().call_later(self.delay, self.answer, *self.on_cancel)
+
+    def answer(self, status, filled=0, price=0.0):
+        self.trade.orderStatus.status = status
+        self.trade.orderStatus.filled = filled
+        self.trade.orderStatus.avgFillPrice = price
+        self.trade.statusEvent.emit(self.trade)
+
+
+def run_for(seconds):
+    util.run(asyncio.sleep(seconds))
+
+
+def submit(engine, mid=1.00, natural=1.20, quantity=1, done=None):
+    order = Order(orderId=1, action='SELL', totalQuantity=quantity)
+    # Statuses are recorded as reported, the WorkingOrder itself moves on
+    return engine.submit(Contract(), order, mid, natural,
+                         on_done=None if done is None else lambda w: done.append(w.status))
+
+
+# Pricing
+
+@pytest.mark.parametrize('mid, natural, expected', [
+    (2.00, 2.10, 2.10),     # Within the bound
+    (2.00, 3.00, 2.20),     # Clamped to mid + 10%
+    (2.00, 1.00, 1.80),     # Clamped on the other side
+    (2.00, None, 2.00),
+    (2.00, math.nan, 2.00),
+])
+def test_target_clamped_to_max_slippage(mid, natural, expected):
+    engine = ExecutionEngine(FakeClient(), max_slippage=0.10)
+    assert engine._target(mid, natural) == pytest.approx(expected)
+
+
+def test_reprice_schedule_walks_mid_to_target():
+    engine = ExecutionEngine(FakeClient(), timeout=10, steps=4, tick=0.05, max_slippage=0.5)
+    working = submit(engine, mid=1.00, natural=1.40)
+    working.task.cancel()
+    assert engine._schedule(working) == [(2.0, 1.10), (4.0, 1.20), (6.0, 1.30), (8.0, 1.40)]
+
+
+def test_limit_starts_at_rounded_mid_and_market_orders_skip_it():
+    engine = ExecutionEngine(FakeClient(), tick=0.05)
+    working = submit(engine, mid=1.02)
+    assert working.trade.order.orderType == 'LMT' and working.trade.order.lmtPrice == 1.0
+    working.task.cancel()
+
+    engine = ExecutionEngine(FakeClient(), use_limit_orders=False)
+    working = submit(engine)
+    assert working.trade.order.orderType == 'MKT'
+    working.task.cancel()
+
+
+# Settlement
+
+def test_fill_from_sim_broker():
+    engine = ExecutionEngine(SimulatedBroker(), timeout=5)
+    done = []
+    working = submit(engine, done=done)
+    run_for(0.05)
+    assert done == [FILLED]
+    assert working.fill_price == 1.00 and working.filled == 1
+    assert engine.working == {}
+
+
+def test_unfilled_order_is_repriced_then_timed_out():
+    client = FakeClient()
+    engine = ExecutionEngine(client, timeout=0.25, steps=4, max_slippage=0.2)
+    done = []
+    working = submit(engine, mid=1.00, natural=1.20, done=done)
+    run_for(0.5)
+    assert client.limits == [1.00, 1.05, 1.10, 1.15, 1.20]
+    assert working.reprices == 4
+    assert client.cancels == 1
+    assert done == [TIMED_OUT]
+
+
+def test_fill_racing_the_cancel_is_a_fill():
+    client = FakeClient(on_cancel=('Filled', 1, 1.15), delay=0.05)
+    engine = ExecutionEngine(client, timeout=0.1)
+    done = []
+    working = submit(engine, done=done)
+    run_for(0.3)
+    assert done == [FILLED]
+    assert working.fill_price == 1.15
+
+
+def test_cancel_after_partial_fill_is_partial():
+    client = FakeClient(on_cancel=('Cancelled', 2, 1.10))
+    engine = ExecutionEngine(client, timeout=0.1)
+    done = []
+    working = submit(engine, quantity=3, done=done)
+    run_for(0.3)
+    assert done == [PARTIAL]
+    assert working.filled == 2 and working.fill_price == 1.10
+
+
+def test_rejected_order_settles_without_cancel():
+    client = FakeClient()
+    engine = ExecutionEngine(client, timeout=5)
+    done = []
+    submit(engine, done=done)
+    util.getLoop().call_later(0.05, client.answer, 'Cancelled')
+    run_for(0.2)
+    assert done == [REJECTED]
+    assert client.cancels == 0
+
+
+def test_unconfirmed_cancel_stays_tracked_until_the_broker_answers():
+    client = FakeClient(on_cancel=None)
+    engine = ExecutionEngine(client, timeout=0.1, cancel_timeout=0.1)
+    done = []
+    working = submit(engine, done=done)
+    run_for(0.4)
+    assert done == [UNCONFIRMED]
+    assert working.order_id in engine.working
+
+    client.answer('Filled', 1, 1.05)
+    run_for(0.05)
+    assert done == [UNCONFIRMED, FILLED]
+    assert working.fill_price == 1.05
+    assert engine.working == {}
+
+
+def test_cancel_all_stops_working():
+    client = FakeClient()
+    engine = ExecutionEngine(client, timeout=5)
+    working = submit(engine)
+    run_for(0.01)
+    engine.cancel_all()
+    run_for(0.01)
+    assert working.status == WORKING
+    assert working.task.cancelled()
+    assert engine.working == {}
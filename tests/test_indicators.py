@@ -0,0 +1,109 @@
+"""
+Parity tests for the RSI implementations in indicators.py
+
+The vectorized rsi(), its 2-D form and IncrementalRSI are checked against
+a plain loop implementation of Wilder's RSI with TA-Lib seeding, and
+against TA-Lib and pandas_ta themselves when they are installed.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import IncrementalRSI, rsi
+
+PERIODS = [2, 5, 14, 21]
+
+
+def wilder_rsi(closes, period):
+    """Reference RSI: SMA seed of the first `period` changes, then Wilder smoothing"""
+    closes = [float(c) for c in closes]
+    out = [np.nan] * len(closes)
+    if len(closes) <= period:
+        return np.array(out)
+    changes = [b - a for a, b in zip(closes, closes[1:])]
+    avg_gain = sum(max(c, 0.0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0.0) for c in changes[:period]) / period
+    for i in range(period, len(closes)):
+        if i > period:
+            change = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(change, 0.0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-change, 0.0)) / period
+        total = avg_gain + avg_loss
+        out[i] = 100.0 * avg_gain / total if total else 0.0
+    return np.array(out)
+
+
+def random_walk(n, seed=0, start=4500.0):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+
+
+@pytest.fixture
+def closes():
+    return random_walk(400)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_batch_matches_reference(closes, period):
+    np.testing.assert_allclose(rsi(closes, period), wilder_rsi(closes, period),
+                               rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_incremental_matches_reference(closes, period):
+    days = np.arange('2020-01-01', len(closes), dtype='datetime64[D]')
+    engine = IncrementalRSI(period)
+    values = [engine.update(day, close) for day, close in zip(days, closes)]
+    np.testing.assert_allclose(values, wilder_rsi(closes, period),
+                               rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def test_incremental_revises_last_bar(closes):
+    days = np.arange('2020-01-01', len(closes), dtype='datetime64[D]')
+    engine = IncrementalRSI(14)
+    engine.seed(days[:-1], closes[:-1])
+    # Intraday ticks on the latest bar; only the last one should count
+    for tick in (closes[-1] * 0.98, closes[-1] * 1.03, closes[-1]):
+        value = engine.update(days[-1], tick)
+    assert value == pytest.approx(wilder_rsi(closes, 14)[-1], abs=1e-10)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_2d_matches_columns(period):
+    matrix = np.column_stack([random_walk(300, seed) for seed in range(5)])
+    out = rsi(matrix, period)
+    assert out.shape == matrix.shape
+    for column in range(matrix.shape[1]):
+        np.testing.assert_allclose(out[:, column], wilder_rsi(matrix[:, column], period),
+                                   rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def test_2d_missing_column_is_nan():
+    matrix = np.column_stack([random_walk(100, seed) for seed in range(3)])
+    matrix[50, 1] = np.nan
+    out = rsi(matrix, 14)
+    assert np.isnan(out[:, 1]).all()
+    np.testing.assert_allclose(out[:, 0], wilder_rsi(matrix[:, 0], 14), equal_nan=True)
+
+
+def test_short_and_flat_series():
+    assert np.isnan(rsi(np.ones(14), 14)).all()
+    assert np.nanmax(rsi(np.full(30, 100.0), 14)) == 0.0
+    np.testing.assert_allclose(rsi(np.arange(1.0, 31.0), 14)[14:], 100.0)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_matches_talib(closes, period):
+    talib = pytest.importorskip('talib')
+    np.testing.assert_allclose(rsi(closes, period), talib.RSI(closes, timeperiod=period),
+                               rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_matches_pandas_ta_after_seed(closes, period):
+    ta = pytest.importorskip('pandas_ta')
+    expected = ta.rsi(pd.Series(closes), length=period, talib=False).to_numpy()
+    # pandas_ta seeds with an EWM rather than an SMA; compare once it has decayed
+    np.testing.assert_allclose(rsi(closes, period)[200:], expected[200:],
+                               rtol=1e-6, atol=1e-6)
@@ -0,0 +1,231 @@
+"""
+Tests for market_bus.py: round trips through the shared block, the
+version protocol readers use against a concurrent writer, the intraday
+ring, and BusClient's view of it.
+"""
+
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from ib_insync import Index, Option
+
+from market_bus import MINUTE, REALTIME, BusClient, MarketDataBus
+
+
+@pytest.fixture
+def bus():
+    writer = MarketDataBus(create=True, bar_capacity=8, quote_slots=16)
+    writer.heartbeat()
+    yield writer
+    writer.close()
+    writer.unlink()
+
+
+@pytest.fixture
+def reader(bus):
+    attached = MarketDataBus(bus.name)
+    yield attached
+    attached.close()
+
+
+def test_attach_rejects_other_blocks():
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=4096)
+    try:
+        with pytest.raises(ValueError):
+            MarketDataBus(block.name)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_symbol_chain_and_daily_round_trip(bus, reader):
+    index = bus.add_symbol('SPX', 416904)
+    bus.set_chain(index, 'SPXW', '100', ['20261120', '20261030'], [5010.0, 4990.0, 5000.0])
+    bus.publish_spot(index, 5003.25, datetime(2026, 10, 16, 15, 0, tzinfo=timezone.utc))
+    days = [datetime(2026, 10, d) for d in (14, 15, 16)]
+    bus.publish_daily(index, days, [1, 2, 3], [2, 3, 4], [0, 1, 2], [1.5, 2.5, 3.5])
+    # Today's bar is revised in place
+    bus.publish_daily(index, days[-1:], [3], [5], [2], [4.5])
+
+    assert reader.symbol_id('SPX') == index and reader.symbol_id('NDX') == -1
+    row = reader.symbol(index)
+    assert int(row['con_id']) == 416904 and float(row['spot']) == 5003.25
+    assert int(row['version']) % 2 == 0
+    trading_class, multiplier, expirations, strikes = reader.chain(index)
+    assert (trading_class, multiplier) == ('SPXW', '100')
+    assert expirations == ['20261030', '20261120']
+    np.testing.assert_array_equal(strikes, [4990.0, 5000.0, 5010.0])
+    daily = reader.daily_bars(index)
+    np.testing.assert_array_equal(daily['close'], [1.5, 2.5, 4.5])
+    assert daily['time'][-1] == np.datetime64('2026-10-16', 'ns')
+
+
+def test_quote_round_trip(bus, reader):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    assert reader.find_quote(index, '20261120', 4900.0, 'P') == slot
+    assert reader.find_quote(index, '20261120', 4900.0, 'C') == -1
+    assert int(reader.read_quote(slot)['version']) == 0   # No quote yet
+
+    bus.publish_quote(slot, 12.1, 12.6, 12.3)
+    quote = reader.read_quote(slot)
+    assert (float(quote['bid']), float(quote['ask']), float(quote['last'])) == (12.1, 12.6, 12.3)
+    assert int(quote['con_id']) == 555 and int(quote['version']) == 2
+
+
+def test_reader_waits_out_a_torn_write(bus, reader):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    bus.publish_quote(slot, 1.0, 1.2, 1.1)
+
+    # Writer stopped halfway through an update: odd version, bid new, ask old
+    row = bus.quotes[slot:slot + 1]
+    row['version'] += 1
+    row['bid'] = 2.0
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(reader.read_quote(slot)), daemon=True)
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive() and not result   # Never hands out the half-written row
+
+    row['ask'] = 2.2
+    row['version'] += 1
+    thread.join(2)
+    assert (float(result[0]['bid']), float(result[0]['ask'])) == (2.0, 2.2)
+
+
+def test_reader_retries_when_version_moves_during_read(bus):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    bus.publish_quote(slot, 1.0, 1.2, 1.1)
+    reads = []
+
+    def read():
+        copy = bus.quotes[slot].copy()
+        reads.append(copy)
+        if len(reads) == 1:
+            # A whole update lands between the copy and the version re-check
+            bus.publish_quote(slot, 3.0, 3.2, 3.1)
+        return copy
+
+    quote = bus._consistent(bus.quotes, slot, read)
+    assert len(reads) == 2
+    assert float(quote['bid']) == 3.0 and int(quote['version']) == 4
+
+
+def test_bar_ring_reader_and_lapped_reader(bus, reader):
+    index = bus.add_symbol('SPX', 1)
+    times = [datetime(2026, 10, 16, 14, m) for m in range(5)]
+    bus.publish_bars(index, MINUTE, times, *[np.arange(5.0)] * 4)
+
+    records, position = reader.bars_since(0)
+    assert position == 5
+    np.testing.assert_array_equal(records['seq'], [1, 2, 3, 4, 5])
+    assert len(reader.bars_since(position)[0]) == 0
+
+    # 12 more bars wrap the 8-slot ring; a reader still at 5 was lapped
+    times = [datetime(2026, 10, 16, 15, m) for m in range(12)]
+    bus.publish_bars(index, REALTIME, times, *[np.arange(12.0)] * 4)
+    records, position = reader.bars_since(5)
+    assert position == 17
+    np.testing.assert_array_equal(records['seq'], np.arange(10, 18))
+    assert (records['kind'] == REALTIME).all()
+
+
+def test_bar_ring_drops_records_overwritten_mid_read(bus, reader):
+    index = bus.add_symbol('SPX', 1)
+    bus.publish_bars(index, MINUTE, [datetime(2026, 10, 16, 14, m) for m in range(8)],
+                     *[np.zeros(8)] * 4)
+    # Head says 8, but slot 0 already holds a record from a later lap
+    bus.bars['seq'][0] = 0
+    records, _ = reader.bars_since(0)
+    np.testing.assert_array_equal(records['seq'], np.arange(2, 9))
+
+
+def _read_from_child(name, slot, results):
+    attached = MarketDataBus(name)
+    try:
+        quote = attached.read_quote(slot)
+        results.put((float(quote['bid']), float(quote['ask'])))
+    finally:
+        attached.close()
+
+
+def test_quote_visible_to_another_process(bus):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    bus.publish_quote(slot, 4.5, 4.7, 4.6)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    child = context.Process(target=_read_from_child, args=(bus.name, slot, results))
+    child.start()
+    try:
+        assert results.get(timeout=30) == (4.5, 4.7)
+    finally:
+        child.join(30)
+    assert child.exitcode == 0
+
+
+# BusClient
+
+@pytest.fixture
+def client(bus, monkeypatch):
+    bus_client = BusClient(MarketDataBus(bus.name))
+    monkeypatch.setattr(bus_client, '_start', lambda: None)   # Polled by hand below
+    yield bus_client
+    bus_client.bus.close()
+
+
+def spx_put(strike=4900.0):
+    return Option('SPX', '20261120', strike, 'P', 'SMART')
+
+
+def test_client_streams_spot_and_quotes(bus, client):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    underlying = client.reqMktData(Index('SPX', 'CBOE'))
+    leg = client.reqMktData(spx_put())
+
+    client._poll()
+    assert leg.bid != leg.bid   # Nothing published yet
+
+    bus.publish_spot(index, 5001.0)
+    bus.publish_quote(slot, 8.0, 8.4, 8.2)
+    client._poll()
+    assert underlying.last == 5001.0
+    assert (leg.bid, leg.ask, leg.last) == (8.0, 8.4, 8.2)
+
+
+def test_client_shares_tickers_until_last_cancel(bus, client):
+    index = bus.add_symbol('SPX', 1)
+    slot = bus.add_quote(index, '20261120', 4900.0, 'P', 555)
+    scan, position = spx_put(), spx_put()
+
+    ticker = client.reqMktData(scan)
+    assert client.reqMktData(position) is ticker
+    client.cancelMktData(scan)
+
+    bus.publish_quote(slot, 6.0, 6.3, 6.1)
+    client._poll()
+    assert ticker.bid == 6.0   # The position still streams
+
+    client.cancelMktData(position)
+    bus.publish_quote(slot, 7.0, 7.3, 7.1)
+    client._poll()
+    assert ticker.bid == 6.0
+
+
+def test_client_disconnects_when_feed_stops(bus, client, monkeypatch):
+    disconnects = []
+    client.disconnectedEvent += lambda: disconnects.append(True)
+    monkeypatch.setattr(client.bus, 'is_alive', lambda timeout=5.0: False)
+    client._poll()
+    assert not client.isConnected() and disconnects == [True]
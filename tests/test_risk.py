@@ -0,0 +1,155 @@
+"""
+Tests for risk.py: the shared max-loss budget and the Monte Carlo
+simulation of the book, with fixed seeds so every run is identical.
+"""
+
+import math
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from risk import MonteCarloRisk, PortfolioRiskBudget
+
+NOW = datetime(2026, 10, 16, 16, 0)
+
+
+def spread(short=5000.0, long=4990.0, credit=2.0, contracts=100, days=30, spot=5000.0,
+           iv=0.20, symbol='SPX'):
+    return {'symbol': symbol, 'short_strike': short, 'long_strike': long, 'credit': credit,
+            'contracts': contracts, 'expiry': NOW + timedelta(days=days), 'spot': spot,
+            'iv': iv}
+
+
+def norm_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+# PortfolioRiskBudget
+
+def test_budget_accepts_until_limit_then_rejects():
+    budget = PortfolioRiskBudget(2000)
+    assert budget.reserve('a', 800, spread())
+    assert budget.reserve('b', 1200)
+    assert budget.available == 0
+
+    assert not budget.can_take(1)
+    assert not budget.reserve('c', 1, spread())
+    assert budget.used == 2000
+    assert len(budget.spreads) == 1   # A rejected reservation stores nothing
+
+
+def test_budget_release_and_restore():
+    budget = PortfolioRiskBudget(1000)
+    budget.reserve('a', 1000, spread())
+    budget.release('a')
+    budget.release('missing')
+    assert budget.used == 0 and budget.spreads == []
+
+    # Positions restored at startup are booked even past the limit
+    budget.restore('a', 900)
+    budget.restore('b', 900, spread())
+    assert budget.used == 1800 and budget.available == -800
+    assert not budget.reserve('c', 1)
+
+    # Restoring again (e.g. at fill) replaces the reservation
+    budget.restore('b', 100)
+    assert budget.used == 1000
+
+
+def test_budget_market_updates_keep_the_other_field():
+    budget = PortfolioRiskBudget(1000)
+    budget.update_market('SPX', spot=5000.0)
+    budget.update_market('SPX', vol=0.18)
+    budget.update_market('SPX', spot=5010.0)
+    assert budget.markets == {'SPX': (5010.0, 0.18)}
+
+
+def test_budget_never_overcommitted_by_concurrent_reserves():
+    budget = PortfolioRiskBudget(10_000)
+    accepted = []
+    start = threading.Barrier(8)
+
+    def worker(n):
+        start.wait()
+        for i in range(50):
+            if budget.reserve(f"{n}-{i}", 70):
+                accepted.append(1)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(accepted) == 10_000 // 70
+    assert budget.used <= budget.limit
+
+
+# MonteCarloRisk
+
+def test_empty_book():
+    result = MonteCarloRisk(seed=1).simulate([], now=NOW)
+    assert result == {'prob_loss': 0.0, 'expected_pnl': 0.0, 'var': 0.0, 'cvar': 0.0,
+                      'worst': 0.0, 'max_loss': 0.0}
+
+
+def test_same_seed_same_result():
+    book = [spread(), spread(4900, 4880, 1.0, days=10)]
+    assert (MonteCarloRisk(seed=7).simulate(book, now=NOW)
+            == MonteCarloRisk(seed=7).simulate(book, now=NOW))
+
+
+def test_far_out_of_the_money_spread_keeps_its_credit():
+    book = [spread(short=4000, long=3990, credit=0.5, iv=0.05)]
+    result = MonteCarloRisk(seed=3).simulate(book, now=NOW)
+    assert result['prob_loss'] == 0.0
+    assert result['expected_pnl'] == pytest.approx(50.0)
+    assert result['var'] == 0.0 and result['cvar'] == 0.0
+    assert result['max_loss'] == pytest.approx(950.0)
+
+
+@pytest.mark.parametrize('short, iv', [(5000.0, 0.20), (4900.0, 0.15), (4800.0, 0.30)])
+def test_prob_loss_matches_lognormal_breakeven(short, iv):
+    engine = MonteCarloRisk(paths=40000, rate=0.04, seed=11)
+    credit, years, spot = 2.0, 30 / 365.0, 5000.0
+    result = engine.simulate([spread(short, short - 10, credit, iv=iv, spot=spot)], now=NOW)
+
+    breakeven = short - credit
+    expected = norm_cdf((math.log(breakeven / spot) - (0.04 - 0.5 * iv * iv) * years)
+                        / (iv * math.sqrt(years)))
+    assert result['prob_loss'] == pytest.approx(expected, abs=0.01)
+
+
+def test_var_bounded_by_max_loss():
+    # Max loss is likely enough that the 95% tail sits right at it
+    book = [spread(short=5000, long=4990, credit=2.0, iv=0.40)]
+    result = MonteCarloRisk(confidence=0.95, seed=5).simulate(book, now=NOW)
+    assert result['var'] == pytest.approx(result['max_loss'])
+    assert result['cvar'] == pytest.approx(result['max_loss'])
+    assert result['worst'] == pytest.approx(result['max_loss'])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_tail_measures_are_ordered(seed):
+    book = [spread(), spread(4950, 4930, 3.0, contracts=200, days=10),
+            spread(430, 425, 0.8, contracts=300, days=20, spot=440.0, iv=0.25, symbol='QQQ')]
+    result = MonteCarloRisk(seed=seed).simulate(book, now=NOW)
+    assert 0.0 <= result['var'] <= result['cvar'] <= result['worst'] <= result['max_loss']
+    max_loss = sum((s['short_strike'] - s['long_strike'] - s['credit']) * s['contracts']
+                   for s in book)
+    assert result['max_loss'] == pytest.approx(max_loss)
+
+
+def test_market_overrides_spread_terms_and_unpriced_is_worst_case():
+    book = [spread(short=5000, long=4990, credit=2.0, spot=None, iv=None)]
+    engine = MonteCarloRisk(seed=2)
+
+    unpriced = engine.simulate(book, now=NOW)
+    assert unpriced['prob_loss'] == 1.0
+    assert unpriced['var'] == pytest.approx(800.0)
+
+    # Spot far above the short strike in the market table: nearly riskless
+    priced = engine.simulate(book, markets={'SPX': (6000.0, 0.10)}, now=NOW)
+    assert priced['prob_loss'] == 0.0
+    assert priced['expected_pnl'] == pytest.approx(200.0)